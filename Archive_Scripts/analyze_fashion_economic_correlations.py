@@ -5,6 +5,16 @@ matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.colors import LinearSegmentedColormap
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline_config import load_config
+from pipeline_io import OutputWriter, matrix_frame
+
+config = load_config()
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
 
 pink_navy_grey_colors = [
     "#f1d0d6",
@@ -20,7 +30,7 @@ pink_navy_grey_cmap = LinearSegmentedColormap.from_list(
 )
 
 # Load the data
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\master_dataset_complete.csv')
+df = pd.read_csv(config.output_path('Processed_Data', 'master_dataset_complete.csv'))
 df['date'] = pd.to_datetime(df['date'])
 
 print("=== Fashion vs Economic Indicators Correlation Analysis ===\n")
@@ -156,9 +166,10 @@ plt.yticks(rotation=0)
 plt.tight_layout()
 
 # Save heatmap
-heatmap_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\fashion_economic_correlation_heatmap.png'
-plt.savefig(heatmap_path, dpi=300, bbox_inches='tight')
-print(f"\nHeatmap saved to: {heatmap_path}")
+heatmap_path = 'Viz/fashion_economic_correlation_heatmap.png'
+saved = writer.save_figure(fig, heatmap_path, spec=(fashion_econ_corr, fashion_labels, economic_labels),
+                           dpi=300, bbox_inches='tight')
+print(f"\nHeatmap {'saved to' if saved else 'unchanged'}: {heatmap_path}")
 
 # Create a second visualization: Top correlations bar chart
 fig2, ax2 = plt.subplots(figsize=(14, 8))
@@ -186,16 +197,17 @@ for i, (idx, row) in enumerate(top_20.iterrows()):
 plt.tight_layout()
 
 # Save bar chart
-barchart_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\fashion_economic_top_correlations.png'
-plt.savefig(barchart_path, dpi=300, bbox_inches='tight')
-print(f"Bar chart saved to: {barchart_path}")
+barchart_path = 'Viz/fashion_economic_top_correlations.png'
+saved = writer.save_figure(fig2, barchart_path, spec=(top_20,), dpi=300, bbox_inches='tight')
+print(f"Bar chart {'saved to' if saved else 'unchanged'}: {barchart_path}")
 
 # Close all figures to avoid blocking
 plt.close('all')
 
 # Save detailed correlation table to CSV
-output_csv = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\fashion_economic_correlations.csv'
-fashion_econ_corr.to_csv(output_csv)
+output_csv = 'Processed_Data/fashion_economic_correlations.csv'
+writer.write(matrix_frame(fashion_econ_corr), output_csv)
+writer.close()
 print(f"Detailed correlation table saved to: {output_csv}")
 
 print("\n=== Analysis Complete ===")
@@ -4,10 +4,20 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline_config import load_config
+from pipeline_io import OutputWriter, matrix_frame
+from stats_engine import correlation_matrices
+
+config = load_config()
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
 
 # Load the data
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\master_dataset_complete.csv')
+df = pd.read_csv(config.output_path('Processed_Data', 'master_dataset_complete.csv'))
 df['date'] = pd.to_datetime(df['date'])
 
 print("=== Binary Significance Matrix (1 = Significant, 0 = Not Significant) ===\n")
@@ -40,19 +50,8 @@ economic_indicators = [
 df_corr = df[fashion_indicators + economic_indicators].dropna()
 print(f"Using {len(df_corr)} complete observations\n")
 
-# Calculate correlation and p-value matrices
-correlation_matrix = pd.DataFrame(index=fashion_indicators, columns=economic_indicators)
-p_value_matrix = pd.DataFrame(index=fashion_indicators, columns=economic_indicators)
-
-for fashion_var in fashion_indicators:
-    for econ_var in economic_indicators:
-        corr, p_value = stats.pearsonr(df_corr[fashion_var], df_corr[econ_var])
-        correlation_matrix.loc[fashion_var, econ_var] = corr
-        p_value_matrix.loc[fashion_var, econ_var] = p_value
-
-# Convert to float
-correlation_matrix = correlation_matrix.astype(float)
-p_value_matrix = p_value_matrix.astype(float)
+# Calculate correlation and p-value matrices (all pairs from one pass)
+correlation_matrix, p_value_matrix = correlation_matrices(df_corr, fashion_indicators, economic_indicators)
 
 # Create binary significance matrix (1 = significant at p < 0.05, 0 = not significant)
 binary_significance = (p_value_matrix < 0.05).astype(int)
@@ -115,14 +114,16 @@ plt.yticks(rotation=0, fontsize=11)
 plt.tight_layout()
 
 # Save figure
-output_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\binary_significance_matrix.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"Binary significance matrix saved to: {output_path}")
+output_path = 'Viz/binary_significance_matrix.png'
+saved = writer.save_figure(fig, output_path, spec=(binary_significance, fashion_labels, economic_labels),
+                           dpi=300, bbox_inches='tight')
+print(f"Binary significance matrix {'saved to' if saved else 'unchanged'}: {output_path}")
 
 plt.close('all')
 
 # Save binary matrix to CSV
-binary_significance.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\binary_significance_matrix.csv')
+writer.write(matrix_frame(binary_significance), 'Processed_Data/binary_significance_matrix.csv')
+writer.close()
 print("Binary significance matrix saved to: Processed_Data/binary_significance_matrix.csv")
 
 # Print detailed breakdown
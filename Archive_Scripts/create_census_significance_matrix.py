@@ -1,13 +1,24 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicator_labels import correlation_strength
+from pipeline_config import load_config
+from pipeline_io import OutputWriter, matrix_frame
+from stats_engine import correlation_matrices
+
+config = load_config()
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
 
 # Load the census timeseries data (1992-2025)
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Tableau_Data\tableau_census_timeseries.csv')
+df = pd.read_csv(config.output_path('Tableau_Data', 'tableau_census_timeseries.csv'))
 df['observation_date'] = pd.to_datetime(df['observation_date'])
 
 print("=== Census Data Significance Matrix (1992-2025) ===\n")
@@ -55,20 +66,9 @@ economic_variables = [
     'inflation_yoy'
 ]
 
-# Calculate correlation and p-value matrices
-correlation_matrix = pd.DataFrame(index=fashion_variables, columns=economic_variables)
-p_value_matrix = pd.DataFrame(index=fashion_variables, columns=economic_variables)
-
+# Calculate correlation and p-value matrices (all pairs from one pass)
 print("Calculating correlations and p-values...\n")
-for fashion_var in fashion_variables:
-    for econ_var in economic_variables:
-        corr, p_value = stats.pearsonr(df_final[fashion_var], df_final[econ_var])
-        correlation_matrix.loc[fashion_var, econ_var] = corr
-        p_value_matrix.loc[fashion_var, econ_var] = p_value
-
-# Convert to float
-correlation_matrix = correlation_matrix.astype(float)
-p_value_matrix = p_value_matrix.astype(float)
+correlation_matrix, p_value_matrix = correlation_matrices(df_final, fashion_variables, economic_variables)
 
 # Create binary significance matrix (1 = significant at p < 0.05, 0 = not significant)
 binary_significance = (p_value_matrix < 0.05).astype(int)
@@ -142,22 +142,25 @@ plt.yticks(rotation=0, fontsize=11)
 plt.tight_layout()
 
 # Save figure
-output_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\census_binary_significance_matrix.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"Binary significance matrix saved to: {output_path}")
+output_path = 'Viz/census_binary_significance_matrix.png'
+saved = writer.save_figure(fig, output_path, spec=(binary_significance, fashion_display, economic_display),
+                           dpi=300, bbox_inches='tight')
+print(f"Binary significance matrix {'saved to' if saved else 'unchanged'}: {output_path}")
 
 plt.close('all')
 
 # Save matrices to CSV
-binary_significance.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_binary_significance_matrix.csv')
-correlation_matrix.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_correlation_matrix.csv')
-p_value_matrix.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_pvalue_matrix.csv')
+writer.write(matrix_frame(binary_significance), 'Processed_Data/census_binary_significance_matrix.csv')
+writer.write(matrix_frame(correlation_matrix), 'Processed_Data/census_correlation_matrix.csv')
+writer.write(matrix_frame(p_value_matrix), 'Processed_Data/census_pvalue_matrix.csv')
+writer.close()
 
 print("Matrices saved to Processed_Data/")
 print()
 
 # Print detailed results
 print("=== Detailed Results ===\n")
+strength_matrix = correlation_strength(correlation_matrix)
 for fashion_var in fashion_variables:
     fashion_label = fashion_labels[fashion_var]
     print(f"\n{fashion_label}:")
@@ -167,15 +170,7 @@ for fashion_var in fashion_variables:
         p_val = p_value_matrix.loc[fashion_var, econ_var]
         sig = "SIGNIFICANT" if binary_significance.loc[fashion_var, econ_var] == 1 else "Not significant"
 
-        # Interpret correlation strength
-        if abs(corr) > 0.7:
-            strength = "very strong"
-        elif abs(corr) > 0.5:
-            strength = "strong"
-        elif abs(corr) > 0.3:
-            strength = "moderate"
-        else:
-            strength = "weak"
+        strength = strength_matrix.loc[fashion_var, econ_var]
 
         direction = "positive" if corr > 0 else "negative"
 
@@ -3,9 +3,19 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.patches import Rectangle
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline_config import load_config
+from pipeline_io import OutputWriter
+
+config = load_config()
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
 
 # Load the data
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\master_dataset_complete.csv')
+df = pd.read_csv(config.output_path('Processed_Data', 'master_dataset_complete.csv'))
 df['date'] = pd.to_datetime(df['date'])
 
 # Define recession periods (NBER official dates)
@@ -72,9 +82,12 @@ ax.legend(handles, labels, loc='upper left', fontsize=12, framealpha=0.9)
 plt.tight_layout()
 
 # Save the figure
-output_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\lipstick_miniskirt_recession_timeseries.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"Visualization saved to: {output_path}")
+output_path = 'Viz/lipstick_miniskirt_recession_timeseries.png'
+saved = writer.save_figure(fig, output_path,
+                           spec=(df[['date', 'Lipstick Index_score', 'Mini Skirts_score']], recessions),
+                           dpi=300, bbox_inches='tight')
+writer.close()
+print(f"Visualization {'saved to' if saved else 'unchanged'}: {output_path}")
 
 # Display the plot
 plt.show()
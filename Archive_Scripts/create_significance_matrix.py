@@ -1,13 +1,24 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicator_labels import significance_level, correlation_strength
+from pipeline_config import load_config
+from pipeline_io import OutputWriter, matrix_frame
+from stats_engine import correlation_matrices
+
+config = load_config()
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
 
 # Load the data
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\master_dataset_complete.csv')
+df = pd.read_csv(config.output_path('Processed_Data', 'master_dataset_complete.csv'))
 df['date'] = pd.to_datetime(df['date'])
 
 print("=== Statistical Significance Analysis ===\n")
@@ -45,35 +56,13 @@ correlation_matrix = df_corr[fashion_indicators].corrwith(df_corr[economic_indic
 fashion_econ_corr = df_corr[fashion_indicators + economic_indicators].corr()
 fashion_econ_corr = fashion_econ_corr.loc[fashion_indicators, economic_indicators]
 
-# Calculate p-values for each correlation
-p_value_matrix = pd.DataFrame(index=fashion_indicators, columns=economic_indicators)
-
+# Calculate p-values for each correlation (all pairs from one pass)
 print("Calculating p-values for each correlation...\n")
-for fashion_var in fashion_indicators:
-    for econ_var in economic_indicators:
-        # Calculate Pearson correlation and p-value
-        corr, p_value = stats.pearsonr(df_corr[fashion_var], df_corr[econ_var])
-        p_value_matrix.loc[fashion_var, econ_var] = p_value
-
-# Convert p-values to float
-p_value_matrix = p_value_matrix.astype(float)
+_, p_value_matrix = correlation_matrices(df_corr, fashion_indicators, economic_indicators)
 
 # Create significance levels
 # *** p < 0.001, ** p < 0.01, * p < 0.05, . p < 0.1
-significance_matrix = pd.DataFrame(index=fashion_indicators, columns=economic_indicators, dtype=str)
-for fashion_var in fashion_indicators:
-    for econ_var in economic_indicators:
-        p_val = p_value_matrix.loc[fashion_var, econ_var]
-        if p_val < 0.001:
-            significance_matrix.loc[fashion_var, econ_var] = '***'
-        elif p_val < 0.01:
-            significance_matrix.loc[fashion_var, econ_var] = '**'
-        elif p_val < 0.05:
-            significance_matrix.loc[fashion_var, econ_var] = '*'
-        elif p_val < 0.1:
-            significance_matrix.loc[fashion_var, econ_var] = '.'
-        else:
-            significance_matrix.loc[fashion_var, econ_var] = 'ns'
+significance_matrix = significance_level(p_value_matrix, marginal=True)
 
 # Print summary
 print("=== P-Value Matrix ===")
@@ -169,21 +158,9 @@ for i, fashion_var in enumerate(fashion_indicators):
         p_val = p_value_matrix.loc[fashion_var, econ_var]
         sig_stars = significance_matrix.loc[fashion_var, econ_var]
 
-        if p_val < 0.001:
-            annotation = '<0.001\n***'
-            text_color = 'white'
-        elif p_val < 0.01:
-            annotation = f'{p_val:.3f}\n**'
-            text_color = 'white'
-        elif p_val < 0.05:
-            annotation = f'{p_val:.3f}\n*'
-            text_color = 'black'
-        elif p_val < 0.1:
-            annotation = f'{p_val:.3f}\n.'
-            text_color = 'black'
-        else:
-            annotation = f'{p_val:.3f}\nns'
-            text_color = 'black'
+        p_text = '<0.001' if p_val < 0.001 else f'{p_val:.3f}'
+        annotation = f'{p_text}\n{sig_stars}'
+        text_color = 'white' if p_val < 0.01 else 'black'
 
         ax2.text(j + 0.5, i + 0.5, annotation,
                 ha='center', va='center', color=text_color, fontsize=8, fontweight='bold')
@@ -201,15 +178,18 @@ plt.suptitle('Fashion vs Economic Indicators: Correlation & Statistical Signific
 plt.tight_layout()
 
 # Save figure
-output_path = r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\fashion_economic_significance_matrix.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"Significance matrix visualization saved to: {output_path}")
+output_path = 'Viz/fashion_economic_significance_matrix.png'
+saved = writer.save_figure(fig, output_path,
+                           spec=(fashion_econ_corr, significance_matrix, fashion_labels, economic_labels),
+                           dpi=300, bbox_inches='tight')
+print(f"Significance matrix visualization {'saved to' if saved else 'unchanged'}: {output_path}")
 
 plt.close('all')
 
 # Save matrices to CSV
-p_value_matrix.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\fashion_economic_pvalues.csv')
-significance_matrix.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\fashion_economic_significance.csv')
+writer.write(matrix_frame(p_value_matrix), 'Processed_Data/fashion_economic_pvalues.csv')
+writer.write(matrix_frame(significance_matrix), 'Processed_Data/fashion_economic_significance.csv')
+writer.close()
 print("P-value matrix saved to: Processed_Data/fashion_economic_pvalues.csv")
 print("Significance matrix saved to: Processed_Data/fashion_economic_significance.csv")
 
@@ -228,18 +208,21 @@ for fashion_var in fashion_indicators:
                 'Economic': econ_label_mapping[econ_var],
                 'Correlation': corr_val,
                 'P-value': p_val,
-                'Interpretation': 'Highly significant' if abs(corr_val) > 0.5 else 'Significant'
             })
 
 # Sort by absolute correlation
 significant_corrs_df = pd.DataFrame(significant_corrs)
 if len(significant_corrs_df) > 0:
     significant_corrs_df['Abs_Corr'] = significant_corrs_df['Correlation'].abs()
+    significant_corrs_df['Interpretation'] = correlation_strength(
+        significant_corrs_df['Correlation'], levels=[(0.5, 'Highly significant')], default='Significant')
+    significant_corrs_df['Strength'] = correlation_strength(
+        significant_corrs_df['Correlation'], levels=[(0.8, 'very strong'), (0.5, 'strong')], default='moderate')
     significant_corrs_df = significant_corrs_df.sort_values('Abs_Corr', ascending=False)
 
     for idx, row in significant_corrs_df.head(15).iterrows():
         direction = "positive" if row['Correlation'] > 0 else "negative"
-        strength = "very strong" if abs(row['Correlation']) > 0.8 else "strong" if abs(row['Correlation']) > 0.5 else "moderate"
+        strength = row['Strength']
         print(f"{row['Fashion']} vs {row['Economic']}:")
         print(f"  Correlation: {row['Correlation']:.3f} ({strength} {direction})")
         print(f"  P-value: {row['P-value']:.6f} (p < 0.001)")
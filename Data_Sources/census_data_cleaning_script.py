@@ -1,23 +1,33 @@
 import pandas as pd
 import re
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline_config import load_config
 
 # ----------------------------------------------------
-# Paths
+# Paths (from littleluxuries.json or $LITTLELUXURIES_CONFIG)
 # ----------------------------------------------------
-base = "/Users/sruthivisvanathan/Downloads"
+config = load_config()
 
-file_path = f"{base}/proj1sheet.xlsx"
-cpi_path = f"{base}/CPILFESL.csv"
-cci_path = f"{base}/USACSCICP02STSAM.csv"
+file_path = config.census_workbook
+cpi_path = config.input_path("CPILFESL.csv")
+cci_path = config.input_path("USACSCICP02STSAM.csv")
 
-out_path_wide = f"{base}/result1.csv"
-out_path_long = f"{base}/result1_long.csv"
-out_path_merged = f"{base}/monthlysales_cpi_cci.csv"
+# Extracts go to the cache; point census_file at the merged output to use it in the analysis
+out_path_wide = config.cache_path("census", "result1.csv")
+out_path_long = config.cache_path("census", "result1_long.csv")
+out_path_merged = config.cache_path("census", "census_retail_sales_1992_2025.csv")
 
 # ----------------------------------------------------
 # 1) EXTRACT NAICS 446 + 44812 across year sheets (wide)
 # ----------------------------------------------------
+if not os.path.exists(file_path):
+    print("X Census workbook not found:", file_path)
+    print("  Set census_workbook in littleluxuries.json to the downloaded MRTS workbook")
+    raise SystemExit(1)
+
 # Read all sheets
 sheets = pd.read_excel(file_path, sheet_name=None)
 
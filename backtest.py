@@ -0,0 +1,211 @@
+"""
+Little Luxuries Project - Walk-Forward Backtest
+================================================
+Out-of-sample nowcasts of CCI and unemployment from the latent search scores
+(PART 4C of the master analysis).
+
+Each month t is predicted by a model fitted only on the months before t.
+Instead of refitting at every step, each model is a recursive least-squares
+(RLS) fit: the first min_train months are QR-factored once, and every later
+month is rotated into the triangular factor with Givens rotations after it
+has been forecast (O(k²) per month, and stable where the Sherman-Morrison
+inverse update drifts on collinear scores).
+
+Models per response: random walk (last observed value), AR(1), each
+indicator score alone, AR(1) + each indicator, and AR(1) + all scores.
+Models run across a process pool; each is one task.
+
+The scores themselves must not see the future either: real_time_scores()
+scores month t with seasonal factors, term means/stds and loadings fitted on
+the months before t only, as a nowcaster at t would have had them.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+
+from search_indicators import fit_latent_variables, score_latent_variables
+from seasonal import SeasonalFactors
+
+# Below this many tasks a process pool costs more than it saves
+PARALLEL_MIN_TASKS = 8
+
+
+class RecursiveLeastSquares:
+    """OLS coefficients kept current under one-row-at-a-time additions"""
+
+    def __init__(self, X, y):
+        q, self.R = np.linalg.qr(X)
+        self.z = q.T @ y                  # R @ beta = z
+        self.n = len(y)
+        self._solve()
+
+    def _solve(self):
+        diag = np.abs(np.diag(self.R))
+        if diag.min() > 1e-10 * diag.max():
+            self.beta = solve_triangular(self.R, self.z)
+        else:
+            self.beta = np.linalg.lstsq(self.R, self.z, rcond=None)[0]
+
+    def predict(self, x):
+        return x @ self.beta
+
+    def update(self, x, y):
+        """Add one observation: rotate the row [x, y] into the triangular factor"""
+        x = np.array(x, dtype=float)
+        for i in range(len(x)):
+            a, b = self.R[i, i], x[i]
+            h = np.hypot(a, b)
+            if h == 0:
+                continue
+            c, s = a / h, b / h
+            row = self.R[i, i:].copy()
+            self.R[i, i:] = c * row + s * x[i:]
+            x[i:] = c * x[i:] - s * row
+            self.z[i], y = c * self.z[i] + s * y, c * y - s * self.z[i]
+        self.n += 1
+        self._solve()
+
+
+def walk_forward(X, y, min_train=36):
+    """
+    One-step-ahead forecasts of y from X (rows in time order, constant included).
+    Rows with a missing value are neither forecast nor used for fitting.
+    Returns (forecasts, training months behind each forecast); NaN/0 before min_train.
+    """
+    forecasts = np.full(len(y), np.nan)
+    train_months = np.zeros(len(y), dtype=int)
+    usable = np.flatnonzero(~np.isnan(X).any(axis=1) & ~np.isnan(y))
+    if len(usable) <= min_train:
+        return forecasts, train_months
+
+    start = usable[:min_train]
+    model = RecursiveLeastSquares(X[start], y[start])
+    for t in usable[min_train:]:
+        forecasts[t] = model.predict(X[t])
+        train_months[t] = model.n
+        model.update(X[t], y[t])
+    return forecasts, train_months
+
+
+def _orient(loadings_df, previous):
+    """Flip each indicator's loadings (and so its scores) to point the same way as the previous window's"""
+    if previous is None:
+        return loadings_df
+    loadings_df = loadings_df.copy()
+    for indicator_name, group in loadings_df.groupby('Indicator', sort=False):
+        before = previous[previous['Indicator'] == indicator_name].set_index('Term')['Loading']
+        if (group.set_index('Term')['Loading'] * before).sum() < 0:
+            loadings_df.loc[group.index, 'Loading'] = -group['Loading']
+    return loadings_df
+
+
+def real_time_scores(trends_df, indicators_dict, min_train=36, seasonal_terms=None, date_col='date'):
+    """
+    '<indicator>_score' columns (index of trends_df) where every month from
+    min_train on is scored by a model fitted on the earlier months only, and
+    the first min_train months by the model of the first training window.
+    seasonal_terms: search terms to seasonally adjust with factors fitted on
+    the same window (None leaves the terms as published).
+    """
+    trends_df = trends_df.sort_values(date_col)
+    if len(trends_df) <= min_train:
+        return pd.DataFrame(index=trends_df.index)
+
+    rows, previous = [], None
+    for t in range(min_train, len(trends_df)):
+        window = trends_df.iloc[:t + 1]
+        if seasonal_terms:
+            factors = SeasonalFactors.fit(window.iloc[:t], seasonal_terms, date_col)
+            window = factors.adjust(window, seasonal_terms, date_col, suffix='')
+        _, loadings_df = fit_latent_variables(window.iloc[:t], indicators_dict, n_workers=1)
+        loadings_df = previous = _orient(loadings_df, previous)
+        rows.append(score_latent_variables(window if t == min_train else window.iloc[[t]], loadings_df))
+    return pd.concat(rows).reindex(trends_df.index)
+
+
+def _backtest_task(task):
+    """Pool task: walk-forward forecasts of one model for one response"""
+    response, model_name, X, y, min_train = task
+    if X is None:  # random walk: last observed value
+        forecasts = pd.Series(y).ffill().shift(1).to_numpy()
+        train_months = np.arange(len(y))
+        forecasts[:min_train] = np.nan
+    else:
+        forecasts, train_months = walk_forward(X, y, min_train)
+    return response, model_name, forecasts, train_months
+
+
+def backtest_models(df, responses, score_cols, min_train=36):
+    """Task tuples (response, model, X, y, min_train) for every model of every response"""
+    tasks = []
+    const = np.ones(len(df))
+    for response in responses:
+        y = df[response].to_numpy(dtype=float)
+        lag = np.concatenate([[np.nan], y[:-1]])
+        tasks.append((response, 'Random walk', None, y, min_train))
+        tasks.append((response, 'AR(1)', np.column_stack([const, lag]), y, min_train))
+        for col in score_cols:
+            score = df[col].to_numpy(dtype=float)
+            name = col.replace('_score', '')
+            tasks.append((response, name, np.column_stack([const, score]), y, min_train))
+            tasks.append((response, f'AR(1) + {name}', np.column_stack([const, lag, score]), y, min_train))
+        tasks.append((response, 'AR(1) + all scores',
+                      np.column_stack([const, lag, df[score_cols].to_numpy(dtype=float)]), y, min_train))
+    return tasks
+
+
+def run_backtest(df, responses, score_cols, date_col='date', min_train=36, n_workers=None):
+    """
+    Walk-forward nowcasts for every model and response.
+
+    Returns (nowcasts, summary): the monthly forecast/error series in long
+    form, and per model the forecast count, RMSE, MAE and RMSE relative to
+    AR(1) over the months both forecast.
+    """
+    df = df.sort_values(date_col).reset_index(drop=True)
+    tasks = backtest_models(df, responses, score_cols, min_train)
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(tasks))
+    if n_workers <= 1 or len(tasks) < PARALLEL_MIN_TASKS:
+        results = [_backtest_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_backtest_task, tasks, chunksize=max(1, len(tasks) // (4 * n_workers))))
+
+    frames = []
+    for response, model_name, forecasts, train_months in results:
+        actual = df[response].to_numpy(dtype=float)
+        keep = ~np.isnan(forecasts) & ~np.isnan(actual)
+        frames.append(pd.DataFrame({
+            'date': df[date_col].to_numpy()[keep],
+            'Response': response,
+            'Model': model_name,
+            'Actual': actual[keep],
+            'Forecast': forecasts[keep],
+            'Error': actual[keep] - forecasts[keep],
+            'Train_Months': train_months[keep],
+        }))
+    nowcasts = pd.concat(frames, ignore_index=True)
+
+    summary = []
+    squared = nowcasts.assign(Squared=nowcasts['Error'] ** 2)
+    for response, group in squared.groupby('Response', sort=False):
+        benchmark = group[group['Model'] == 'AR(1)'].set_index('date')['Squared']
+        for model_name, errors in group.groupby('Model', sort=False):
+            common = errors.set_index('date')['Squared'].align(benchmark, join='inner')
+            summary.append({
+                'Response': response,
+                'Model': model_name,
+                'N_forecasts': len(errors),
+                'RMSE': np.sqrt(errors['Squared'].mean()),
+                'MAE': errors['Error'].abs().mean(),
+                'Relative_RMSE_vs_AR1': np.sqrt(common[0].mean() / common[1].mean())
+                                        if len(common[0]) else np.nan,
+            })
+    return nowcasts, pd.DataFrame(summary)
@@ -0,0 +1,137 @@
+"""
+Little Luxuries Project - Customer Cohorts and Retention
+=========================================================
+Cohort × months-since-first-purchase matrices for PART 3H of the master
+analysis: how many of the customers acquired in each month are still buying
+(any purchase, and little luxuries specifically), what they spend, and what
+share of it goes to treats.
+
+Every customer's cohort is the month of their first purchase (e.g. from
+CustomerProfiles.first_day), fixed before the transactions are read. Each
+transaction then maps to one cell, cohort index × months since, and every
+measure is one np.bincount over the flattened cell key. Transactions stream
+in chunks of any size and order; distinct active customers per cell are
+counted once across chunks through the sorted customer-month codes already
+seen.
+"""
+
+import numpy as np
+import pandas as pd
+
+from resampling import period_codes, period_start, MISSING
+
+# customer code * MONTH_SPAN + month code is unique per customer and month (months until 2311)
+MONTH_SPAN = 4096
+
+MEASURES = ['spending', 'luxury_spending', 'transactions', 'active_customers', 'luxury_customers']
+
+
+class CohortMatrices:
+    """Cohort × months-since totals, accumulated chunk by chunk"""
+
+    def __init__(self, customers, first_months):
+        """customers: customer IDs; first_months: month code of each one's first purchase"""
+        self.customers = pd.Index(customers, dtype=object)
+        first_months = np.asarray(first_months, dtype=np.int64)
+        self.first_cohort = int(first_months.min()) if len(first_months) else 0
+        self.cohort = first_months - self.first_cohort
+        self.n_cohorts = int(self.cohort.max()) + 1 if len(first_months) else 0
+        self.cohort_size = np.bincount(self.cohort, minlength=self.n_cohorts)
+        self.totals = {measure: np.zeros((self.n_cohorts, 0)) for measure in MEASURES}
+        self._seen = {'active_customers': np.zeros(0, dtype=np.int64),
+                      'luxury_customers': np.zeros(0, dtype=np.int64)}
+        self.last_month = self.first_cohort - 1
+
+    def _widen(self, n_months):
+        """Extend every matrix to at least n_months months since first purchase"""
+        for measure, matrix in self.totals.items():
+            if matrix.shape[1] < n_months:
+                grown = np.zeros((self.n_cohorts, n_months))
+                grown[:, :matrix.shape[1]] = matrix
+                self.totals[measure] = grown
+
+    def _count_new(self, measure, customer_codes, months, cells, n_cells):
+        """Per-cell count of customer-months not seen in an earlier chunk"""
+        keys, first = np.unique(customer_codes * MONTH_SPAN + months, return_index=True)
+        new = ~np.isin(keys, self._seen[measure], assume_unique=True)
+        self._seen[measure] = np.union1d(self._seen[measure], keys[new])
+        return np.bincount(cells[first[new]], minlength=n_cells)
+
+    def update(self, customer_ids, dates, amounts, luxury):
+        """Add a chunk of transactions (customer, date, amount, little-luxury flag per row)"""
+        customer_codes = self.customers.get_indexer(pd.Index(customer_ids, dtype=object))
+        months = period_codes(dates, 'M')
+        valid = (customer_codes >= 0) & (months != MISSING)
+        customer_codes, months = customer_codes[valid], months[valid]
+        amounts = np.nan_to_num(np.asarray(amounts, dtype=float)[valid])
+        luxury = np.asarray(luxury, dtype=bool)[valid]
+
+        cohort = self.cohort[customer_codes]
+        since = months - (self.first_cohort + cohort)
+        keep = since >= 0                                 # purchases dated before the cohort month are ignored
+        if not keep.all():
+            customer_codes, months, amounts, luxury = (customer_codes[keep], months[keep],
+                                                       amounts[keep], luxury[keep])
+            cohort, since = cohort[keep], since[keep]
+        if len(since) == 0:
+            return self
+        self._widen(int(since.max()) + 1)
+        self.last_month = max(self.last_month, int(months.max()))
+        n_months = self.totals['spending'].shape[1]
+        n_cells = self.n_cohorts * n_months
+        cells = cohort * n_months + since
+
+        # One bincount over the flattened cohort × months-since key per measure
+        counts = {
+            'spending': np.bincount(cells, weights=amounts, minlength=n_cells),
+            'luxury_spending': np.bincount(cells, weights=amounts * luxury, minlength=n_cells),
+            'transactions': np.bincount(cells, minlength=n_cells),
+            'active_customers': self._count_new('active_customers', customer_codes, months, cells, n_cells),
+            'luxury_customers': self._count_new('luxury_customers', customer_codes[luxury], months[luxury],
+                                                cells[luxury], n_cells),
+        }
+        for measure, values in counts.items():
+            self.totals[measure] += values.reshape(self.n_cohorts, n_months)
+        return self
+
+    def matrix(self, measure):
+        """Cohort month × months-since matrix of one measure (or retention_pct / luxury_retention_pct / luxury_share_pct)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if measure == 'retention_pct':
+                values = self.totals['active_customers'] / self.cohort_size[:, None] * 100
+            elif measure == 'luxury_retention_pct':
+                values = self.totals['luxury_customers'] / self.cohort_size[:, None] * 100
+            elif measure == 'luxury_share_pct':
+                values = self.totals['luxury_spending'] / self.totals['spending'] * 100
+            else:
+                values = self.totals[measure]
+        observed = self._observed()
+        return pd.DataFrame(np.where(observed, values, np.nan), index=self._cohort_months(),
+                            columns=pd.RangeIndex(values.shape[1], name='months_since'))
+
+    def _cohort_months(self):
+        return pd.DatetimeIndex(period_start(self.first_cohort + np.arange(self.n_cohorts), 'M'), name='cohort')
+
+    def _observed(self):
+        """Cells a cohort has reached by the last month with any transaction"""
+        horizon = self.last_month - (self.first_cohort + np.arange(self.n_cohorts))
+        return np.arange(self.totals['spending'].shape[1])[None, :] <= horizon[:, None]
+
+    def frame(self):
+        """Long form: one row per cohort and month since first purchase the cohort has reached"""
+        cohort_index, since = np.nonzero(self._observed())
+        frame = pd.DataFrame({
+            'cohort': self._cohort_months()[cohort_index],
+            'months_since': since,
+            'month': period_start(self.first_cohort + cohort_index + since, 'M'),
+            'cohort_size': self.cohort_size[cohort_index],
+        })
+        for measure in MEASURES:
+            frame[measure] = self.totals[measure][cohort_index, since]
+        for measure in ['retention_pct', 'luxury_retention_pct', 'luxury_share_pct']:
+            frame[measure] = self.matrix(measure).to_numpy()[cohort_index, since]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame['spending_per_customer'] = frame['spending'] / frame['cohort_size']
+        frame[['transactions', 'active_customers', 'luxury_customers']] = \
+            frame[['transactions', 'active_customers', 'luxury_customers']].astype(np.int64)
+        return frame[frame['cohort_size'] > 0].reset_index(drop=True)
@@ -0,0 +1,183 @@
+"""
+Little Luxuries Project - Customer Treat Profiles
+==================================================
+Per-customer treat behavior for PART 3G of the master analysis: luxury share
+of wallet, purchase frequency, recency, average ticket and category mix, in
+total and per year.
+
+Profiles live in a columnar, array-backed table: one row per integer-coded
+customer, with int32 day ordinals and counts and one float64 spend column per
+segment (luxury category, Necessity, Other). update() takes any batch of new
+transactions: the batch is sorted once by customer code and every statistic
+is one np.add / np.minimum / np.maximum .reduceat over the customer runs,
+then added into the table rows. Batches can come in any order and at any
+time, so a growing feed never has to be re-read, and memory is a few dozen
+bytes per customer and segment.
+"""
+
+import numpy as np
+import pandas as pd
+
+from resampling import period_codes, period_start, MISSING
+
+# Segments counted as little luxuries are every segment except these
+NON_LUXURY_SEGMENTS = ['Necessity', 'Other']
+
+NO_DAY = np.iinfo(np.int32).max
+
+
+def _runs(codes):
+    """Sort order of the codes and the start of each run of equal codes in it"""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    return order, starts, sorted_codes[starts]
+
+
+class CustomerProfiles:
+    """Columnar per-customer totals, updated batch by batch"""
+
+    def __init__(self):
+        self.customers = pd.Index([], dtype=object)
+        self.segments = []
+        self.first_day = np.zeros(0, dtype=np.int32)
+        self.last_day = np.zeros(0, dtype=np.int32)
+        self.transactions = np.zeros(0, dtype=np.int32)
+        self.luxury_transactions = np.zeros(0, dtype=np.int32)
+        self.spend = np.zeros((0, 0))                  # customers × segments
+        self.yearly = {}                               # year -> customers × segments spend
+
+    def __len__(self):
+        return len(self.customers)
+
+    @property
+    def nbytes(self):
+        arrays = [self.first_day, self.last_day, self.transactions, self.luxury_transactions, self.spend]
+        return sum(a.nbytes for a in arrays) + sum(a.nbytes for a in self.yearly.values())
+
+    def _grow(self, new_customers, new_segments):
+        """Append rows for unseen customers and columns for unseen segments"""
+        n_new = len(new_customers)
+        if n_new:
+            self.customers = self.customers.append(pd.Index(new_customers, dtype=object))
+            self.first_day = np.r_[self.first_day, np.full(n_new, NO_DAY, dtype=np.int32)]
+            self.last_day = np.r_[self.last_day, np.full(n_new, -NO_DAY, dtype=np.int32)]
+            self.transactions = np.r_[self.transactions, np.zeros(n_new, dtype=np.int32)]
+            self.luxury_transactions = np.r_[self.luxury_transactions, np.zeros(n_new, dtype=np.int32)]
+        self.segments.extend(new_segments)
+        shape = (len(self.customers), len(self.segments))
+        for name in ['spend'] + [year for year in self.yearly]:
+            old = self.spend if name == 'spend' else self.yearly[name]
+            if old.shape != shape:
+                grown = np.zeros(shape)
+                grown[:old.shape[0], :old.shape[1]] = old
+                if name == 'spend':
+                    self.spend = grown
+                else:
+                    self.yearly[name] = grown
+
+    def update(self, customer_ids, dates, segments, amounts):
+        """Add a batch of transactions (customer, date, segment, amount per row)"""
+        customer_ids = pd.Index(customer_ids, dtype=object)
+        segment_codes, segment_levels = pd.factorize(pd.Series(segments), sort=True)
+        new_segments = [seg for seg in segment_levels if seg not in self.segments]
+        codes = self.customers.get_indexer(customer_ids)
+        new_customers = customer_ids[codes < 0].unique()
+        self._grow(new_customers, new_segments)
+        codes = self.customers.get_indexer(customer_ids)
+
+        days = period_codes(dates, 'D')
+        segment_columns = np.array([self.segments.index(seg) for seg in segment_levels], dtype=np.int64)
+        valid = (days != MISSING) & (segment_codes >= 0)
+        codes, days = codes[valid], days[valid].astype(np.int32)
+        columns = segment_columns[segment_codes[valid]]
+        amounts = np.nan_to_num(np.asarray(amounts, dtype=float)[valid])
+        if len(codes) == 0:
+            return self
+        luxury = ~np.isin(columns, [self.segments.index(seg) for seg in NON_LUXURY_SEGMENTS
+                                    if seg in self.segments])
+
+        # One sort by customer; every statistic is a reduceat over the customer runs
+        order, starts, customers = _runs(codes)
+        counts = np.diff(np.r_[starts, len(codes)])
+        self.transactions[customers] += counts.astype(np.int32)
+        self.luxury_transactions[customers] += np.add.reduceat(luxury[order].astype(np.int32), starts)
+        self.first_day[customers] = np.minimum(self.first_day[customers], np.minimum.reduceat(days[order], starts))
+        self.last_day[customers] = np.maximum(self.last_day[customers], np.maximum.reduceat(days[order], starts))
+
+        wallet = np.zeros((len(codes), len(self.segments)))
+        wallet[np.arange(len(codes)), columns] = amounts
+        wallet = wallet[order]
+        self.spend[customers] += np.add.reduceat(wallet, starts, axis=0)
+
+        sorted_codes = codes[order]
+        years = period_codes(period_start(days[order], 'D'), 'A') + 1970
+        for year in np.unique(years):
+            in_year = years == year
+            year_order, year_starts, year_customers = _runs(sorted_codes[in_year])
+            if int(year) not in self.yearly:
+                self.yearly[int(year)] = np.zeros(self.spend.shape)
+            self.yearly[int(year)][year_customers] += np.add.reduceat(wallet[in_year][year_order], year_starts, axis=0)
+        return self
+
+    def _luxury_columns(self):
+        return [i for i, seg in enumerate(self.segments) if seg not in NON_LUXURY_SEGMENTS]
+
+    def _top_luxury(self, spend):
+        """Luxury segment with the most spend in each row ('' without luxury spend)"""
+        columns = self._luxury_columns()
+        if not columns:
+            return np.full(len(spend), '', dtype=object)
+        luxury_spend = spend[:, columns]
+        names = np.asarray(self.segments, dtype=object)[columns]
+        return np.where(luxury_spend.sum(axis=1) > 0, names[np.argmax(luxury_spend, axis=1)], '')
+
+    def frame(self, as_of=None):
+        """
+        One row per customer: activity dates, transactions, spend, average
+        ticket, luxury share of wallet, purchases per month, recency (days
+        before as_of, default the last transaction day) and share of spend
+        per segment.
+        """
+        as_of_day = int(self.last_day.max()) if as_of is None else int(period_codes([as_of], 'D')[0])
+        total = self.spend.sum(axis=1)
+        luxury = self.spend[:, self._luxury_columns()].sum(axis=1)
+        tenure = np.maximum(as_of_day - self.first_day.astype(np.int64) + 1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profiles = pd.DataFrame({
+                'customer_id': self.customers,
+                'first_purchase': period_start(self.first_day, 'D'),
+                'last_purchase': period_start(self.last_day, 'D'),
+                'transactions': self.transactions,
+                'luxury_transactions': self.luxury_transactions,
+                'total_spent': total,
+                'luxury_spent': luxury,
+                'avg_ticket': total / self.transactions,
+                'luxury_share_pct': np.where(total > 0, luxury / total * 100, np.nan),
+                'purchases_per_month': self.transactions / tenure * 30.4375,
+                'recency_days': as_of_day - self.last_day,
+            })
+            mix = self.spend / total[:, None] * 100
+        for i, seg in enumerate(self.segments):
+            profiles[f'{seg} %'] = mix[:, i]
+        profiles['top_luxury_category'] = self._top_luxury(self.spend)
+        return profiles
+
+    def yearly_frame(self):
+        """Spend, luxury share and top luxury category per customer and year (years with spend only)"""
+        frames = []
+        luxury_columns = self._luxury_columns()
+        for year in sorted(self.yearly):
+            spend = self.yearly[year]
+            total = spend.sum(axis=1)
+            active = np.flatnonzero(total > 0)
+            luxury = spend[active][:, luxury_columns].sum(axis=1)
+            frames.append(pd.DataFrame({
+                'customer_id': self.customers[active],
+                'year': year,
+                'total_spent': total[active],
+                'luxury_spent': luxury,
+                'luxury_share_pct': luxury / total[active] * 100,
+                'top_luxury_category': self._top_luxury(spend[active]),
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,111 @@
+"""
+Little Luxuries Project - Daily Transaction Series and Calendar Features
+=========================================================================
+Daily resolution for PART 3F of the master analysis, so weekday, payday and
+holiday effects in treat spending are not averaged away by monthly totals.
+
+Transactions are binned by integer day ordinal (resampling.period_codes at
+'D'): day and group codes are combined into one key and every measure is one
+np.bincount over it, so the cost is a single pass over the rows however many
+years or groups the feed covers. Calendar features come from a table built
+once per date range and indexed by the same day ordinal; attaching them to a
+daily series is a gather, not a merge.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import AbstractHolidayCalendar, Holiday, USFederalHolidayCalendar, TH, SU
+from pandas.tseries.offsets import DateOffset, Day
+
+from resampling import period_codes, period_start, MISSING
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Gift and treat occasions that are not federal holidays
+RETAIL_EVENTS = [
+    Holiday("Valentine's Day", month=2, day=14),
+    Holiday("Mother's Day", month=5, day=1, offset=DateOffset(weekday=SU(2))),
+    Holiday('Black Friday', month=11, day=1, offset=[DateOffset(weekday=TH(4)), Day(1)]),
+    Holiday('Christmas Eve', month=12, day=24),
+    Holiday("New Year's Eve", month=12, day=31),
+]
+
+
+class RetailHolidayCalendar(AbstractHolidayCalendar):
+    """U.S. federal holidays plus the retail gift occasions"""
+    rules = USFederalHolidayCalendar.rules + RETAIL_EVENTS
+
+
+@lru_cache(maxsize=8)
+def calendar_table(first_day, last_day):
+    """
+    Calendar features for day ordinals first_day..last_day (row i is day
+    first_day + i): weekday, weekend, day of month, month start/end, payday
+    and holiday flags. Paydays are the 15th and the last day of the month,
+    moved back to the previous business day when they fall on a weekend or
+    federal holiday.
+    """
+    days = np.arange(first_day, last_day + 1)
+    dates = pd.DatetimeIndex(period_start(days, 'D'))
+    federal = USFederalHolidayCalendar().holidays(dates.min() - pd.Timedelta(days=31), dates.max())
+    events = RetailHolidayCalendar().holidays(dates.min(), dates.max(), return_name=True)
+
+    # Semi-monthly paydays of every month in range, rolled back to business days
+    months = np.arange(period_codes([dates.min()], 'M')[0], period_codes([dates.max()], 'M')[0] + 1)
+    month_starts = period_start(months, 'M').astype('datetime64[D]')
+    nominal = np.concatenate([month_starts + 14, period_start(months + 1, 'M').astype('datetime64[D]') - 1])
+    paydays = np.busday_offset(nominal, 0, roll='backward', holidays=federal.values.astype('datetime64[D]'))
+
+    table = pd.DataFrame({
+        'date': dates,
+        'weekday': dates.weekday,
+        'weekday_name': np.asarray(WEEKDAY_NAMES)[dates.weekday],
+        'is_weekend': dates.weekday >= 5,
+        'day_of_month': dates.day,
+        'is_month_start': dates.is_month_start,
+        'is_month_end': dates.is_month_end,
+        'is_payday': np.isin(dates.values.astype('datetime64[D]'), paydays),
+        'is_holiday': dates.isin(events.index),
+        'holiday': events.groupby(level=0).first().reindex(dates).fillna('').to_numpy(),
+    })
+    return table
+
+
+def calendar_features(days):
+    """Calendar rows for an array of day ordinals (one gather from the cached table)"""
+    days = np.asarray(days, dtype=np.int64)
+    table = calendar_table(int(days.min()), int(days.max()))
+    return table.iloc[days - days.min()].reset_index(drop=True)
+
+
+def daily_totals(df, date_col, measure, by=None, day_range=None):
+    """
+    Daily sum of measure and row count per value of by (one group if None;
+    rows where it is missing are left out) on a complete day grid, from one
+    bincount over a combined day × group key. day_range fixes the grid's
+    (first, last) day ordinals so several series line up.
+    Returns (first day ordinal, group levels, sums [days × groups], counts).
+    """
+    days = period_codes(df[date_col], 'D')
+    if by is None:
+        groups, levels = np.zeros(len(df), dtype=np.int64), pd.Index(['all'])
+    else:
+        groups, levels = pd.factorize(df[by], sort=True)
+    valid = (days != MISSING) & (groups >= 0)
+    if day_range is None:
+        if not valid.any():
+            return 0, levels, np.zeros((0, len(levels))), np.zeros((0, len(levels)), dtype=np.int64)
+        day_range = (int(days[valid].min()), int(days[valid].max()))
+    first, last = day_range
+    valid &= (days >= first) & (days <= last)
+    days, groups = days[valid], groups[valid]
+
+    shape = (last - first + 1, len(levels))
+    key = (days - first) * len(levels) + groups
+    values = df[measure].to_numpy(dtype=float)[valid]
+    values[np.isnan(values)] = 0
+    sums = np.bincount(key, weights=values, minlength=shape[0] * shape[1]).reshape(shape)
+    counts = np.bincount(key, minlength=shape[0] * shape[1]).reshape(shape)
+    return first, levels, sums, counts
@@ -0,0 +1,108 @@
+"""
+Little Luxuries Project - Real-Dollar Deflation
+================================================
+Converts nominal dollar columns (FRED retail sales, Census beauty/fashion
+sales, retail transactions) to constant dollars of a chosen base period.
+
+The chosen CPI series (CPIAUCSL headline or CPILFESL core, both monthly from
+FRED) is laid out once as a flat array indexed by month code (months since
+1970-01). Deflating any frame is then a gather - month code of each row minus
+the first code - and a multiply, with no merge on dates.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+CPI_SERIES = {
+    'CPIAUCSL': 'CPI, all items (headline)',
+    'CPILFESL': 'CPI less food and energy (core)',
+}
+
+# Nominal dollar columns deflated in each frame of the master analysis
+DOLLAR_COLUMNS = {
+    'master': ['retail_sales_clothing', 'ecommerce_sales'],
+    'census': ['sales'],
+    'retail': ['Total Spent', 'Price Per Unit'],
+}
+
+# Older column names kept as copies of a deflated column (read by the archive scripts and Tableau workbooks)
+ALIAS_COLUMNS = {
+    'master': {'retail_sales_real': 'retail_sales_clothing_real'},
+}
+
+
+def month_codes(dates):
+    """Months since 1970-01 of each date (NaT -> -1)"""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    codes = dates.astype('datetime64[M]').astype(np.int64)
+    return np.where(np.isnat(dates), -1, codes)
+
+
+class PriceIndex:
+    """Monthly CPI as a month-code lookup array, with its base-period level"""
+
+    def __init__(self, cpi_df, series='CPIAUCSL', base_period=None):
+        codes = month_codes(cpi_df['observation_date'])
+        values = pd.to_numeric(cpi_df[series], errors='coerce').to_numpy(dtype=float)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+
+        self.series = series
+        self.first = int(codes.min())
+        self.index = np.full(int(codes.max()) - self.first + 1, np.nan)
+        self.index[codes - self.first] = values
+
+        # Base: a year ('2024', its monthly average), a month ('2024-06') or the latest month
+        if base_period is None:
+            base_codes = np.array([codes.max()])
+            self.base_period = str(pd.Timestamp(np.datetime64(int(codes.max()), 'M')).strftime('%Y-%m'))
+        elif len(str(base_period)) == 4:
+            start = month_codes([f'{base_period}-01-01'])[0]
+            base_codes = np.arange(start, start + 12)
+            self.base_period = str(base_period)
+        else:
+            base_codes = month_codes([pd.Timestamp(str(base_period))])
+            self.base_period = str(base_period)
+        base_values = self.lookup_codes(base_codes)
+        if np.isnan(base_values).any():
+            raise ValueError(f"{series} does not cover the whole base period {self.base_period}")
+        self.base = base_values.mean()
+
+    def lookup_codes(self, codes):
+        """Index values for month codes (NaN outside the series)"""
+        positions = np.asarray(codes, dtype=np.int64) - self.first
+        inside = (positions >= 0) & (positions < len(self.index))
+        values = np.full(len(positions), np.nan)
+        values[inside] = self.index[positions[inside]]
+        return values
+
+    def factors(self, dates):
+        """Multipliers from nominal to base-period dollars for each date"""
+        return self.base / self.lookup_codes(month_codes(dates))
+
+    def deflate(self, df, columns, date_col, suffix='_real'):
+        """df plus a <column><suffix> constant-dollar column for each of the columns present"""
+        columns = [col for col in columns if col in df.columns]
+        if not columns:
+            return df
+        factors = self.factors(df[date_col])
+        return df.assign(**{f'{col}{suffix}': df[col].to_numpy(dtype=float) * factors for col in columns})
+
+    def frame(self):
+        """Monthly index values as observation_date / <series> rows"""
+        months = np.arange(self.first, self.first + len(self.index)).astype('datetime64[M]')
+        return pd.DataFrame({'observation_date': months.astype('datetime64[ns]'), self.series: self.index})
+
+    def __repr__(self):
+        return f"PriceIndex({self.series}, base {self.base_period})"
+
+
+def load_price_index(data_dir, series='CPIAUCSL', base_period='2024', reader=None):
+    """Price index from <data_dir>/<series>.csv (reader: optional prefetching read function)"""
+    if series not in CPI_SERIES:
+        raise ValueError(f"Unknown CPI series: {series} (choose from {', '.join(CPI_SERIES)})")
+    path = os.path.join(data_dir, f'{series}.csv')
+    cpi_df = reader(path) if reader is not None else pd.read_csv(path)
+    return PriceIndex(cpi_df, series, base_period)
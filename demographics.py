@@ -0,0 +1,79 @@
+"""
+Little Luxuries Project - Demographic Purchase Cube
+====================================================
+Segmentation of the bike-shop sales extract (SalesForCourse_quizz_table.csv:
+customer age, gender, state, product category, revenue) for PART 3E of the
+master analysis.
+
+The cube is built by olap_cube.cube_aggregate in one pass over the rows
+(category codes combined into one cell key, one np.bincount per measure),
+whatever the number of dimensions. Coarser views (e.g. age band × gender)
+are rolled up from the cube cells instead of going back to the rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from olap_cube import cube_aggregate
+from resampling import floor_dates
+
+DEMOGRAPHICS_FILE = 'SalesForCourse_quizz_table.csv'
+
+AGE_BINS = [0, 25, 35, 45, 55, 65, np.inf]
+AGE_LABELS = ['Under 25', '25-34', '35-44', '45-54', '55-64', '65+']
+
+# Finest grain of the exported cube, and the additive measures kept per cell
+CUBE_DIMENSIONS = ['age_band', 'gender', 'country', 'state', 'category', 'month']
+CUBE_MEASURES = ['quantity', 'revenue', 'cost', 'profit']
+
+COLUMN_NAMES = {
+    'Customer Age': 'age',
+    'Customer Gender': 'gender',
+    'Country': 'country',
+    'State': 'state',
+    'Product Category': 'category',
+    'Sub Category': 'sub_category',
+    'Quantity': 'quantity',
+    'Unit Cost': 'unit_cost',
+    'Unit Price': 'unit_price',
+    'Cost': 'cost',
+    'Revenue': 'revenue',
+}
+
+
+def prepare_sales(raw_df):
+    """
+    Clean the raw extract: MM/DD/YY dates parsed in one vectorized pass,
+    categorical dimensions, age bands and a month column. Rows without a
+    date or category are dropped.
+    """
+    df = raw_df[list(COLUMN_NAMES)].rename(columns=COLUMN_NAMES)
+    df.insert(0, 'date', pd.to_datetime(raw_df['Date'], format='%m/%d/%y', errors='coerce'))
+    df = df.dropna(subset=['date', 'gender', 'category']).reset_index(drop=True)
+
+    for col in ['gender', 'country', 'state', 'category', 'sub_category']:
+        df[col] = df[col].astype('category')
+    df['age_band'] = pd.cut(df['age'], bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    df['month'] = floor_dates(df['date'], 'M')
+    df['profit'] = df['revenue'] - df['cost']
+    return df
+
+
+def rollup(cube, dimensions, measures=CUBE_MEASURES, count_name='transactions'):
+    """Coarser cube over a subset of the dimensions, summed from the finer cube's cells"""
+    coarse = cube_aggregate(cube, dimensions, [count_name] + list(measures), count_name='cells')
+    coarse[count_name] = coarse[count_name].astype(np.int64)
+    return coarse.drop(columns='cells')
+
+
+def demographic_cube(sales_df):
+    """Age band × gender × country/state × category × month cube with average ticket and margin"""
+    cube = cube_aggregate(sales_df, CUBE_DIMENSIONS, CUBE_MEASURES)
+    return add_ratios(cube)
+
+
+def add_ratios(cube):
+    """Average revenue per transaction and profit margin (re-derived after every rollup)"""
+    cube['avg_revenue'] = cube['revenue'] / cube['transactions']
+    cube['margin_pct'] = np.where(cube['revenue'] != 0, cube['profit'] / cube['revenue'] * 100, np.nan)
+    return cube
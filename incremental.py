@@ -0,0 +1,66 @@
+"""
+Little Luxuries Project - Incremental Monthly Updates
+======================================================
+State kept between runs so a monthly refresh only processes the new rows.
+
+Every full run records, per source, how far it got (last date, row count) and
+a fingerprint of the rows it used. A later --incremental run checks that the
+already-processed rows are unchanged, takes only the appended months, and
+updates each regression from its stored PairAccumulator (stats_engine.py)
+instead of refitting on the full history. If a source was revised anywhere
+in its history, the run falls back to a full recompute.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+STATE_VERSION = 6
+
+
+def load_state(path):
+    """Incremental state from the last run (None if missing or from another version)"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    state = dict(state, version=STATE_VERSION)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=1, default=str)
+    os.replace(tmp_path, path)
+
+
+def rows_fingerprint(df, date_col, last_date):
+    """Hash of the rows dated up to last_date (detects revisions of already-processed history)"""
+    rows = df[pd.to_datetime(df[date_col]) <= pd.Timestamp(last_date)]
+    digest = hashlib.sha1(repr(list(map(str, rows.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def source_state(df, date_col, last_date=None):
+    """State entry for one source: processed-through date, row count and fingerprint"""
+    dates = pd.to_datetime(df[date_col])
+    last_date = dates.max() if last_date is None else pd.Timestamp(last_date)
+    return {'last_date': str(last_date.date()), 'n_rows': int((dates <= last_date).sum()),
+            'fingerprint': rows_fingerprint(df, date_col, last_date)}
+
+
+def is_unchanged(df, date_col, entry):
+    """True if the rows covered by a state entry are exactly as they were"""
+    return (entry is not None and
+            int((pd.to_datetime(df[date_col]) <= pd.Timestamp(entry['last_date'])).sum()) == entry['n_rows'] and
+            rows_fingerprint(df, date_col, entry['last_date']) == entry['fingerprint'])
+
+
+def appended_rows(df, date_col, entry):
+    """Rows dated after the state entry's last processed date"""
+    return df[pd.to_datetime(df[date_col]) > pd.Timestamp(entry['last_date'])]
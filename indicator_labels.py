@@ -0,0 +1,145 @@
+"""
+Little Luxuries Project - Result Labels
+========================================
+Labelling shared by the master analysis, run_all_visualizations.py and the
+Archive_Scripts: significance stars, R² interpretation, correlation strength,
+indicator tiers and the composite search-indicator ranking.
+
+Every labeller accepts a scalar, Series, ndarray or DataFrame and labels the
+whole input in one np.select pass; Series/DataFrames keep their index and
+columns, so a p-value matrix becomes a star matrix of the same shape.
+"""
+
+import numpy as np
+import pandas as pd
+
+# (upper bound, label), checked in order: p < bound
+SIGNIFICANCE_LEVELS = [(0.001, '***'), (0.01, '**'), (0.05, '*')]
+MARGINAL_LEVEL = (0.1, '.')
+SIGNIFICANCE_LEGEND = '*** p<0.001  ** p<0.01  * p<0.05  ns = not significant'
+
+# (lower bound, label), checked in order: R² >= bound
+R2_LEVELS = [(0.15, 'High Explanatory Power'),
+             (0.10, 'Moderate Explanatory Power'),
+             (0.05, 'Low Explanatory Power')]
+R2_DEFAULT = 'Very Low Explanatory Power'
+
+# (max rank, label), checked in order: rank <= bound
+TIER_LEVELS = [(3, 'Tier 1: Strong Indicators'),
+               (5, 'Tier 2: Moderate Indicators')]
+TIER_DEFAULT = 'Tier 3: Weak Indicators'
+
+# (lower bound, label), checked in order: |r| > bound
+CORRELATION_STRENGTH_LEVELS = [(0.7, 'very strong'), (0.5, 'strong'), (0.3, 'moderate')]
+
+# Composite ranking weights (lower composite score = better indicator)
+RANKING_WEIGHTS = {
+    'R2': 0.4,          # Explanatory power is most important
+    'Pvalue': 0.3,      # Statistical significance
+    'Fscore': 0.2,      # Overall model fit
+    'Coefficient': 0.1  # Effect size
+}
+
+RANKING_COLUMNS = [
+    'Overall_Rank', 'Indicator', 'Category', 'Data_Type', 'Tier', 'Significant',
+    'Significance_Level', 'R²', 'R2_Percent', 'Adj_R²', 'Adj_R2_Percent',
+    'R2_Interpretation', 'Coefficient', 'P-value', 'F-statistic', 'Std_Error',
+    'Rank_by_R2', 'Rank_by_Coefficient', 'Rank_by_Pvalue', 'Rank_by_Fscore',
+    'Composite_Score'
+]
+
+
+def _label(values, conditions, labels, default):
+    """Apply np.select over values and return labels in the input's shape/type"""
+    # Select integer codes, then one take from the label array (cheaper than string arrays)
+    codes = np.select(conditions, np.arange(len(labels)), default=len(labels))
+    out = np.array(list(labels) + [default], dtype=object)[codes]
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(out, index=values.index, columns=values.columns)
+    if isinstance(values, pd.Series):
+        return pd.Series(out, index=values.index, name=values.name)
+    if np.ndim(values) == 0:
+        return out.item() if isinstance(out, np.ndarray) else out
+    return out
+
+
+def _as_float(values):
+    # NaN compares False everywhere, so missing values fall through to the default label
+    return np.asarray(values, dtype=np.float64)
+
+
+def significance_level(p_values, marginal=False):
+    """Significance stars: *** p<0.001, ** p<0.01, * p<0.05 (. p<0.1 if marginal), else ns"""
+    p = _as_float(p_values)
+    levels = SIGNIFICANCE_LEVELS + ([MARGINAL_LEVEL] if marginal else [])
+    # np.select takes the first true condition, so p < bound in ascending order
+    return _label(p_values, [p < bound for bound, _ in levels],
+                  [label for _, label in levels], 'ns')
+
+
+def significance_flag(p_values, alpha=0.05):
+    """'Yes' / 'No' significance column used in the results tables"""
+    p = _as_float(p_values)
+    return _label(p_values, [p < alpha], ['Yes'], 'No')
+
+
+def interpret_r2(r2_values):
+    """Explanatory-power label for R² values"""
+    r2 = _as_float(r2_values)
+    return _label(r2_values, [r2 >= bound for bound, _ in R2_LEVELS],
+                  [label for _, label in R2_LEVELS], R2_DEFAULT)
+
+
+def classify_tier(overall_rank):
+    """Indicator tier from its overall rank (1 = best)"""
+    rank = _as_float(overall_rank)
+    return _label(overall_rank, [rank <= bound for bound, _ in TIER_LEVELS],
+                  [label for _, label in TIER_LEVELS], TIER_DEFAULT)
+
+
+def correlation_strength(correlations, levels=CORRELATION_STRENGTH_LEVELS, default='weak'):
+    """Strength label for |r| (very strong / strong / moderate / weak by default)"""
+    r = np.abs(_as_float(correlations))
+    return _label(correlations, [r > bound for bound, _ in levels],
+                  [label for _, label in levels], default)
+
+
+def min_rank(values, ascending=True):
+    """Same as Series.rank(method='min'): ties share the lowest rank (1-based)"""
+    v = np.asarray(values, dtype=np.float64)
+    if not ascending:
+        v = -v
+    return np.searchsorted(np.sort(v), v, side='left') + 1
+
+
+def rank_search_indicators(search_results, weights=RANKING_WEIGHTS):
+    """
+    Composite ranking of search indicator regression results.
+
+    Ranks by R², |coefficient|, p-value and F-statistic, combines them with
+    weights into Composite_Score / Overall_Rank, and adds tier, significance
+    and R² interpretation labels. Returns a new frame sorted by Overall_Rank.
+    """
+    ranking = search_results.copy()
+
+    ranking['Rank_by_R2'] = min_rank(ranking['R²'], ascending=False)
+    ranking['Rank_by_Coefficient'] = min_rank(ranking['Coefficient'].abs(), ascending=False)
+    ranking['Rank_by_Pvalue'] = min_rank(ranking['P-value'], ascending=True)
+    ranking['Rank_by_Fscore'] = min_rank(ranking['F-statistic'], ascending=False)
+
+    ranking['Composite_Score'] = (
+        ranking['Rank_by_R2'] * weights['R2'] +
+        ranking['Rank_by_Pvalue'] * weights['Pvalue'] +
+        ranking['Rank_by_Fscore'] * weights['Fscore'] +
+        ranking['Rank_by_Coefficient'] * weights['Coefficient']
+    )
+    ranking['Overall_Rank'] = min_rank(ranking['Composite_Score'], ascending=True)
+
+    ranking['Tier'] = classify_tier(ranking['Overall_Rank'])
+    ranking['Significance_Level'] = significance_level(ranking['P-value'])
+    ranking['R2_Interpretation'] = interpret_r2(ranking['R²'])
+    ranking['R2_Percent'] = ranking['R²'] * 100
+    ranking['Adj_R2_Percent'] = ranking['Adj_R²'] * 100
+
+    columns_order = [c for c in RANKING_COLUMNS if c in ranking.columns]
+    return ranking[columns_order].sort_values('Overall_Rank')
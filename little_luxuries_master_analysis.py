@@ -14,8 +14,12 @@ RESEARCH QUESTIONS:
 METHODOLOGY:
 - Structural Equation Modeling (SEM) for latent variable creation
 - Linear regression for correlation analysis
-- Demographic segmentation and price point analysis
+- Multivariate regression of CCI, unemployment and sentiment on all latent scores (VIF screened)
+- Stepwise / LASSO / best-subset predictor search with time-series cross-validation
+- Walk-forward backtest of CCI / unemployment nowcasts (recursive least squares)
+- Demographic segmentation (age × gender × country/state × category × month cube) and price point analysis
 - Temporal pattern analysis with economic indicators
+- Seasonal adjustment (classical decomposition) of the NSA sales series and search terms
 - Comparison of SEARCH behavior (Google Trends) vs PURCHASE behavior (retail sales)
 
 DATA SOURCES:
@@ -40,16 +44,35 @@ OUTPUTS:
 ========================================================================================================
 """
 
+import os
+import time
+import contextlib
 import pandas as pd
 import numpy as np
 from scipy import stats
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import FactorAnalysis
-import statsmodels.api as sm
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from search_indicators import fit_latent_variables, cluster_search_terms, score_latent_variables
+from pipeline_io import OutputWriter, InputReader, read_input
+from indicator_labels import significance_level, significance_flag, SIGNIFICANCE_LEGEND
+from pipeline_config import load_config, STAGE_REQUIRES
+from pipeline_context import get_context, census_wide_frame
+from panel_store import PanelStore, downcast_numeric, memory_mb, precision_report
+from stats_engine import PairAccumulator, CrossProducts, accumulate, screen_vif
+from predictor_search import search_predictors
+from backtest import run_backtest, real_time_scores
+from olap_cube import RollupCube
+from price_histogram import LogHistogram, QUANTILES, BANDWIDTH_DECADES
+from deflation import load_price_index, DOLLAR_COLUMNS, ALIAS_COLUMNS, CPI_SERIES
+from seasonal import SeasonalFactors, NSA_COLUMNS
+from resampling import resample, align, floor_dates, last_period, period_codes, period_start
+from daily_calendar import daily_totals, calendar_features, WEEKDAY_NAMES
+from customer_profiles import CustomerProfiles
+from cohorts import CohortMatrices
+from market_basket import basket_matrix, group_matrix, pair_table, MIN_PAIR_BASKETS
+from demographics import DEMOGRAPHICS_FILE, prepare_sales, demographic_cube, rollup, add_ratios
+from incremental import load_state, save_state, source_state, is_unchanged, appended_rows
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -78,13 +101,33 @@ print("\n" + "="*100)
 # PART 1: DATA LOADING AND INTEGRATION
 # ========================================================================================================
 
-def load_google_trends_data(filepath='Data_Sources/All_Variables_Us_Data_Sheet1.xlsx'):
+GOOGLE_TRENDS_FILE = 'All_Variables_Us_Data_Sheet1.xlsx'
+FRED_FILES = ['CPILFESL.csv', 'UMCSENT.csv', 'UNRATE.csv', 'MRTSSM448USN.csv', 'PSAVERT.csv', 'ECOMSA.csv']
+RETAIL_FILE = 'spending_patterns_detailed.csv'
+
+
+def prefetch_inputs(inputs, config, stages):
+    """Start reading the raw files the selected stages need, all at once in the background"""
+    if 'search' in stages:
+        inputs.prefetch(os.path.join(config.data_dir, GOOGLE_TRENDS_FILE), pd.read_excel, header=1)
+        for filename in FRED_FILES:
+            inputs.prefetch(os.path.join(config.data_dir, filename))
+    if 'purchase' in stages:
+        inputs.prefetch(os.path.join(config.data_dir, RETAIL_FILE))
+        inputs.prefetch(os.path.join(config.data_dir, DEMOGRAPHICS_FILE))
+    if 'census' in stages:
+        inputs.prefetch(config.census_file)
+    if any(stage in stages for stage in ['search', 'purchase', 'census']):
+        inputs.prefetch(os.path.join(config.data_dir, f'{config.cpi_series}.csv'))
+
+
+def load_google_trends_data(data_dir='Data_Sources', filename=GOOGLE_TRENDS_FILE, inputs=None):
     """Load and clean Google Trends data with CCI"""
     print("\n" + "="*100)
     print("PART 1A: LOADING GOOGLE TRENDS & CONSUMER CONFIDENCE DATA")
     print("="*100)
 
-    df = pd.read_excel(filepath, header=1)
+    df = read_input(inputs, os.path.join(data_dir, filename), pd.read_excel, header=1)
 
     # Clean numeric columns
     for col in df.columns:
@@ -121,7 +164,7 @@ def load_google_trends_data(filepath='Data_Sources/All_Variables_Us_Data_Sheet1.
     return df
 
 
-def load_fred_data():
+def load_fred_data(data_dir='Data_Sources', inputs=None):
     """Load all FRED economic indicators"""
     print("\n" + "="*100)
     print("PART 1B: LOADING FRED ECONOMIC INDICATORS")
@@ -131,7 +174,7 @@ def load_fred_data():
 
     # CPI - Consumer Price Index
     try:
-        cpi = pd.read_csv('Data_Sources/CPILFESL.csv')
+        cpi = read_input(inputs, os.path.join(data_dir, 'CPILFESL.csv'))
         cpi['observation_date'] = pd.to_datetime(cpi['observation_date'])
         fred_data['CPI'] = cpi
         print(f"\nOK CPI loaded: {len(cpi)} observations ({cpi['observation_date'].min().strftime('%Y-%m')} to {cpi['observation_date'].max().strftime('%Y-%m')})")
@@ -140,7 +183,7 @@ def load_fred_data():
 
     # Consumer Sentiment
     try:
-        umcsent = pd.read_csv('Data_Sources/UMCSENT.csv')
+        umcsent = read_input(inputs, os.path.join(data_dir, 'UMCSENT.csv'))
         umcsent['observation_date'] = pd.to_datetime(umcsent['observation_date'])
         fred_data['Consumer_Sentiment'] = umcsent
         print(f"OK Consumer Sentiment loaded: {len(umcsent)} observations")
@@ -149,7 +192,7 @@ def load_fred_data():
 
     # Unemployment Rate
     try:
-        unrate = pd.read_csv('Data_Sources/UNRATE.csv')
+        unrate = read_input(inputs, os.path.join(data_dir, 'UNRATE.csv'))
         unrate['observation_date'] = pd.to_datetime(unrate['observation_date'])
         fred_data['Unemployment'] = unrate
         print(f"OK Unemployment Rate loaded: {len(unrate)} observations")
@@ -158,7 +201,7 @@ def load_fred_data():
 
     # Retail Sales - Clothing & Accessories
     try:
-        retail = pd.read_csv('Data_Sources/MRTSSM448USN.csv')
+        retail = read_input(inputs, os.path.join(data_dir, 'MRTSSM448USN.csv'))
         retail['observation_date'] = pd.to_datetime(retail['observation_date'])
         fred_data['Retail_Sales'] = retail
         print(f"OK Retail Sales (Clothing) loaded: {len(retail)} observations")
@@ -167,24 +210,33 @@ def load_fred_data():
 
     # Personal Saving Rate
     try:
-        psavert = pd.read_csv('Data_Sources/PSAVERT.csv')
+        psavert = read_input(inputs, os.path.join(data_dir, 'PSAVERT.csv'))
         psavert['observation_date'] = pd.to_datetime(psavert['observation_date'])
         fred_data['Saving_Rate'] = psavert
         print(f"OK Personal Saving Rate loaded: {len(psavert)} observations")
     except:
         print("X Saving Rate file not found")
 
+    # E-commerce Retail Sales (quarterly)
+    try:
+        ecomsa = read_input(inputs, os.path.join(data_dir, 'ECOMSA.csv'))
+        ecomsa['observation_date'] = pd.to_datetime(ecomsa['observation_date'])
+        fred_data['Ecommerce_Sales'] = ecomsa
+        print(f"OK E-commerce Retail Sales loaded: {len(ecomsa)} quarterly observations")
+    except:
+        print("X E-commerce Sales file not found")
+
     return fred_data
 
 
-def load_retail_transactions():
+def load_retail_transactions(data_dir='Data_Sources', inputs=None):
     """Load retail transaction data for purchase behavior analysis"""
     print("\n" + "="*100)
     print("PART 1C: LOADING RETAIL TRANSACTION DATA (PURCHASE BEHAVIOR)")
     print("="*100)
 
     try:
-        retail_df = pd.read_csv('Data_Sources/spending_patterns_detailed.csv')
+        retail_df = read_input(inputs, os.path.join(data_dir, RETAIL_FILE))
         retail_df['Transaction Date'] = pd.to_datetime(retail_df['Transaction Date'])
 
         print(f"\nOK Retail transactions loaded: {len(retail_df):,} transactions")
@@ -201,14 +253,34 @@ def load_retail_transactions():
         return None
 
 
-def load_census_retail_sales():
+def load_demographic_sales(data_dir='Data_Sources', inputs=None):
+    """Load the demographic sales extract (customer age, gender, state, category)"""
+    print("\n" + "="*100)
+    print("PART 1F: LOADING DEMOGRAPHIC SALES DATA")
+    print("="*100)
+
+    try:
+        sales_df = prepare_sales(read_input(inputs, os.path.join(data_dir, DEMOGRAPHICS_FILE)))
+
+        print(f"\nOK Demographic sales loaded: {len(sales_df):,} transactions")
+        print(f"  Date range: {sales_df['date'].min().strftime('%Y-%m-%d')} to {sales_df['date'].max().strftime('%Y-%m-%d')}")
+        print(f"  Total revenue: ${sales_df['revenue'].sum():,.2f}")
+        print(f"  States: {sales_df['state'].nunique()}, categories: {', '.join(sales_df['category'].cat.categories)}")
+
+        return sales_df
+    except Exception as e:
+        print(f"\nX Error loading demographic sales data: {e}")
+        return None
+
+
+def load_census_retail_sales(filepath='Data_Sources/census_retail_sales_1992_2025.csv', inputs=None):
     """Load U.S. Census Bureau retail sales data (1992-2025)"""
     print("\n" + "="*100)
     print("PART 1D: LOADING U.S. CENSUS BUREAU RETAIL SALES DATA")
     print("="*100)
 
     try:
-        census_df = pd.read_csv('Data_Sources/census_retail_sales_1992_2025.csv')
+        census_df = read_input(inputs, filepath)
         census_df['observation_date'] = pd.to_datetime(census_df['observation_date'])
 
         print(f"\nOK Census retail sales loaded: {len(census_df):,} monthly observations")
@@ -231,73 +303,95 @@ def load_census_retail_sales():
         return None
 
 
-def integrate_all_data(google_trends_df, fred_data):
-    """Integrate all data sources into master dataset"""
+# FRED series -> (file column, rule for converting it to months; see resampling.py)
+FRED_SERIES = {
+    'CPI': ('CPILFESL', 'mean'),
+    'Consumer_Sentiment': ('UMCSENT', 'mean'),
+    'Unemployment': ('UNRATE', 'mean'),
+    'Retail_Sales': ('MRTSSM448USN', 'sum'),
+    'Saving_Rate': ('PSAVERT', 'mean'),
+    'Ecommerce_Sales': ('ECOMSA', 'sum'),
+}
+
+
+def monthly_fred_series(fred_data, name, dates):
+    """A FRED series converted to months under its rule and aligned to the given dates by month code"""
+    column, rule = FRED_SERIES[name]
+    monthly = resample(fred_data[name], 'observation_date', {column: rule})
+    return align(monthly, dates)[column]
+
+
+# Economic periods labelled in the master dataset (later entries win where they overlap)
+ECONOMIC_PERIODS = {
+    'Great Recession': ('2007-12-01', '2009-06-30'),
+    'COVID-19 Crisis': ('2020-02-01', '2020-04-30'),
+    'Inflation Surge': ('2022-01-01', '2023-06-30'),
+}
+
+
+def economic_period(dates):
+    """ECONOMIC_PERIODS label of each date ('Normal' outside them)"""
+    dates = pd.Series(pd.to_datetime(dates))
+    period = np.full(len(dates), 'Normal', dtype=object)
+    for name, (start, end) in ECONOMIC_PERIODS.items():
+        period[((dates >= start) & (dates <= end)).to_numpy()] = name
+    return period
+
+
+def integrate_all_data(google_trends_df, fred_data, base_cpi=None):
+    """Integrate all data sources into master dataset (CPI index relative to base_cpi, default first month)"""
     print("\n" + "="*100)
     print("PART 1E: INTEGRATING ALL DATA SOURCES")
     print("="*100)
 
-    master_df = google_trends_df.copy()
+    # Shallow copy: columns added below are new arrays, so the Trends data itself is never duplicated.
+    # Every FRED series is resampled to months and gathered by month code (no merge on exact dates)
+    master_df = google_trends_df.copy(deep=False)
 
     # Merge CPI
     if 'CPI' in fred_data:
-        cpi_df = fred_data['CPI'].copy()
-        master_df = master_df.merge(cpi_df, left_on='date', right_on='observation_date', how='left')
-        master_df.rename(columns={'CPILFESL': 'cpi'}, inplace=True)
-        master_df.drop('observation_date', axis=1, inplace=True, errors='ignore')
+        master_df['cpi'] = monthly_fred_series(fred_data, 'CPI', master_df['date'])
 
         # Calculate inflation metrics
-        base_cpi = master_df['cpi'].iloc[0]
+        if base_cpi is None:
+            base_cpi = master_df['cpi'].iloc[0]
         master_df['cpi_index'] = master_df['cpi'] / base_cpi
         master_df['inflation_rate_yoy'] = master_df['cpi'].pct_change(12) * 100
         print(f"\nOK CPI integrated - Cumulative inflation: {(master_df['cpi_index'].iloc[-1] - 1) * 100:.1f}%")
 
     # Merge Consumer Sentiment
     if 'Consumer_Sentiment' in fred_data:
-        sent_df = fred_data['Consumer_Sentiment'].copy()
-        master_df = master_df.merge(sent_df, left_on='date', right_on='observation_date', how='left')
-        master_df.rename(columns={'UMCSENT': 'consumer_sentiment'}, inplace=True)
-        master_df.drop('observation_date', axis=1, inplace=True, errors='ignore')
+        master_df['consumer_sentiment'] = monthly_fred_series(fred_data, 'Consumer_Sentiment', master_df['date'])
         print(f"OK Consumer Sentiment integrated")
 
     # Merge Unemployment
     if 'Unemployment' in fred_data:
-        unemp_df = fred_data['Unemployment'].copy()
-        master_df = master_df.merge(unemp_df, left_on='date', right_on='observation_date', how='left')
-        master_df.rename(columns={'UNRATE': 'unemployment_rate'}, inplace=True)
-        master_df.drop('observation_date', axis=1, inplace=True, errors='ignore')
+        master_df['unemployment_rate'] = monthly_fred_series(fred_data, 'Unemployment', master_df['date'])
         print(f"OK Unemployment Rate integrated")
 
     # Merge Retail Sales
     if 'Retail_Sales' in fred_data:
-        retail_df = fred_data['Retail_Sales'].copy()
-        master_df = master_df.merge(retail_df, left_on='date', right_on='observation_date', how='left')
-        master_df.rename(columns={'MRTSSM448USN': 'retail_sales_clothing'}, inplace=True)
-        master_df.drop('observation_date', axis=1, inplace=True, errors='ignore')
-
-        # Calculate real (inflation-adjusted) retail sales
-        if 'cpi_index' in master_df.columns:
-            master_df['retail_sales_real'] = master_df['retail_sales_clothing'] / master_df['cpi_index']
+        # (constant-dollar retail_sales_clothing_real is added by the deflation stage)
+        master_df['retail_sales_clothing'] = monthly_fred_series(fred_data, 'Retail_Sales', master_df['date'])
         print(f"OK Retail Sales (Clothing) integrated")
 
     # Merge Saving Rate
     if 'Saving_Rate' in fred_data:
-        save_df = fred_data['Saving_Rate'].copy()
-        master_df = master_df.merge(save_df, left_on='date', right_on='observation_date', how='left')
-        master_df.rename(columns={'PSAVERT': 'personal_saving_rate'}, inplace=True)
-        master_df.drop('observation_date', axis=1, inplace=True, errors='ignore')
+        master_df['personal_saving_rate'] = monthly_fred_series(fred_data, 'Saving_Rate', master_df['date'])
         print(f"OK Personal Saving Rate integrated")
 
+    # Merge E-commerce Sales (quarterly totals spread evenly over their months)
+    if 'Ecommerce_Sales' in fred_data:
+        master_df['ecommerce_sales'] = monthly_fred_series(fred_data, 'Ecommerce_Sales', master_df['date'])
+        print(f"OK E-commerce Sales integrated (quarterly -> monthly)")
+
     # Add economic period indicators
     master_df['year'] = master_df['date'].dt.year
     master_df['month'] = master_df['date'].dt.month
     master_df['quarter'] = master_df['date'].dt.quarter
 
     # Define recession/crisis periods
-    master_df['period'] = 'Normal'
-    master_df.loc[(master_df['date'] >= '2007-12-01') & (master_df['date'] <= '2009-06-30'), 'period'] = 'Great Recession'
-    master_df.loc[(master_df['date'] >= '2020-02-01') & (master_df['date'] <= '2020-04-30'), 'period'] = 'COVID-19 Crisis'
-    master_df.loc[(master_df['date'] >= '2022-01-01') & (master_df['date'] <= '2023-06-30'), 'period'] = 'Inflation Surge'
+    master_df['period'] = economic_period(master_df['date'])
 
     print(f"\nOK Master dataset created: {len(master_df)} months × {len(master_df.columns)} variables")
     print(f"\nEconomic periods:")
@@ -306,46 +400,184 @@ def integrate_all_data(google_trends_df, fred_data):
     return master_df
 
 
+def load_deflator(config, inputs=None):
+    """Monthly price index for converting dollar series to constant base-period dollars"""
+    print("\n" + "="*100)
+    print("PART 1G: PRICE INDEX FOR REAL-DOLLAR SERIES")
+    print("="*100)
+
+    try:
+        price_index = load_price_index(config.data_dir, config.cpi_series, config.deflation_base,
+                                       reader=lambda path: read_input(inputs, path))
+        print(f"\nOK {config.cpi_series} ({CPI_SERIES[config.cpi_series]}), "
+              f"constant {price_index.base_period} dollars")
+        return price_index
+    except Exception as e:
+        print(f"\nX Price index not available, dollar series stay nominal: {e}")
+        return None
+
+
+def deflate_frames(price_index, master_df=None, census_df=None, retail_df=None):
+    """Add *_real constant-dollar columns to every frame given (see deflation.DOLLAR_COLUMNS)"""
+    if price_index is None:
+        return master_df, census_df, retail_df
+    frames = {'master': (master_df, 'date'), 'census': (census_df, 'observation_date'),
+              'retail': (retail_df, 'Transaction Date')}
+    results = {}
+    deflated = []
+    for name, (df, date_col) in frames.items():
+        if df is not None:
+            df = price_index.deflate(df, DOLLAR_COLUMNS[name], date_col)
+            deflated.extend(f"{col}_real" for col in DOLLAR_COLUMNS[name] if f"{col}_real" in df.columns)
+            aliases = {alias: df[col] for alias, col in ALIAS_COLUMNS.get(name, {}).items() if col in df.columns}
+            df = df.assign(**aliases)
+        results[name] = df
+    if deflated:
+        print(f"OK Deflated to constant {price_index.base_period} dollars ({price_index.series}): "
+              f"{', '.join(deflated)}")
+    return results['master'], results['census'], results['retail']
+
+
+# Frame -> (date column, column splitting it into separate series) for seasonal adjustment
+SEASONAL_FRAMES = {'master': ('date', None), 'census': ('observation_date', 'NAICS  Code')}
+
+
+def fit_seasonal(name, df, config):
+    """Seasonal factors of a frame's NSA columns (seasonal.NSA_COLUMNS), cached under cache_dir"""
+    date_col, by = SEASONAL_FRAMES[name]
+    return SeasonalFactors.fit(df, NSA_COLUMNS[name], date_col, by=by,
+                               cache_dir=os.path.join(config.cache_dir, 'seasonal'), n_workers=config.workers)
+
+
+def apply_seasonal(name, df, factors):
+    """df plus the *_sa columns from fitted seasonal factors"""
+    return factors.adjust(df, NSA_COLUMNS[name], SEASONAL_FRAMES[name][0])
+
+
+def search_term_columns(google_trends_df):
+    return [col for col in google_trends_df.columns if col not in ['date', 'cci']]
+
+
+def fit_search_seasonal(google_trends_df, config):
+    """Seasonal factors of every search term, cached under cache_dir"""
+    return SeasonalFactors.fit(google_trends_df, search_term_columns(google_trends_df), 'date',
+                               cache_dir=os.path.join(config.cache_dir, 'seasonal'), n_workers=config.workers)
+
+
+def adjust_search_terms(google_trends_df, factors):
+    """The Trends frame with every search term replaced by its seasonally adjusted values"""
+    return factors.adjust(google_trends_df, search_term_columns(google_trends_df), 'date', suffix='')
+
+
+def seasonally_adjust(config, master_df=None, census_df=None, google_trends_df=None):
+    """
+    Seasonally adjusted (*_sa) versions of the NSA series: FRED clothing sales
+    in the master dataset, Census sales per NAICS code and every search term,
+    each source decomposed as one batch. Returns the adjusted frames, the
+    Trends frame with adjusted search terms (what the factor model is fit on)
+    and the fitted factors per source.
+    """
+    print("\n" + "="*100)
+    print("PART 1H: SEASONAL ADJUSTMENT OF NSA SERIES")
+    print("="*100)
+
+    factors = {}
+    if master_df is not None:
+        factors['master'] = fit_seasonal('master', master_df, config)
+        master_df = apply_seasonal('master', master_df, factors['master'])
+    if census_df is not None:
+        factors['census'] = fit_seasonal('census', census_df, config)
+        census_df = apply_seasonal('census', census_df, factors['census'])
+    search_sa = None
+    if google_trends_df is not None:
+        factors['search'] = fit_search_seasonal(google_trends_df, config)
+        search_sa = adjust_search_terms(google_trends_df, factors['search'])
+
+    labels = {'master': 'FRED retail sales', 'census': 'Census sales by NAICS code', 'search': 'Search terms'}
+    for name, fitted in factors.items():
+        print(f"\nOK {labels[name]}: {len(fitted)} series {'(cached decomposition)' if fitted.cached else 'decomposed'}")
+        if name != 'search':
+            for i, series in enumerate(fitted.names):
+                peak = int(np.argmax(fitted.factors[:, i]))
+                print(f"  {series:35s} peak {pd.Timestamp(2000, peak + 1, 1).strftime('%b')} "
+                      f"x{fitted.factors[peak, i]:.3f}, trough x{fitted.factors[:, i].min():.3f}")
+    if 'search' in factors:
+        amplitude = factors['search'].factors.max(axis=0) / factors['search'].factors.min(axis=0)
+        strongest = factors['search'].names[int(np.argmax(amplitude))]
+        print(f"  Strongest seasonality: {strongest} (peak/trough x{amplitude.max():.2f})")
+    return master_df, census_df, search_sa, factors
+
+
+def seasonal_factors_frame(seasonal_factors):
+    """Fitted factors of every source in long form"""
+    return pd.concat([fitted.frame().assign(source=name) for name, fitted in seasonal_factors.items()],
+                     ignore_index=True)[['source', 'series', 'month', 'factor', 'model']]
+
+
 # ========================================================================================================
 # PART 2: SEARCH BEHAVIOR ANALYSIS (GOOGLE TRENDS)
 # ========================================================================================================
 
-def create_latent_variables(df, indicators_dict):
+def discover_indicator_groups(df, method='agglomerative', transform='yoy', min_corr=0.4, k_neighbors=10):
+    """Build indicator groups automatically by clustering correlated search terms"""
+    print("\n" + "="*100)
+    print("PART 2: DISCOVERING INDICATOR GROUPS FROM SEARCH TERM CORRELATIONS")
+    print("="*100)
+
+    terms = [c for c in df.columns if c not in ['date', 'cci']]
+    print(f"\n-> Clustering {len(terms)} search terms on {transform} changes "
+          f"({method}, top-{k_neighbors} neighbors, r >= {min_corr})")
+
+    indicators_dict = cluster_search_terms(df.sort_values('date'), terms=terms, method=method, transform=transform,
+                                           min_corr=min_corr, k_neighbors=k_neighbors)
+
+    grouped = sum(len(group_terms) for group_terms in indicators_dict.values())
+    print(f"\nOK {len(indicators_dict)} indicator groups found ({grouped}/{len(terms)} terms grouped)")
+    for indicator_name, group_terms in indicators_dict.items():
+        print(f"    - {indicator_name}: {len(group_terms)} terms")
+
+    return indicators_dict
+
+
+def create_latent_variables(df, indicators_dict, n_workers=None):
     """Create latent variables using Factor Analysis (SEM approach)"""
     print("\n" + "="*100)
     print("PART 2A: CREATING LATENT VARIABLES FROM SEARCH TERMS")
     print("="*100)
 
-    scaler = StandardScaler()
-    scores_df = df[['date', 'cci']].copy()
+    # Fit every indicator group at once (process pool for large groupings)
+    scores_df, loadings_df = fit_latent_variables(df, indicators_dict, n_workers=n_workers)
 
     for indicator_name, search_terms in indicators_dict.items():
         print(f"\n-> Processing: {indicator_name}")
         print(f"  Search terms: {', '.join(search_terms)}")
 
-        # Extract relevant columns
-        available_terms = [term for term in search_terms if term in df.columns]
-
-        if len(available_terms) < 2:
+        if f'{indicator_name}_score' not in scores_df.columns:
             print(f"  X Insufficient data (need at least 2 terms)")
             continue
 
-        X = df[available_terms].copy()
-
-        # Handle missing values
-        X = X.fillna(X.mean())
-
-        # Standardize
-        X_scaled = scaler.fit_transform(X)
+        noise_variance = loadings_df.loc[loadings_df['Indicator'] == indicator_name, 'Noise_Variance']
+        print(f"  OK Latent variable created (variance explained: {noise_variance.mean():.3f})")
 
-        # Factor Analysis
-        fa = FactorAnalysis(n_components=1, random_state=42)
-        latent_score = fa.fit_transform(X_scaled)
+    return scores_df, loadings_df
 
-        scores_df[f'{indicator_name}_score'] = latent_score.flatten()
-        print(f"  OK Latent variable created (variance explained: {fa.noise_variance_.mean():.3f})")
 
-    return scores_df
+def search_results_table(search_stats):
+    """Search indicator results (one row per indicator, best R² first) from the cci ~ score statistics"""
+    results = []
+    for fit in search_stats.finalize().itertuples(index=False):
+        results.append({
+            'Indicator': fit.x.replace('_score', ''),
+            'Coefficient': fit.slope,
+            'R²': fit.r2,
+            'Adj_R²': fit.adj_r2,
+            'P-value': fit.p_value,
+            'F-statistic': fit.f,
+            'Std_Error': fit.std_error,
+        })
+    results = pd.DataFrame(results)
+    results['Significant'] = significance_flag(results['P-value'])
+    return results.sort_values('R²', ascending=False)
 
 
 def analyze_search_correlations(scores_df):
@@ -354,48 +586,86 @@ def analyze_search_correlations(scores_df):
     print("PART 2B: SEARCH BEHAVIOR CORRELATION ANALYSIS")
     print("="*100)
 
-    results = []
     score_columns = [col for col in scores_df.columns if col.endswith('_score')]
 
     print(f"\nTesting {len(score_columns)} indicators against Consumer Confidence Index\n")
     print("-" * 100)
 
-    for score_col in score_columns:
-        indicator_name = score_col.replace('_score', '')
+    # OLS cci ~ const + score for every indicator from one pass of sufficient statistics
+    search_stats = accumulate(scores_df, [(score_col, 'cci') for score_col in score_columns])
+    results_df = search_results_table(search_stats)
 
-        # Prepare data
-        X = scores_df[score_col].values.reshape(-1, 1)
-        y = scores_df['cci'].values
+    for fit in search_stats.finalize().itertuples(index=False):
+        indicator_name = fit.x.replace('_score', '')
+        sig_symbol = "OK" if fit.p_value < 0.05 else "X"
+        print(f"{sig_symbol} {indicator_name:20s} | R²={fit.r2*100:5.1f}% | Coef={fit.slope:7.3f} | p={fit.p_value:.6f}")
 
-        # Add constant for intercept
-        X_with_const = sm.add_constant(X)
+    print("-" * 100)
+    print(f"\nSummary: {results_df['Significant'].value_counts().get('Yes', 0)}/{len(results_df)} indicators significant (p < 0.05)")
 
-        # OLS Regression
-        model = sm.OLS(y, X_with_const).fit()
+    return results_df
 
-        # Store results
-        results.append({
-            'Indicator': indicator_name,
-            'Coefficient': model.params[1],
-            'R²': model.rsquared,
-            'Adj_R²': model.rsquared_adj,
-            'P-value': model.pvalues[1],
-            'F-statistic': model.fvalue,
-            'Std_Error': model.bse[1],
-            'Significant': 'Yes' if model.pvalues[1] < 0.05 else 'No'
-        })
 
-        # Print result
-        sig_symbol = "OK" if model.pvalues[1] < 0.05 else "X"
-        print(f"{sig_symbol} {indicator_name:20s} | R²={model.rsquared*100:5.1f}% | Coef={model.params[1]:7.3f} | p={model.pvalues[1]:.6f}")
+# Responses and controls of the multivariate (structural) model
+MULTIVARIATE_RESPONSES = ['cci', 'unemployment_rate', 'consumer_sentiment']
+MULTIVARIATE_CONTROLS = ['cpi', 'personal_saving_rate']
+
+
+def analyze_multivariate_models(master_df, vif_threshold=10.0):
+    """
+    Structural part of the SEM: jointly regress CCI, unemployment and consumer
+    sentiment on the latent scores plus CPI / saving-rate controls, after
+    screening collinear scores by VIF.
+    """
+    print("\n" + "="*100)
+    print("PART 2C: MULTIVARIATE MODEL - LATENT SCORES + CONTROLS (VIF SCREENED)")
+    print("="*100)
+
+    score_columns = [col for col in master_df.columns if col.endswith('_score')]
+    responses = [col for col in MULTIVARIATE_RESPONSES if col in master_df.columns]
+    controls = [col for col in MULTIVARIATE_CONTROLS if col in master_df.columns]
+    if not score_columns or not responses:
+        print("\nX No latent scores or economic responses available")
+        return None
+
+    # One cross-product matrix serves the VIFs, the joint fit and every subset fit
+    cross_products = CrossProducts(score_columns + controls + responses).update(master_df)
+    print(f"\nOK Cross-product matrix: {cross_products.n} complete months × {len(cross_products.columns)} variables")
 
-    results_df = pd.DataFrame(results)
-    results_df = results_df.sort_values('R²', ascending=False)
+    predictors, vif_table = screen_vif(cross_products, score_columns + controls,
+                                       threshold=vif_threshold, keep=controls)
+    print(f"\n-> VIF screening (threshold {vif_threshold:g}, controls always kept):")
+    for _, row in vif_table.iterrows():
+        if row['Retained'] == 'Yes':
+            print(f"  OK {row['Predictor']:30s} VIF = {row['VIF']:6.2f}")
+        else:
+            print(f"  X  {row['Predictor']:30s} VIF = {row['VIF']:6.2f} (dropped at step {int(row['Drop_Step'])})")
 
+    coefficients, models = cross_products.fit(responses, predictors)
+    coefficients['Significant'] = significance_flag(coefficients['P-value'])
+
+    print("\n" + "-" * 100)
+    for _, model in models.iterrows():
+        terms = coefficients[(coefficients['Response'] == model['Response']) &
+                             (coefficients['Term'] != 'const') & (coefficients['Significant'] == 'Yes')]
+        sig_symbol = "OK" if model['F_p-value'] < 0.05 else "X"
+        print(f"{sig_symbol} {model['Response']:20s} | R²={model['R²']*100:5.1f}% | Adj R²={model['Adj_R²']*100:5.1f}% "
+              f"| F p={model['F_p-value']:.2e} | significant: {', '.join(terms['Term']) or 'none'}")
     print("-" * 100)
-    print(f"\nSummary: {results_df['Significant'].value_counts().get('Yes', 0)}/{len(results_df)} indicators significant (p < 0.05)")
 
-    return results_df
+    # Each indicator's explanatory power beyond the controls (all subsets solved in one batch)
+    subsets = [controls + [col] for col in score_columns]
+    increments = cross_products.fit_subsets(responses, subsets)
+    increments.insert(1, 'Indicator', increments['Subset'].str.rsplit(' + ', n=1).str[-1]
+                      .str.replace('_score', ''))
+    if controls:
+        base = cross_products.fit_subsets(responses, [controls]).set_index('Response')['R²']
+        increments['ΔR²_over_controls'] = increments['R²'] - increments['Response'].map(base)
+    else:
+        increments['ΔR²_over_controls'] = increments['R²']
+
+    return {'coefficients': coefficients, 'models': models, 'vif': vif_table,
+            'increments': increments}
 
 
 # ========================================================================================================
@@ -448,23 +718,80 @@ def categorize_little_luxuries(retail_df):
     return retail_df
 
 
-def analyze_purchase_patterns(retail_df):
+# Finest grain of the purchase cube; the monthly, price-range and category-by-period
+# summaries are all slices of it (year and quarter are attributes of month)
+PURCHASE_CUBE_DIMENSIONS = ['month', 'purchase_type', 'luxury_category', 'price_range',
+                            'Payment Method', 'Location']
+PRICE_BINS = [float('-inf'), 0, 10, 30, 50, 100, 500, float('inf')]
+PRICE_LABELS = ['$0 or less', '$0-10', '$10-30', '$30-50', '$50-100', '$100-500', '$500+']
+
+# Level given to a missing cube dimension, so the row still counts in every slice that rolls it up
+MISSING_LEVEL = '(missing)'
+
+
+def with_missing_level(values):
+    """Dimension values with missing entries labelled MISSING_LEVEL (categories keep their order)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if not values.isna().any():
+            return values
+        values = values.cat.add_categories([MISSING_LEVEL])
+    return values.fillna(MISSING_LEVEL)
+
+
+# Grouping sets precomputed for Tableau (like SQL GROUPING SETS; '(all)' marks a rolled-up dimension)
+PURCHASE_GROUPING_SETS = [
+    (), ('year',), ('year', 'quarter'), ('month',), ('month', 'purchase_type'),
+    ('year', 'quarter', 'luxury_category'), ('purchase_type',), ('luxury_category',),
+    ('price_range',), ('purchase_type', 'price_range'), ('luxury_category', 'price_range'),
+    ('purchase_type', 'Payment Method'), ('purchase_type', 'Location'), ('Payment Method', 'Location'),
+]
+
+
+def build_purchase_cube(retail_df):
+    """
+    One pass over the transactions: spend count/sum and distinct customers
+    per finest cell. Missing dimension values get MISSING_LEVEL (and
+    non-positive amounts their own price range), so every dated transaction
+    is in every slice.
+    """
+    rows = pd.DataFrame({
+        'month': floor_dates(retail_df['Transaction Date'], 'M'),
+        'purchase_type': with_missing_level(retail_df['purchase_type']),
+        'luxury_category': with_missing_level(retail_df['luxury_category']),
+        'price_range': with_missing_level(pd.cut(retail_df['Total Spent'], bins=PRICE_BINS, labels=PRICE_LABELS)),
+        'Payment Method': with_missing_level(retail_df['Payment Method']),
+        'Location': with_missing_level(retail_df['Location']),
+        'Total Spent': retail_df['Total Spent'],
+        'Customer ID': retail_df['Customer ID'],
+    })
+    cube = RollupCube(rows, PURCHASE_CUBE_DIMENSIONS, ['Total Spent'], distinct='Customer ID')
+    cube.add_attribute('year', cube.cells['month'].dt.year)
+    cube.add_attribute('quarter', cube.cells['month'].dt.quarter)
+    print(f"\nOK Purchase cube: {len(cube.cells):,} cells "
+          f"({' × '.join(PURCHASE_CUBE_DIMENSIONS)}) from {len(retail_df):,} transactions")
+    return cube
+
+
+def purchase_slice(purchase_cube, dimensions, names, where=None):
+    """Spend sum / count / mean and distinct customers by the given dimensions, renamed to names"""
+    summary = purchase_cube.slice(dimensions, where)
+    summary = summary[list(dimensions) + ['Total Spent_sum', 'count', 'Total Spent_mean', 'Customer ID_distinct']]
+    summary.columns = names
+    return summary
+
+
+def analyze_purchase_patterns(retail_df, purchase_cube):
     """Analyze purchase patterns over time"""
     print("\n" + "="*100)
     print("PART 3B: TEMPORAL PURCHASE PATTERN ANALYSIS")
     print("="*100)
 
-    # Aggregate by month
+    # Aggregate by month (kept on the processed transactions export)
     retail_df['year_month'] = retail_df['Transaction Date'].dt.to_period('M')
 
-    monthly_summary = retail_df.groupby(['year_month', 'purchase_type']).agg({
-        'Total Spent': ['sum', 'count', 'mean'],
-        'Customer ID': 'nunique'
-    }).reset_index()
-
-    monthly_summary.columns = ['year_month', 'purchase_type', 'total_spending',
-                               'transaction_count', 'avg_transaction', 'unique_customers']
-    monthly_summary['year_month'] = monthly_summary['year_month'].dt.to_timestamp()
+    monthly_summary = purchase_slice(purchase_cube, ['month', 'purchase_type'],
+                                     ['year_month', 'purchase_type', 'total_spending',
+                                      'transaction_count', 'avg_transaction', 'unique_customers'])
 
     # Calculate luxury ratio
     total_by_month = monthly_summary.groupby('year_month')['total_spending'].sum().reset_index()
@@ -488,26 +815,62 @@ def analyze_purchase_patterns(retail_df):
     return monthly_summary, luxury_ratio
 
 
-def analyze_price_points(retail_df):
+ALL_LUXURIES = 'All Little Luxuries'
+
+
+def build_price_histograms(retail_df, chunk_size=1_000_000):
+    """Log-binned Little Luxury transaction prices by luxury category and by month, streamed in chunks"""
+    luxury = retail_df['purchase_type'] == 'Little Luxury'
+    categories = sorted(retail_df.loc[luxury, 'luxury_category'].unique())
+    months = retail_df['Transaction Date'].dt.to_period('M').astype(str)
+    histograms = {
+        'luxury_category': LogHistogram([ALL_LUXURIES] + categories),
+        'month': LogHistogram(sorted(months[luxury].unique())),
+    }
+    for start in range(0, len(retail_df), chunk_size):
+        rows = slice(start, start + chunk_size)
+        chunk = retail_df.iloc[rows]
+        prices = chunk['Total Spent'][luxury.iloc[rows]]
+        histograms['luxury_category'].update(prices, np.full(len(prices), ALL_LUXURIES, dtype=object))
+        histograms['luxury_category'].update(prices, chunk.loc[prices.index, 'luxury_category'])
+        histograms['month'].update(prices, months.iloc[rows][luxury.iloc[rows]])
+    return histograms
+
+
+def price_distribution_frames(price_histograms):
+    """Quantiles / KDE sweet spot per group, and the binned distributions, for Tableau"""
+    quantile_rows = []
+    histogram_frames = []
+    for group_type, histogram in price_histograms.items():
+        for group in histogram.groups:
+            n = histogram.total(group)
+            if n == 0:
+                continue
+            peaks = histogram.peaks(group)
+            row = {'group_type': group_type, 'group': group, 'transactions': n, 'mean': histogram.mean(group)}
+            row.update({f'p{round(q * 100)}': value for q, value in zip(QUANTILES, histogram.quantiles(group))})
+            row.update({'sweet_spot': peaks[0][0] if peaks else np.nan,
+                        'sweet_spot_share': peaks[0][2] if peaks else np.nan,
+                        'n_peaks': len(peaks)})
+            quantile_rows.append(row)
+        frame = histogram.frame()
+        frame.insert(0, 'group_type', group_type)
+        histogram_frames.append(frame)
+    return pd.DataFrame(quantile_rows), pd.concat(histogram_frames, ignore_index=True)
+
+
+def analyze_price_points(purchase_cube, price_histograms=None):
     """Analyze price point sweet spots for little luxuries"""
     print("\n" + "="*100)
     print("PART 3C: PRICE POINT ANALYSIS")
     print("="*100)
 
-    luxury_df = retail_df[retail_df['purchase_type'] == 'Little Luxury'].copy()
-
-    # Define price ranges
-    bins = [0, 10, 30, 50, 100, 500, float('inf')]
-    labels = ['$0-10', '$10-30', '$30-50', '$50-100', '$100-500', '$500+']
-    luxury_df['price_range'] = pd.cut(luxury_df['Total Spent'], bins=bins, labels=labels)
-
-    price_analysis = luxury_df.groupby('price_range').agg({
-        'Total Spent': ['count', 'sum', 'mean'],
-        'Customer ID': 'nunique'
-    }).reset_index()
-
-    price_analysis.columns = ['price_range', 'transaction_count', 'total_spent',
-                              'avg_transaction', 'unique_customers']
+    price_analysis = purchase_slice(purchase_cube, ['price_range'],
+                                    ['price_range', 'total_spent', 'transaction_count',
+                                     'avg_transaction', 'unique_customers'],
+                                    where={'purchase_type': 'Little Luxury'})
+    price_analysis = price_analysis[['price_range', 'transaction_count', 'total_spent',
+                                     'avg_transaction', 'unique_customers']]
 
     print(f"\nOK Price point analysis for Little Luxuries:\n")
     print("-" * 80)
@@ -517,17 +880,348 @@ def analyze_price_points(retail_df):
               f"Total: ${row['total_spent']:10,.0f} | Avg: ${row['avg_transaction']:6.2f}")
     print("-" * 80)
 
-    # Identify sweet spot
-    sweet_spot = price_analysis.loc[price_analysis['transaction_count'].idxmax()]
-    print(f"\n  ** Sweet Spot: {sweet_spot['price_range']} range with {sweet_spot['transaction_count']:,} transactions")
+    # Identify sweet spot: highest kernel-density peak of the log-binned prices
+    if price_histograms is None:
+        sweet_spot = price_analysis.loc[price_analysis['transaction_count'].idxmax()]
+        print(f"\n  ** Sweet Spot: {sweet_spot['price_range']} range with {sweet_spot['transaction_count']:,} transactions")
+        return price_analysis
+
+    by_category = price_histograms['luxury_category']
+    print(f"\n  Price distribution (KDE peaks on log-binned prices):\n")
+    print("-" * 100)
+    for group in by_category.groups:
+        if by_category.total(group) == 0:
+            continue
+        p25, p50, p75 = by_category.quantiles(group, [0.25, 0.5, 0.75])
+        peaks = by_category.peaks(group)
+        spots = ", ".join(f"${price:,.0f} ({share * 100:.0f}%)" for price, _, share in peaks[:3])
+        print(f"  {group:25s} | median ${p50:9,.2f} (IQR ${p25:,.2f}-${p75:,.2f}) | peaks: {spots}")
+    print("-" * 100)
+
+    peaks = by_category.peaks(ALL_LUXURIES, bandwidth_decades=BANDWIDTH_DECADES)
+    if peaks:
+        price, _, share = peaks[0]
+        window = 10 ** BANDWIDTH_DECADES - 1            # peaks() counts one bandwidth either side in log price
+        print(f"\n  ** Sweet Spot: ~${price:,.2f} ({share * 100:.1f}% of little-luxury transactions "
+              f"within ±{window * 100:.0f}%)")
 
     return price_analysis
 
 
+# Calendar groupings whose spend-weighted luxury ratio is compared in PART 3F
+CALENDAR_EFFECTS = {
+    'Weekday': 'weekday',
+    'Weekend': 'is_weekend',
+    'Payday': 'is_payday',
+    'Month end': 'is_month_end',
+    'Holiday / gift occasion': 'is_holiday',
+}
+
+
+def analyze_daily_patterns(retail_df):
+    """
+    Daily spending by purchase type and luxury category with calendar
+    features, the daily luxury ratio, and weekday / payday / holiday effects.
+    """
+    print("\n" + "="*100)
+    print("PART 3F: DAILY PURCHASE PATTERNS AND CALENDAR EFFECTS")
+    print("="*100)
+
+    first, types, spend, counts = daily_totals(retail_df, 'Transaction Date', 'Total Spent', by='purchase_type')
+    days = first + np.arange(len(spend))
+    luxury_rows = retail_df['luxury_category'].where(retail_df['purchase_type'] == 'Little Luxury')
+    _, categories, category_spend, category_counts = daily_totals(
+        retail_df.assign(luxury_category=luxury_rows), 'Transaction Date', 'Total Spent',
+        by='luxury_category', day_range=(first, days[-1]))
+
+    daily_df = calendar_features(days)
+    for i, purchase_type in enumerate(types):
+        daily_df[f"{purchase_type.lower().replace(' ', '_')}_spending"] = spend[:, i]
+    luxury = types.get_loc('Little Luxury')
+    daily_df['total_spending'] = spend.sum(axis=1)
+    daily_df['transactions'] = counts.sum(axis=1)
+    daily_df['luxury_transactions'] = counts[:, luxury]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_df['luxury_ratio_pct'] = spend[:, luxury] / daily_df['total_spending'] * 100
+        # Trailing 7-day ratio from running sums (smooths the days with a handful of transactions)
+        luxury_7d = np.convolve(spend[:, luxury], np.ones(7))[:len(days)]
+        total_7d = np.convolve(daily_df['total_spending'].to_numpy(), np.ones(7))[:len(days)]
+        daily_df['luxury_ratio_7d_pct'] = np.where(total_7d > 0, luxury_7d / total_7d * 100, np.nan)
+
+    category_df = pd.DataFrame({
+        'date': np.repeat(daily_df['date'].to_numpy(), len(categories)),
+        'luxury_category': np.tile(np.asarray(categories), len(days)),
+        'spending': category_spend.ravel(),
+        'transactions': category_counts.ravel(),
+    })
+
+    print(f"\nOK Daily series: {len(days)} days "
+          f"({daily_df['date'].min().strftime('%Y-%m-%d')} to {daily_df['date'].max().strftime('%Y-%m-%d')}), "
+          f"{len(types)} purchase types × {len(categories)} luxury categories")
+    print(f"  Days with transactions: {(daily_df['transactions'] > 0).sum()} | "
+          f"paydays: {daily_df['is_payday'].sum()} | holidays / gift occasions: {daily_df['is_holiday'].sum()}")
+
+    # Spend-weighted luxury ratio per calendar grouping (sums over days, not an average of daily ratios)
+    effects = []
+    for effect, column in CALENDAR_EFFECTS.items():
+        codes, levels = pd.factorize(daily_df[column], sort=True)
+        luxury_sum = np.bincount(codes, weights=spend[:, luxury], minlength=len(levels))
+        total_sum = np.bincount(codes, weights=daily_df['total_spending'], minlength=len(levels))
+        n_days = np.bincount(codes, minlength=len(levels))
+        for level, lux, total, n in zip(levels, luxury_sum, total_sum, n_days):
+            label = WEEKDAY_NAMES[level] if column == 'weekday' else ('Yes' if level else 'No')
+            effects.append({'Effect': effect, 'Level': label, 'Days': n,
+                            'Luxury_Spending': lux, 'Total_Spending': total,
+                            'Luxury_Ratio_%': lux / total * 100 if total else np.nan,
+                            'Luxury_Spending_per_Day': lux / n})
+    effects_df = pd.DataFrame(effects)
+
+    overall = spend[:, luxury].sum() / daily_df['total_spending'].sum() * 100
+    print(f"\n  Luxury share of spending by calendar grouping (overall {overall:.1f}%):\n")
+    print("-" * 100)
+    for _, row in effects_df.iterrows():
+        print(f"  {row['Effect']:25s} {row['Level']:10s} {row['Luxury_Ratio_%']:5.1f}% "
+              f"({row['Luxury_Ratio_%'] - overall:+5.1f} pts) | ${row['Luxury_Spending_per_Day']:8.2f} luxury/day "
+              f"over {row['Days']} days")
+    print("-" * 100)
+    return daily_df, category_df, effects_df
+
+
+def build_customer_profiles(retail_df, chunk_size=1_000_000):
+    """
+    Per-customer profile table, fed in chunks so the transaction feed is
+    never copied whole; segment is the luxury category for little-luxury
+    rows and the purchase type otherwise.
+    """
+    segment = retail_df['luxury_category'].where(retail_df['purchase_type'] == 'Little Luxury',
+                                                 retail_df['purchase_type'])
+    profiles = CustomerProfiles()
+    for start in range(0, len(retail_df), chunk_size):
+        rows = slice(start, start + chunk_size)
+        profiles.update(retail_df['Customer ID'].iloc[rows], retail_df['Transaction Date'].iloc[rows],
+                        segment.iloc[rows], retail_df['Total Spent'].iloc[rows])
+    return profiles
+
+
+def analyze_customer_profiles(profiles):
+    """
+    Customer treat profiles: luxury share of wallet, purchase frequency,
+    recency and average ticket, compared across luxury-share quartiles.
+    """
+    print("\n" + "="*100)
+    print("PART 3G: CUSTOMER TREAT PROFILES")
+    print("="*100)
+
+    profile_df = profiles.frame()
+    yearly_df = profiles.yearly_frame()
+    print(f"\nOK {len(profiles):,} customers × {len(profiles.segments)} segments "
+          f"({profiles.nbytes / 1024:.1f} KB of profile state), "
+          f"{profile_df['transactions'].sum():,} transactions")
+    print(f"  Median luxury share of wallet: {profile_df['luxury_share_pct'].median():.1f}% | "
+          f"median purchases/month: {profile_df['purchases_per_month'].median():.2f} | "
+          f"median recency: {profile_df['recency_days'].median():.0f} days")
+
+    # Quartiles of luxury share: do heavy treat buyers shop more often or spend more per ticket?
+    quartile = pd.qcut(profile_df['luxury_share_pct'].rank(method='first'), 4,
+                       labels=['Q1 (lowest)', 'Q2', 'Q3', 'Q4 (highest)'])
+    by_quartile = profile_df.groupby(quartile, observed=True).agg(
+        customers=('customer_id', 'size'),
+        luxury_share_pct=('luxury_share_pct', 'mean'),
+        avg_ticket=('avg_ticket', 'mean'),
+        purchases_per_month=('purchases_per_month', 'mean'),
+        recency_days=('recency_days', 'mean'))
+    print(f"\n  Customers by luxury share of wallet quartile:\n")
+    print("-" * 100)
+    for label, row in by_quartile.iterrows():
+        print(f"  {label:13s} {row['customers']:5.0f} customers | luxury share {row['luxury_share_pct']:5.1f}% | "
+              f"avg ticket ${row['avg_ticket']:9.2f} | {row['purchases_per_month']:4.2f} purchases/month | "
+              f"recency {row['recency_days']:5.1f} days")
+    print("-" * 100)
+
+    top = profile_df['top_luxury_category'].replace('', np.nan).value_counts()
+    print(f"\n  Top luxury category per customer:")
+    for cat, n in top.items():
+        print(f"    {cat:30s} {n:5d} customers ({n / len(profile_df) * 100:5.1f}%)")
+
+    if not yearly_df.empty:
+        shift = yearly_df.groupby('year')['luxury_share_pct'].agg(['size', 'median'])
+        print(f"\n  Median luxury share of wallet by year:")
+        for year, row in shift.iterrows():
+            print(f"    {year}: {row['median']:5.1f}% ({row['size']:.0f} active customers)")
+    return profile_df, yearly_df
+
+
+# Months since first purchase compared across cohort periods in PART 3H
+RETENTION_MONTHS = [1, 3, 6, 12]
+
+
+def analyze_cohorts(retail_df, profiles, chunk_size=1_000_000):
+    """
+    Cohort × months-since matrices of retention, little-luxury retention,
+    spend and luxury share. Each customer's cohort is the month of their
+    first purchase (from the customer profiles), labelled with its economic
+    period; transactions are streamed in chunks.
+    """
+    print("\n" + "="*100)
+    print("PART 3H: CUSTOMER COHORTS AND LITTLE-LUXURY RETENTION")
+    print("="*100)
+
+    first_months = period_codes(period_start(profiles.first_day, 'D'), 'M')
+    cohorts = CohortMatrices(profiles.customers, first_months)
+    luxury = retail_df['purchase_type'] == 'Little Luxury'
+    for start in range(0, len(retail_df), chunk_size):
+        rows = slice(start, start + chunk_size)
+        cohorts.update(retail_df['Customer ID'].iloc[rows], retail_df['Transaction Date'].iloc[rows],
+                       retail_df['Total Spent'].iloc[rows], luxury.iloc[rows])
+
+    cohort_df = cohorts.frame()
+    cohort_df.insert(1, 'cohort_period', economic_period(cohort_df['cohort']))
+    sizes = cohort_df.drop_duplicates('cohort').set_index('cohort')
+    print(f"\nOK {len(sizes)} monthly cohorts ({sizes.index.min().strftime('%Y-%m')} to "
+          f"{sizes.index.max().strftime('%Y-%m')}), {int(sizes['cohort_size'].sum())} customers, "
+          f"up to {cohort_df['months_since'].max()} months since first purchase")
+    for period, size in sizes.groupby('cohort_period')['cohort_size'].sum().items():
+        print(f"  {period:20s} cohorts: {size:5d} customers")
+
+    # Customer-weighted retention per cohort period (active / acquired over the cohorts that reached the month)
+    print(f"\n  Retention by cohort period (any purchase / little luxuries):\n")
+    print("-" * 100)
+    for period, group in cohort_df.groupby('cohort_period'):
+        cells = []
+        for months in RETENTION_MONTHS:
+            reached = group[group['months_since'] == months]
+            if reached.empty:
+                cells.append(f"M{months}: n/a")
+                continue
+            size = reached['cohort_size'].sum()
+            cells.append(f"M{months}: {reached['active_customers'].sum() / size * 100:5.1f}% / "
+                         f"{reached['luxury_customers'].sum() / size * 100:5.1f}%")
+        print(f"  {period:20s} " + " | ".join(cells))
+    print("-" * 100)
+    if cohort_df['cohort_period'].nunique() < 2:
+        print(f"  Note: every cohort falls in one period ({cohort_df['cohort_period'].iloc[0]}); "
+              f"a longer transaction history is needed for a between-period comparison")
+
+    by_month = cohort_df.groupby('months_since')[['luxury_spending', 'spending']].sum()
+    luxury_share = by_month['luxury_spending'] / by_month['spending'].replace(0, np.nan) * 100
+    print(f"\n  Luxury share of cohort spending, month 0: {luxury_share.iloc[0]:.1f}% | "
+          f"month {luxury_share.index[-1]}: {luxury_share.iloc[-1]:.1f}%")
+    return cohort_df
+
+
+# Basket definitions compared in PART 3I: one customer's purchases within a day / week
+BASKET_PERIODS = {'customer-day': 'D', 'customer-week': 'W'}
+
+
+def analyze_market_baskets(retail_df, top_n=10):
+    """
+    Co-purchase pairs involving little-luxury items, at item level and at
+    segment level (luxury category, Necessity, Other), for each basket
+    definition: support, confidence and lift from sparse incidence products.
+    """
+    print("\n" + "="*100)
+    print("PART 3I: MARKET BASKET CO-PURCHASE ANALYSIS")
+    print("="*100)
+
+    item_info = retail_df.groupby('Item')[['purchase_type', 'luxury_category']].first()
+    segment = item_info['luxury_category'].where(item_info['purchase_type'] == 'Little Luxury',
+                                                 item_info['purchase_type'])
+    tables = {'item': [], 'segment': []}
+    for basket, freq in BASKET_PERIODS.items():
+        incidence, items = basket_matrix(retail_df['Customer ID'], retail_df['Transaction Date'],
+                                         retail_df['Item'], freq)
+        luxury_items = (item_info['purchase_type'].reindex(items) == 'Little Luxury').to_numpy()
+        segments, segment_levels = group_matrix(incidence, items, segment.reindex(items).to_numpy())
+        luxury_segments = ~segment_levels.isin(['Necessity', 'Other'])
+        sizes = np.diff(incidence.indptr)
+        print(f"\nOK {basket} baskets: {incidence.shape[0]:,} baskets × {incidence.shape[1]} items "
+              f"({(sizes > 1).sum():,} with 2+ items, largest {sizes.max()})")
+
+        for level, matrix, labels, focus in [('item', incidence, items, luxury_items),
+                                             ('segment', segments, segment_levels, luxury_segments)]:
+            pairs = pair_table(matrix, labels, focus)
+            pairs.insert(0, 'basket', basket)
+            tables[level].append(pairs)
+            print(f"  {level.capitalize()} pairs with a little luxury in {MIN_PAIR_BASKETS}+ baskets: {len(pairs)}")
+            for _, row in pairs.head(top_n if level == 'item' else len(pairs)).iterrows():
+                print(f"    {row['item_a']:28s} + {row['item_b']:28s} lift {row['lift']:5.2f} | "
+                      f"{row['baskets']:4d} baskets | conf {row['confidence_a_to_b'] * 100:5.1f}% / "
+                      f"{row['confidence_b_to_a'] * 100:5.1f}%")
+
+    item_pairs_df = pd.concat(tables['item'], ignore_index=True)
+    segment_pairs_df = pd.concat(tables['segment'], ignore_index=True)
+    together = item_pairs_df[item_pairs_df['lift'] > 1]
+    print(f"\n  Item pairs bought together more often than chance (lift > 1): {len(together)} of {len(item_pairs_df)}")
+    return item_pairs_df, segment_pairs_df
+
+
 # ========================================================================================================
 # PART 3D: CENSUS RETAIL SALES ANALYSIS (HILL ET AL. 2012 REPLICATION)
 # ========================================================================================================
 
+# Census regression key -> (results label, printed name, sales column after split_census_categories)
+CENSUS_CATEGORIES = {
+    '446': ('Beauty & Personal Care (NAICS 446)', 'Beauty & Personal Care', 'beauty_sales'),
+    '44812': ('Women\'s Clothing (NAICS 44812)', 'Women\'s Clothing', 'fashion_sales'),
+}
+
+
+def split_census_categories(census_df):
+    """
+    Beauty (NAICS 446) and women's clothing (NAICS 44812) rows with dated
+    observations. When seasonally adjusted sales are present they become the
+    analyzed <category>_sales, and the unadjusted ones <category>_sales_nsa.
+    """
+    beauty_df = census_df[census_df['NAICS  Code'] == 446].copy()
+    fashion_df = census_df[census_df['NAICS  Code'] == 44812].copy()
+
+    # Remove rows with NaT observation_date
+    beauty_df = beauty_df.dropna(subset=['observation_date'])
+    fashion_df = fashion_df.dropna(subset=['observation_date'])
+
+    # Rename for clarity
+    adjusted = 'sales_sa' in census_df.columns
+    beauty_df = beauty_df.rename(columns=census_sales_names('beauty_sales', adjusted))
+    fashion_df = fashion_df.rename(columns=census_sales_names('fashion_sales', adjusted))
+    return beauty_df, fashion_df
+
+
+def census_sales_names(sales_col, adjusted):
+    if adjusted:
+        return {'sales': f'{sales_col}_nsa', 'sales_sa': sales_col, 'USACSCICP02STSAM': 'cci'}
+    return {'sales': sales_col, 'USACSCICP02STSAM': 'cci'}
+
+
+def census_statistics(beauty_df, fashion_df):
+    """Sales ~ CCI sufficient statistics per Census category"""
+    frames = {'446': beauty_df, '44812': fashion_df}
+    return {key: accumulate(frames[key], [('cci', sales_col)])
+            for key, (_, _, sales_col) in CENSUS_CATEGORIES.items()}
+
+
+def census_results_table(census_stats, min_months=30):
+    """Census regression results for the categories with more than min_months complete months"""
+    results = []
+    for key, (label, _, _) in CENSUS_CATEGORIES.items():
+        fit = census_stats[key].finalize().iloc[0]
+        if fit['n'] <= min_months:
+            continue
+        results.append({
+            'Category': label,
+            'Coefficient': fit['slope'],
+            'R²': fit['r2'],
+            'Adj_R²': fit['adj_r2'],
+            'P-value': fit['p_value'],
+            'F-statistic': fit['f'],
+            'N_months': fit['n'],
+            'Direction': 'Positive' if fit['slope'] > 0 else 'Negative'
+        })
+    results = pd.DataFrame(results, columns=['Category', 'Coefficient', 'R²', 'Adj_R²', 'P-value',
+                                             'F-statistic', 'N_months', 'Direction'])
+    results.insert(results.columns.get_loc('Direction'), 'Significant', significance_flag(results['P-value']))
+    return results
+
+
 def analyze_census_retail_sales(census_df):
     """
     Analyze U.S. Census retail sales data to test Hill et al. (2012) hypothesis.
@@ -546,89 +1240,34 @@ def analyze_census_retail_sales(census_df):
         return None
 
     # Separate by NAICS code and remove NaT dates
-    beauty_df = census_df[census_df['NAICS  Code'] == 446].copy()
-    fashion_df = census_df[census_df['NAICS  Code'] == 44812].copy()
-
-    # Remove rows with NaT observation_date
-    beauty_df = beauty_df.dropna(subset=['observation_date'])
-    fashion_df = fashion_df.dropna(subset=['observation_date'])
-
-    # Rename for clarity
-    beauty_df = beauty_df.rename(columns={'sales': 'beauty_sales', 'USACSCICP02STSAM': 'cci'})
-    fashion_df = fashion_df.rename(columns={'sales': 'fashion_sales', 'USACSCICP02STSAM': 'cci'})
+    beauty_df, fashion_df = split_census_categories(census_df)
 
     print(f"\nOK Data separated:")
     if len(beauty_df) > 0:
         print(f"  Beauty/Personal Care: {len(beauty_df):,} months ({beauty_df['observation_date'].min().strftime('%Y-%m')} to {beauty_df['observation_date'].max().strftime('%Y-%m')})")
     if len(fashion_df) > 0:
         print(f"  Women's Clothing: {len(fashion_df):,} months ({fashion_df['observation_date'].min().strftime('%Y-%m')} to {fashion_df['observation_date'].max().strftime('%Y-%m')})")
+    if 'beauty_sales_nsa' in beauty_df.columns:
+        print("  Sales are seasonally adjusted (classical decomposition per NAICS code)")
 
     # Test correlations with CCI
     print("\n" + "-" * 100)
     print("CORRELATION ANALYSIS: Retail Sales vs Consumer Confidence Index")
     print("-" * 100)
 
-    results = []
+    census_stats = census_statistics(beauty_df, fashion_df)
+    results_df = census_results_table(census_stats)
 
-    # Beauty vs CCI
-    if 'cci' in beauty_df.columns and 'beauty_sales' in beauty_df.columns:
-        valid_beauty = beauty_df[['cci', 'beauty_sales']].dropna()
-        if len(valid_beauty) > 30:
-            # Prepare regression
-            X = valid_beauty['cci'].values.reshape(-1, 1)
-            y = valid_beauty['beauty_sales'].values
-            X_with_const = sm.add_constant(X)
-            model_beauty = sm.OLS(y, X_with_const).fit()
-
-            results.append({
-                'Category': 'Beauty & Personal Care (NAICS 446)',
-                'Coefficient': model_beauty.params[1],
-                'R²': model_beauty.rsquared,
-                'Adj_R²': model_beauty.rsquared_adj,
-                'P-value': model_beauty.pvalues[1],
-                'F-statistic': model_beauty.fvalue,
-                'N_months': len(valid_beauty),
-                'Significant': 'Yes' if model_beauty.pvalues[1] < 0.05 else 'No',
-                'Direction': 'Positive' if model_beauty.params[1] > 0 else 'Negative'
-            })
-
-            sig = "OK" if model_beauty.pvalues[1] < 0.05 else "X"
-            direction = "positive" if model_beauty.params[1] > 0 else "negative (LIPSTICK EFFECT)"
-            print(f"\n{sig} Beauty & Personal Care:")
-            print(f"  R² = {model_beauty.rsquared*100:.2f}% | Coef = {model_beauty.params[1]:.2f} ({direction})")
-            print(f"  p-value = {model_beauty.pvalues[1]:.6f} | N = {len(valid_beauty)} months")
-
-    # Fashion vs CCI
-    if 'cci' in fashion_df.columns and 'fashion_sales' in fashion_df.columns:
-        valid_fashion = fashion_df[['cci', 'fashion_sales']].dropna()
-        if len(valid_fashion) > 30:
-            X = valid_fashion['cci'].values.reshape(-1, 1)
-            y = valid_fashion['fashion_sales'].values
-            X_with_const = sm.add_constant(X)
-            model_fashion = sm.OLS(y, X_with_const).fit()
-
-            results.append({
-                'Category': 'Women\'s Clothing (NAICS 44812)',
-                'Coefficient': model_fashion.params[1],
-                'R²': model_fashion.rsquared,
-                'Adj_R²': model_fashion.rsquared_adj,
-                'P-value': model_fashion.pvalues[1],
-                'F-statistic': model_fashion.fvalue,
-                'N_months': len(valid_fashion),
-                'Significant': 'Yes' if model_fashion.pvalues[1] < 0.05 else 'No',
-                'Direction': 'Positive' if model_fashion.params[1] > 0 else 'Negative'
-            })
-
-            sig = "OK" if model_fashion.pvalues[1] < 0.05 else "X"
-            direction = "positive" if model_fashion.params[1] > 0 else "negative (LIPSTICK EFFECT)"
-            print(f"\n{sig} Women's Clothing:")
-            print(f"  R² = {model_fashion.rsquared*100:.2f}% | Coef = {model_fashion.params[1]:.2f} ({direction})")
-            print(f"  p-value = {model_fashion.pvalues[1]:.6f} | N = {len(valid_fashion)} months")
+    names = {label: name for label, name, _ in CENSUS_CATEGORIES.values()}
+    for _, result in results_df.iterrows():
+        sig = "OK" if result['P-value'] < 0.05 else "X"
+        direction = "positive" if result['Coefficient'] > 0 else "negative (LIPSTICK EFFECT)"
+        print(f"\n{sig} {names[result['Category']]}:")
+        print(f"  R² = {result['R²']*100:.2f}% | Coef = {result['Coefficient']:.2f} ({direction})")
+        print(f"  p-value = {result['P-value']:.6f} | N = {result['N_months']} months")
 
     print("-" * 100)
 
-    results_df = pd.DataFrame(results)
-
     # Recession period analysis
     print("\n" + "-" * 100)
     print("RECESSION PERIOD ANALYSIS")
@@ -692,6 +1331,78 @@ def analyze_census_retail_sales(census_df):
     return results_df, period_df, beauty_df, fashion_df
 
 
+def compact_frame(label, df, exclude=()):
+    """Downcast a loaded panel for compact mode and report the memory saved"""
+    compact = downcast_numeric(df, exclude=exclude)
+    print(f"  Compact mode: {label} {memory_mb(df):.2f} MB -> {memory_mb(compact):.2f} MB")
+    return compact
+
+
+def validate_compact_precision(full_precision, indicators_dict, search_results, census_results,
+                               n_workers=None):
+    """Re-run the search and census regressions on full-precision inputs and report the deviation"""
+    print("\n" + "="*100)
+    print("COMPACT MODE VALIDATION: FLOAT32 PANELS vs FULL PRECISION")
+    print("="*100)
+
+    reports = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if 'google_trends' in full_precision and search_results is not None:
+            full_scores, _ = fit_latent_variables(full_precision['google_trends'], indicators_dict,
+                                                  n_workers=n_workers)
+            full_search = analyze_search_correlations(full_scores)
+            reports.append(precision_report(full_search, search_results, 'Indicator')
+                           .assign(Analysis='Search indicators vs CCI'))
+        if 'census' in full_precision and census_results is not None:
+            full_census = analyze_census_retail_sales(full_precision['census'])[0]
+            reports.append(precision_report(full_census, census_results, 'Category')
+                           .assign(Analysis='Census sales vs CCI'))
+
+    if not reports:
+        print("\nX Nothing to validate")
+        return None
+
+    report = pd.concat(reports, ignore_index=True)[['Analysis', 'Metric', 'Max_Abs_Deviation',
+                                                   'Mean_Abs_Deviation', 'N']]
+    print(f"\n{report.to_string(index=False)}")
+
+    worst_r2 = report.loc[report['Metric'] == 'R²', 'Max_Abs_Deviation'].max()
+    worst_p = report.loc[report['Metric'] == 'P-value', 'Max_Abs_Deviation'].max()
+    flips = report.loc[report['Metric'] == 'Significance flips', 'Max_Abs_Deviation'].sum()
+    print(f"\n{'OK' if flips == 0 else 'X'} Max |ΔR²| = {worst_r2:.2e}, max |Δp| = {worst_p:.2e}, "
+          f"significance flips: {int(flips)}")
+    return report
+
+
+# ========================================================================================================
+# PART 3E: DEMOGRAPHIC SEGMENTATION
+# ========================================================================================================
+
+def analyze_demographic_segments(sales_df):
+    """Age band × gender × state × category × month purchase cube, with headline rollups"""
+    print("\n" + "="*100)
+    print("PART 3E: DEMOGRAPHIC SEGMENTATION - AGE, GENDER, STATE AND CATEGORY")
+    print("="*100)
+
+    cube = demographic_cube(sales_df)
+    print(f"\nOK Cube built: {len(cube):,} occupied cells from {len(sales_df):,} transactions")
+
+    print(f"\n  Revenue by age band and gender:\n")
+    print("-" * 100)
+    by_age = add_ratios(rollup(cube, ['age_band', 'gender']))
+    total = by_age['revenue'].sum()
+    for row in by_age.itertuples(index=False):
+        print(f"  {row.age_band:10s} {row.gender} | {row.transactions:6,} transactions | "
+              f"Revenue: ${row.revenue:12,.0f} ({row.revenue / total * 100:5.1f}%) | "
+              f"Avg: ${row.avg_revenue:7.2f} | Margin: {row.margin_pct:5.1f}%")
+    print("-" * 100)
+
+    top_states = rollup(cube, ['state']).nlargest(5, 'revenue')
+    print(f"\n  Top states by revenue: " +
+          ", ".join(f"{row.state} (${row.revenue:,.0f})" for row in top_states.itertuples(index=False)))
+    return cube
+
+
 # ========================================================================================================
 # PART 4: INTEGRATED ANALYSIS - SEARCH VS PURCHASE BEHAVIOR
 # ========================================================================================================
@@ -710,13 +1421,14 @@ def compare_search_vs_purchase(master_df, monthly_purchase_summary):
         monthly_purchase_summary['purchase_type'] == 'Little Luxury'
     ][['year_month', 'total_spending', 'transaction_count']].copy()
     luxury_purchases.columns = ['date', 'luxury_spending', 'luxury_transactions']
+    luxury_monthly = resample(luxury_purchases, 'date', {'luxury_spending': 'sum', 'luxury_transactions': 'sum'})
 
     # Get relevant search scores
     search_cols = ['date', 'cci'] + [col for col in master_df.columns if col.endswith('_score')]
-    search_data = master_df[search_cols].copy()
+    search_data = master_df[search_cols]
 
-    # Merge
-    comparison_df = search_data.merge(luxury_purchases, on='date', how='left')
+    # Merge (purchases gathered onto the search months by month code)
+    comparison_df = search_data.join(align(luxury_monthly, search_data['date']))
 
     # Analyze correlations
     print(f"\nOK Datasets merged: {comparison_df['luxury_spending'].notna().sum()} overlapping months")
@@ -728,38 +1440,131 @@ def compare_search_vs_purchase(master_df, monthly_purchase_summary):
         print(f"\n  Correlation Analysis (n={len(overlap_df)} months):\n")
         print("-" * 100)
 
+        # Every correlation below from one pass of sufficient statistics
+        score_cols = [col for col in search_cols[2:] if col in overlap_df.columns]  # Skip date and cci
+        pairs = [('cci', 'luxury_spending'), ('cci', 'luxury_transactions')] + \
+                [(col, 'luxury_spending') for col in score_cols]
+        fits = accumulate(overlap_df, pairs).finalize()
+
         # Luxury spending vs CCI
-        corr_cci, p_cci = stats.pearsonr(overlap_df['cci'], overlap_df['luxury_spending'])
+        corr_cci, p_cci = fits.loc[0, 'r'], fits.loc[0, 'p_value']
         print(f"  Luxury Spending vs CCI:         r={corr_cci:6.3f}, p={p_cci:.4f} {'OK Sig' if p_cci < 0.05 else 'X NS'}")
 
         # Luxury transactions vs CCI
-        corr_trans, p_trans = stats.pearsonr(overlap_df['cci'], overlap_df['luxury_transactions'])
+        corr_trans, p_trans = fits.loc[1, 'r'], fits.loc[1, 'p_value']
         print(f"  Luxury Transactions vs CCI:     r={corr_trans:6.3f}, p={p_trans:.4f} {'OK Sig' if p_trans < 0.05 else 'X NS'}")
 
         print("\n  Top Search Indicators vs Luxury Spending:")
-        for col in search_cols[2:]:  # Skip date and cci
-            if col in overlap_df.columns:
-                valid_data = overlap_df[[col, 'luxury_spending']].dropna()
-                if len(valid_data) > 10:
-                    corr, p = stats.pearsonr(valid_data[col], valid_data['luxury_spending'])
-                    indicator_name = col.replace('_score', '')
-                    print(f"    - {indicator_name:25s} r={corr:6.3f}, p={p:.4f} {'OK' if p < 0.05 else 'X'}")
+        for fit in fits.iloc[2:].itertuples(index=False):
+            if fit.n > 10:
+                indicator_name = fit.x.replace('_score', '')
+                print(f"    - {indicator_name:25s} r={fit.r:6.3f}, p={fit.p_value:.4f} {'OK' if fit.p_value < 0.05 else 'X'}")
 
         print("-" * 100)
 
     return comparison_df
 
 
+# ========================================================================================================
+# PART 4B: PREDICTOR SUBSET SEARCH
+# ========================================================================================================
+
+PREDICTION_RESPONSES = ['cci', 'unemployment_rate']
+
+
+def prediction_frame(master_df, beauty_census_df=None, fashion_census_df=None):
+    """Latent scores and responses by month, with Census sales joined when that stage ran"""
+    score_cols = [col for col in master_df.columns if col.endswith('_score')]
+    frame = master_df[['date'] + PREDICTION_RESPONSES + score_cols].copy()
+    frame['date'] = pd.to_datetime(frame['date'])
+    for census, sales_col in [(beauty_census_df, 'beauty_sales'), (fashion_census_df, 'fashion_sales')]:
+        if census is not None:
+            monthly = resample(census, 'observation_date', {sales_col: 'mean'})
+            frame[sales_col] = align(monthly, frame['date'])[sales_col]
+    return frame.sort_values('date').reset_index(drop=True)
+
+
+def search_predictor_subsets(prediction_df, max_size=5, n_folds=5, n_workers=None):
+    """Forward stepwise, LASSO and best-subset search over the latent scores per response"""
+    print("\n" + "="*100)
+    print("PART 4B: PREDICTOR SUBSET SEARCH - WHICH SCORES FORECAST CCI, UNEMPLOYMENT AND SALES?")
+    print("="*100)
+
+    score_cols = [col for col in prediction_df.columns if col.endswith('_score')]
+    responses = [col for col in PREDICTION_RESPONSES + ['beauty_sales', 'fashion_sales']
+                 if col in prediction_df.columns and prediction_df[col].notna().sum() > 2 * n_folds]
+    if not score_cols or not responses:
+        print("\nX No scores or responses to search")
+        return None
+
+    print(f"\n  {len(score_cols)} candidate scores, {len(responses)} responses, "
+          f"blocked {n_folds}-fold time-series cross-validation")
+    search_df = search_predictors(prediction_df, responses, score_cols, max_size=max_size,
+                                  n_folds=n_folds, n_workers=n_workers)
+
+    print("\n  Best subset size by CV RMSE:\n")
+    print("-" * 100)
+    for (response, method), group in search_df.groupby(['Response', 'Method'], sort=False):
+        best = group.loc[group['CV_RMSE'].idxmin()]
+        print(f"  {response:20s} {method:12s} size {best['Size']}: CV RMSE={best['CV_RMSE']:10.4f}, "
+              f"R²={best['Train_R²']:.3f}  ({best['Predictors'].replace('_score', '')})")
+    print("-" * 100)
+    return search_df
+
+
+def backtest_nowcasts(master_df, google_trends_df, indicators_dict, seasonal=False, min_train=36, n_workers=None):
+    """Walk-forward CCI / unemployment nowcasts from each indicator, refit every month on past data only"""
+    print("\n" + "="*100)
+    print("PART 4C: WALK-FORWARD BACKTEST - OUT-OF-SAMPLE NOWCASTS")
+    print("="*100)
+
+    score_cols = [col for col in master_df.columns if col.endswith('_score')]
+    responses = [col for col in PREDICTION_RESPONSES if col in master_df.columns]
+    if not score_cols or not responses:
+        print("\nX No scores or responses to backtest")
+        return None, None
+
+    # The full-sample scores in master_df were fitted on every month; re-score on past data only
+    start = time.perf_counter()
+    scores = real_time_scores(google_trends_df, indicators_dict, min_train=min_train,
+                              seasonal_terms=search_term_columns(google_trends_df) if seasonal else None)
+    master_df = master_df.assign(**{col: scores[col] for col in score_cols if col in scores.columns})
+    print(f"\nOK Scores re-fitted on each training window ({len(google_trends_df) - min_train} windows, "
+          f"{time.perf_counter() - start:.1f}s): "
+          f"{'seasonal factors, ' if seasonal else ''}term means/stds and loadings use earlier months only")
+    print("  Indicator groups are held fixed (with --auto-indicators they were clustered on the full sample)")
+
+    print(f"\n  Expanding window from {min_train} months; each model updated by recursive least squares")
+    nowcasts, summary = run_backtest(master_df, responses, score_cols, min_train=min_train,
+                                     n_workers=n_workers)
+
+    print("\n  Models beating AR(1) out of sample (relative RMSE < 1):\n")
+    print("-" * 100)
+    for response, group in summary.groupby('Response', sort=False):
+        ar1 = group[group['Model'] == 'AR(1)'].iloc[0]
+        better = group[group['Relative_RMSE_vs_AR1'] < 1].sort_values('Relative_RMSE_vs_AR1')
+        print(f"  {response} (AR(1) RMSE={ar1['RMSE']:.4f}, {ar1['N_forecasts']} months): "
+              f"{len(better)}/{len(group) - 1} models")
+        for fit in better.head(5).itertuples(index=False):
+            print(f"    OK {fit.Model:40s} relative RMSE={fit.Relative_RMSE_vs_AR1:.3f}")
+    print("-" * 100)
+    return nowcasts, summary
+
+
 # ========================================================================================================
 # PART 5: VISUALIZATIONS
 # ========================================================================================================
 
-def create_visualizations(master_df, search_results, retail_df, comparison_df):
+def create_visualizations(master_df, search_results, retail_df, comparison_df, writer=None):
     """Create comprehensive visualizations with plasma colormap and fashion/recession theming"""
     print("\n" + "="*100)
     print("PART 5: GENERATING VISUALIZATIONS")
     print("="*100)
 
+    # Figures whose inputs are unchanged since the last run are not re-rendered to disk
+    if writer is None:
+        writer = OutputWriter()
+
     # Set style for all plots
     plt.style.use('seaborn-v0_8-darkgrid')
 
@@ -785,19 +1590,21 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
     ax.grid(axis='x', alpha=0.4, linestyle='--')
 
     # Add significance markers with better formatting
+    sig_markers = significance_level(search_results_sorted['P-value'])
     for i, (idx, row) in enumerate(search_results_sorted.iterrows()):
-        sig_marker = "***" if row['P-value'] < 0.001 else "**" if row['P-value'] < 0.01 else "*" if row['P-value'] < 0.05 else "ns"
-        text = f"R²={row['R²']*100:.1f}% {sig_marker}"
+        text = f"R²={row['R²']*100:.1f}% {sig_markers[idx]}"
         ax.text(row['R²'] * 100 + 0.5, i, text, va='center', fontsize=11, fontweight='bold')
 
     # Add legend for significance levels
-    ax.text(0.98, 0.02, '*** p<0.001  ** p<0.01  * p<0.05  ns = not significant',
+    ax.text(0.98, 0.02, SIGNIFICANCE_LEGEND,
             transform=ax.transAxes, fontsize=10, ha='right', va='bottom',
             bbox=dict(boxstyle='round', facecolor='white', alpha=0.8, edgecolor='black'))
 
     plt.tight_layout()
-    plt.savefig('Viz/search_indicators_ranking.png', dpi=300, bbox_inches='tight', facecolor='white')
-    print("  OK Saved: Viz/search_indicators_ranking.png")
+    saved = writer.save_figure(fig, 'Viz/search_indicators_ranking.png',
+                               spec=(search_results_sorted[['Indicator', 'R²', 'P-value']],),
+                               dpi=300, bbox_inches='tight', facecolor='white')
+    print(f"  OK {'Saved' if saved else 'Unchanged'}: Viz/search_indicators_ranking.png")
     plt.close()
 
     # 2. Temporal Trends - Search vs Economic Indicators
@@ -851,8 +1658,11 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
                   title='Economic Crises', title_fontsize=12)
 
     plt.tight_layout()
-    plt.savefig('Viz/temporal_trends.png', dpi=300, bbox_inches='tight', facecolor='white')
-    print("  OK Saved: Viz/temporal_trends.png")
+    trend_cols = [c for c in ['date', 'cci', 'unemployment_rate', 'period', f'{top_indicator}_score']
+                  if c in master_df.columns]
+    saved = writer.save_figure(fig, 'Viz/temporal_trends.png', spec=(master_df[trend_cols], top_indicator),
+                               dpi=300, bbox_inches='tight', facecolor='white')
+    print(f"  OK {'Saved' if saved else 'Unchanged'}: Viz/temporal_trends.png")
     plt.close()
 
     # 3. Purchase Behavior - Category Distribution
@@ -892,15 +1702,17 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
         axes[1].xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
 
         plt.tight_layout()
-        plt.savefig('Viz/purchase_behavior_analysis.png', dpi=300, bbox_inches='tight', facecolor='white')
-        print("  OK Saved: Viz/purchase_behavior_analysis.png")
+        saved = writer.save_figure(fig, 'Viz/purchase_behavior_analysis.png',
+                                   spec=(purchase_summary, luxury_cats),
+                                   dpi=300, bbox_inches='tight', facecolor='white')
+        print(f"  OK {'Saved' if saved else 'Unchanged'}: Viz/purchase_behavior_analysis.png")
         plt.close()
 
-    # 4. Search vs Purchase Comparison
-    print("-> Creating search vs purchase comparison...")
-    overlap_df = comparison_df.dropna(subset=['luxury_spending'])
+    # 4. Search vs Purchase Comparison (only when the compare stage ran)
+    overlap_df = comparison_df.dropna(subset=['luxury_spending']) if comparison_df is not None else None
 
-    if len(overlap_df) > 10:
+    if overlap_df is not None and len(overlap_df) > 10:
+        print("-> Creating search vs purchase comparison...")
         fig, axes = plt.subplots(2, 1, figsize=(16, 11))
 
         # Normalize for dual axis
@@ -936,7 +1748,7 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
                     linestyle='--', linewidth=3, alpha=0.8, label='Trend Line')
 
         corr, p_val = stats.pearsonr(overlap_df['cci'], overlap_df['luxury_spending'])
-        sig_text = "***" if p_val < 0.001 else "**" if p_val < 0.01 else "*" if p_val < 0.05 else "ns"
+        sig_text = significance_level(p_val)
         axes[1].text(0.05, 0.95, f'Correlation: r = {corr:.3f}\np-value = {p_val:.4f} {sig_text}',
                     transform=axes[1].transAxes, fontsize=13, verticalalignment='top', fontweight='bold',
                     bbox=dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='black', linewidth=2))
@@ -952,8 +1764,10 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
         axes[1].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
 
         plt.tight_layout()
-        plt.savefig('Viz/search_vs_purchase_comparison.png', dpi=300, bbox_inches='tight', facecolor='white')
-        print("  OK Saved: Viz/search_vs_purchase_comparison.png")
+        saved = writer.save_figure(fig, 'Viz/search_vs_purchase_comparison.png',
+                                   spec=(overlap_df[['date', 'cci', 'luxury_spending']],),
+                                   dpi=300, bbox_inches='tight', facecolor='white')
+        print(f"  OK {'Saved' if saved else 'Unchanged'}: Viz/search_vs_purchase_comparison.png")
         plt.close()
 
     print("\nOK All visualizations created successfully!")
@@ -963,21 +1777,8 @@ def create_visualizations(master_df, search_results, retail_df, comparison_df):
 # PART 6: TABLEAU DATA EXPORT
 # ========================================================================================================
 
-def export_tableau_data(master_df, search_results, retail_df, monthly_purchase_summary,
-                       price_analysis, comparison_df, census_results=None, census_period_df=None,
-                       beauty_census_df=None, fashion_census_df=None):
-    """Export comprehensive datasets for Tableau"""
-    print("\n" + "="*100)
-    print("PART 6: EXPORTING TABLEAU-READY DATASETS")
-    print("="*100)
-
-    # 1. Main time series data
-    tableau_main = master_df.copy()
-    print(f"\n-> Tableau Main Data: {len(tableau_main)} rows × {len(tableau_main.columns)} columns")
-    tableau_main.to_csv('Tableau_Data/tableau_main_data_final.csv', index=False)
-    print("  OK Saved: Tableau_Data/tableau_main_data_final.csv")
-
-    # 2. Search results summary
+def tag_search_results(search_results):
+    """Add the Tableau Category / Data_Type columns to the search results (in place)"""
     search_results['Category'] = search_results['Indicator'].map({
         'Indie Sleaze': 'Fashion',
         'Lipstick Index': 'Beauty & Cosmetics',
@@ -989,21 +1790,67 @@ def export_tableau_data(master_df, search_results, retail_df, monthly_purchase_s
         'Mini Skirts': 'Fashion'
     })
     search_results['Data_Type'] = 'Search Behavior'
-    print(f"\n-> Search Results: {len(search_results)} indicators")
-    search_results.to_csv('Tableau_Data/tableau_search_results.csv', index=False)
-    print("  OK Saved: Tableau_Data/tableau_search_results.csv")
+    return search_results
+
+
+def census_timeseries_frame(beauty_census_df, fashion_census_df):
+    """Long-form Census time series: beauty and fashion sales stacked with a category column"""
+    # Combine beauty and fashion data for time series visualization (constant-dollar and
+    # seasonally adjusted sales when present; 'sales' stays the published NSA series)
+    frames = []
+    for df, sales_col, category in [(beauty_census_df, 'beauty_sales', 'Beauty & Personal Care'),
+                                    (fashion_census_df, 'fashion_sales', 'Women\'s Clothing')]:
+        sales = {sales_col: 'sales'}
+        if f'{sales_col}_nsa' in df.columns:
+            sales = {f'{sales_col}_nsa': 'sales', sales_col: 'sales_sa'}
+        extra = [col for col in ['sales_real', 'sales_real_sa'] if col in df.columns]
+        ts = df[['observation_date', *sales, 'cci', 'CPILFESL', *extra]].rename(columns={**sales, 'CPILFESL': 'cpi'})
+        ts['category'] = category
+        frames.append(ts)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_tableau_data(master_df, search_results, retail_df, monthly_purchase_summary,
+                       price_analysis, comparison_df, census_results=None, census_period_df=None,
+                       beauty_census_df=None, fashion_census_df=None, writer=None, context=None,
+                       purchase_cube=None):
+    """Export comprehensive datasets for Tableau (and hand derived frames to the viz context)"""
+    print("\n" + "="*100)
+    print("PART 6: EXPORTING TABLEAU-READY DATASETS")
+    print("="*100)
+
+    # Writes are queued on the writer's thread pool; a private writer is flushed before returning
+    owns_writer = writer is None
+    if owns_writer:
+        writer = OutputWriter()
+
+    # 1. Main time series data
+    if master_df is not None:
+        # Exports only read the frame, so no defensive copy
+        tableau_main = master_df
+        print(f"\n-> Tableau Main Data: {len(tableau_main)} rows × {len(tableau_main.columns)} columns")
+        writer.write(tableau_main, 'Tableau_Data/tableau_main_data_final.csv', partition_cols=['year'])
+        print("  OK Saved: Tableau_Data/tableau_main_data_final.csv")
+
+    # 2. Search results summary
+    if search_results is not None:
+        tag_search_results(search_results)
+        print(f"\n-> Search Results: {len(search_results)} indicators")
+        writer.write(search_results, 'Tableau_Data/tableau_search_results.csv')
+        print("  OK Saved: Tableau_Data/tableau_search_results.csv")
 
     # 3. Purchase behavior summary
     if retail_df is not None and monthly_purchase_summary is not None:
         monthly_purchase_summary['Data_Type'] = 'Purchase Behavior'
         print(f"\n-> Purchase Summary: {len(monthly_purchase_summary)} month-category combinations")
-        monthly_purchase_summary.to_csv('Tableau_Data/tableau_purchase_summary.csv', index=False)
+        writer.write(monthly_purchase_summary, 'Tableau_Data/tableau_purchase_summary.csv')
         print("  OK Saved: Tableau_Data/tableau_purchase_summary.csv")
 
         # 4. Price analysis
         price_analysis['Data_Type'] = 'Price Analysis'
         print(f"\n-> Price Analysis: {len(price_analysis)} price ranges")
-        price_analysis.to_csv('Tableau_Data/tableau_price_analysis.csv', index=False)
+        writer.write(price_analysis, 'Tableau_Data/tableau_price_analysis.csv')
         print("  OK Saved: Tableau_Data/tableau_price_analysis.csv")
 
     # 5. Comparison dataset (search vs purchase)
@@ -1011,53 +1858,54 @@ def export_tableau_data(master_df, search_results, retail_df, monthly_purchase_s
         comparison_export = comparison_df.dropna(subset=['luxury_spending'])
         if len(comparison_export) > 0:
             print(f"\n-> Search vs Purchase Comparison: {len(comparison_export)} overlapping months")
-            comparison_export.to_csv('Tableau_Data/tableau_search_vs_purchase.csv', index=False)
+            writer.write(comparison_export, 'Tableau_Data/tableau_search_vs_purchase.csv')
             print("  OK Saved: Tableau_Data/tableau_search_vs_purchase.csv")
 
     # 6. Category analysis by period
     if retail_df is not None:
-        retail_df_copy = retail_df.copy()
-        retail_df_copy['year'] = retail_df_copy['Transaction Date'].dt.year
-        retail_df_copy['quarter'] = retail_df_copy['Transaction Date'].dt.quarter
-
-        category_period = retail_df_copy.groupby(['year', 'quarter', 'luxury_category']).agg({
-            'Total Spent': ['sum', 'mean', 'count'],
-            'Customer ID': 'nunique'
-        }).reset_index()
-        category_period.columns = ['year', 'quarter', 'luxury_category', 'total_spent',
-                                   'avg_spent', 'transaction_count', 'unique_customers']
+        if purchase_cube is None:
+            purchase_cube = build_purchase_cube(retail_df)
+        category_period = purchase_slice(purchase_cube, ['year', 'quarter', 'luxury_category'],
+                                         ['year', 'quarter', 'luxury_category', 'total_spent',
+                                          'transaction_count', 'avg_spent', 'unique_customers'])
+        category_period = category_period[['year', 'quarter', 'luxury_category', 'total_spent',
+                                           'avg_spent', 'transaction_count', 'unique_customers']]
 
         print(f"\n-> Category by Period: {len(category_period)} year-quarter-category combinations")
-        category_period.to_csv('Tableau_Data/tableau_category_by_period.csv', index=False)
+        writer.write(category_period, 'Tableau_Data/tableau_category_by_period.csv')
         print("  OK Saved: Tableau_Data/tableau_category_by_period.csv")
 
+        # All precomputed grouping sets in one file (slices at any grain without a rescan)
+        grouping_sets = purchase_cube.grouping_sets(PURCHASE_GROUPING_SETS)
+        print(f"\n-> Purchase Cube: {len(grouping_sets)} rows over {len(PURCHASE_GROUPING_SETS)} grouping sets")
+        writer.write(grouping_sets, 'Tableau_Data/tableau_purchase_cube.csv')
+        print("  OK Saved: Tableau_Data/tableau_purchase_cube.csv")
+
     # 7. Census retail sales data
     if census_results is not None:
         print(f"\n-> Census Retail Sales Results: {len(census_results)} categories")
-        census_results.to_csv('Tableau_Data/tableau_census_results.csv', index=False)
+        writer.write(census_results, 'Tableau_Data/tableau_census_results.csv')
         print("  OK Saved: Tableau_Data/tableau_census_results.csv")
 
     if census_period_df is not None:
         print(f"\n-> Census Recession Period Analysis: {len(census_period_df)} periods")
-        census_period_df.to_csv('Tableau_Data/tableau_census_recession_analysis.csv', index=False)
+        writer.write(census_period_df, 'Tableau_Data/tableau_census_recession_analysis.csv')
         print("  OK Saved: Tableau_Data/tableau_census_recession_analysis.csv")
 
     # 8. Long-form Census time series data
     if beauty_census_df is not None and fashion_census_df is not None:
-        # Combine beauty and fashion data for time series visualization
-        beauty_ts = beauty_census_df[['observation_date', 'beauty_sales', 'cci', 'CPILFESL']].copy()
-        beauty_ts['category'] = 'Beauty & Personal Care'
-        beauty_ts = beauty_ts.rename(columns={'beauty_sales': 'sales', 'CPILFESL': 'cpi'})
-
-        fashion_ts = fashion_census_df[['observation_date', 'fashion_sales', 'cci', 'CPILFESL']].copy()
-        fashion_ts['category'] = 'Women\'s Clothing'
-        fashion_ts = fashion_ts.rename(columns={'fashion_sales': 'sales', 'CPILFESL': 'cpi'})
-
-        census_timeseries = pd.concat([beauty_ts, fashion_ts], ignore_index=True)
+        census_timeseries = census_timeseries_frame(beauty_census_df, fashion_census_df)
         print(f"\n-> Census Time Series (1992-2025): {len(census_timeseries)} month-category observations")
-        census_timeseries.to_csv('Tableau_Data/tableau_census_timeseries.csv', index=False)
+        writer.write(census_timeseries, 'Tableau_Data/tableau_census_timeseries.csv', partition_cols=['category'])
         print("  OK Saved: Tableau_Data/tableau_census_timeseries.csv")
 
+        if context is not None:
+            context.put('census_timeseries', census_timeseries)
+            context.put('census_wide', census_wide_frame(census_timeseries))
+
+    if owns_writer:
+        writer.close()
+
     print("\nOK All Tableau datasets exported successfully!")
     print("\n TABLEAU DASHBOARD STRUCTURE:")
     print("  Dashboard 1 - Temporal Trends: Use Tableau_Data/tableau_main_data_final.csv")
@@ -1067,21 +1915,399 @@ def export_tableau_data(master_df, search_results, retail_df, monthly_purchase_s
     print("  Dashboard 5 - Census Retail Sales (33-year): Use Tableau_Data/tableau_census_timeseries.csv + tableau_census_results.csv")
 
 
+def print_output_report(output_report, output_formats):
+    """Print which outputs were written, linked to an identical export, or skipped as unchanged"""
+    print("\n" + "-" * 100)
+    print("OUTPUT REPORT")
+    print("-" * 100)
+
+    counts = output_report['action'].value_counts()
+    print(f"\nOK {len(output_report)} outputs ({', '.join(output_formats)} + figures): "
+          f"{counts.get('written', 0)} written, "
+          f"{counts.get('linked', 0) + counts.get('copied', 0)} linked to identical exports, "
+          f"{counts.get('skipped', 0)} skipped (unchanged)"
+          + (f", {counts['appended']} appended" if 'appended' in counts else ""))
+    print(f"  Bytes written: {output_report.loc[output_report['action'] == 'written', 'bytes'].sum() / 1e6:.1f} MB")
+
+    for action in ['written', 'appended', 'linked', 'copied', 'skipped']:
+        rows = output_report[output_report['action'] == action].sort_values('path')
+        if len(rows) == 0:
+            continue
+        print(f"\n  {action.capitalize()}:")
+        for _, row in rows.iterrows():
+            source = f" -> {row['source']}" if isinstance(row['source'], str) else ""
+            print(f"    - {row['path']}{source}")
+
+
+# ========================================================================================================
+# INCREMENTAL MONTHLY UPDATES
+# ========================================================================================================
+
+# Outputs that incremental runs extend row by row
+APPENDED_OUTPUTS = {
+    'search': ['Processed_Data/master_dataset_complete.csv', 'Tableau_Data/tableau_main_data_final.csv'],
+    'census': ['Tableau_Data/tableau_census_timeseries.csv'],
+}
+
+
+def deflation_state(config, price_index):
+    """CPI settings and fingerprint the *_real columns were computed with (None when they stayed nominal)"""
+    if price_index is None:
+        return None
+    return {'cpi_series': config.cpi_series, 'deflation_base': config.deflation_base,
+            'base_period': price_index.base_period,
+            'source': source_state(price_index.frame(), 'observation_date')}
+
+
+def deflation_changed(stored, config, price_index):
+    """Why new *_real rows would not be in the stored rows' dollars (None if they would)"""
+    current = deflation_state(config, price_index)
+    if (stored is None) != (current is None):
+        return 'deflation switched on or off'
+    if stored is None:
+        return None
+    for key, label in [('cpi_series', 'CPI series'), ('deflation_base', 'deflation base'),
+                       ('base_period', 'base period')]:
+        if stored[key] != current[key]:
+            return f"{label} changed ({stored[key]} -> {current[key]})"
+    if not is_unchanged(price_index.frame(), 'observation_date', stored['source']):
+        return f"{price_index.series} history revised"
+    return None
+
+
+def build_incremental_state(raw_sources, master_df, scores_df, loadings_df, beauty_census_df,
+                            fashion_census_df, seasonal_factors=None, deflation=None):
+    """
+    What a later --incremental run needs: processed-through dates, factor
+    model, regression statistics, the seasonal factors new months are
+    adjusted with and the CPI settings their *_real columns must match.
+    """
+    seasonal_factors = seasonal_factors or {}
+    state = {'sources': {}, 'seasonal': {}}
+    if master_df is not None or beauty_census_df is not None:
+        state['deflation'] = deflation
+    if master_df is not None:
+        state['sources']['google_trends'] = source_state(raw_sources['google_trends'], 'date')
+        state['sources']['fred'] = {name: source_state(df, 'observation_date')
+                                    for name, df in raw_sources['fred'].items()}
+        state['master'] = {'last_date': str(master_df['date'].max().date()),
+                           'columns': [str(col) for col in master_df.columns],
+                           'base_cpi': float(master_df['cpi'].iloc[0])}
+        state['search'] = {
+            'loadings': loadings_df.to_dict(orient='records'),
+            'statistics': accumulate(scores_df, [(col, 'cci') for col in scores_df.columns
+                                                 if col.endswith('_score')]).to_dict(),
+        }
+        for name in ['master', 'search']:
+            if name in seasonal_factors:
+                state['seasonal'][name] = seasonal_factors[name].to_dict()
+    if beauty_census_df is not None:
+        state['sources']['census'] = source_state(raw_sources['census'], 'observation_date')
+        state['census'] = {'statistics': {key: census_stats.to_dict() for key, census_stats
+                                          in census_statistics(beauty_census_df, fashion_census_df).items()}}
+        if 'census' in seasonal_factors:
+            state['seasonal']['census'] = seasonal_factors['census'].to_dict()
+    return state
+
+
+def find_revisions(state, stages, google_trends_df, fred_data, census_df):
+    """Sources whose already-processed history changed (any of them forces a full run)"""
+    sources = state['sources']
+    revised = []
+    if 'search' in stages:
+        if not is_unchanged(google_trends_df, 'date', sources['google_trends']):
+            revised.append('Google Trends')
+        if set(fred_data) != set(sources['fred']):
+            revised.append('FRED (series added or missing)')
+        master_last = pd.Timestamp(state['master']['last_date'])
+        for name, df in fred_data.items():
+            entry = sources['fred'].get(name)
+            if entry is None:
+                continue
+            if not is_unchanged(df, 'observation_date', entry):
+                revised.append(name)
+            elif (appended_rows(df, 'observation_date', entry)['observation_date'] <= master_last).any():
+                revised.append(f"{name} (fills months already in the master dataset)")
+    if 'census' in stages:
+        if census_df is None or not is_unchanged(census_df, 'observation_date', sources['census']):
+            revised.append('Census retail sales')
+    return revised
+
+
+def run_incremental(config, state, force_write=False):
+    """
+    Monthly refresh: process only the months released since the last run.
+
+    New Trends months are scored with the stored factor model and folded into
+    the stored regression statistics; master rows are built from the new months
+    (plus 12 months of lookback for year-over-year rates) and appended to the
+    exports, as are new Census months. Returns the timings, or None when a
+    full run is needed instead (no state yet, or a source's history was revised).
+    """
+    print("\n" + "="*100)
+    print("INCREMENTAL UPDATE: APPENDING NEWLY RELEASED MONTHS")
+    print("="*100)
+
+    if state is None:
+        print("\nX No incremental state from a previous run - running the full analysis")
+        return None
+    stages = [stage for stage in ['search', 'census'] if stage in config.stages and stage in state]
+    if not stages:
+        print("\nX The last run saved no state for the selected stages - running the full analysis")
+        return None
+    # New months are adjusted with the stored factors, so the setting must match the last run's
+    seasonal_state = state.get('seasonal', {})
+    frames = {'search': 'master', 'census': 'census'}
+    if any((frames[stage] in seasonal_state) != ('seasonal' in config.stages) for stage in stages):
+        print("\nX Seasonal adjustment was switched on or off since the last run - running the full analysis")
+        return None
+
+    timings = {}
+    start = time.perf_counter()
+    writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                          manifest_path=config.manifest, force=force_write, root=config.output_dir)
+    appended = [path for stage in stages for path in APPENDED_OUTPUTS[stage]]
+    if 'search' in stages and 'search' in seasonal_state:
+        appended.append('Processed_Data/search_terms_seasonally_adjusted.csv')
+    missing = writer.missing_outputs(appended)
+    if missing:
+        print(f"\nX Outputs to append to are missing ({', '.join(map(os.path.basename, missing))}) "
+              f"- running the full analysis")
+        writer.close()
+        return None
+
+    inputs = InputReader(max_workers=config.io_workers)
+    prefetch_inputs(inputs, config, stages)
+    google_trends_df = fred_data = census_df = None
+    if 'search' in stages:
+        google_trends_df = load_google_trends_data(config.data_dir, inputs=inputs)
+        fred_data = load_fred_data(config.data_dir, inputs=inputs)
+    if 'census' in stages:
+        census_df = load_census_retail_sales(config.census_file, inputs=inputs)
+    price_index = load_deflator(config, inputs)
+    inputs.close()
+    timings['load'] = time.perf_counter() - start
+
+    revised = find_revisions(state, stages, google_trends_df, fred_data, census_df)
+    if revised:
+        print(f"\nX History revised in: {', '.join(revised)} - running the full analysis")
+        writer.close()
+        return None
+    # Appended *_real rows must be in the same constant dollars as the rows already exported
+    if 'deflation' not in state:
+        changed = 'no deflation settings stored'
+    else:
+        changed = deflation_changed(state['deflation'], config, price_index)
+    if changed:
+        print(f"\nX Real-dollar series: {changed} - running the full analysis")
+        writer.close()
+        return None
+    _, census_df, _ = deflate_frames(price_index, census_df=census_df)
+    if census_df is not None and 'census' in seasonal_state:
+        census_df = apply_seasonal('census', census_df, SeasonalFactors.from_dict(seasonal_state['census']))
+    # The factor model was fit on adjusted search terms, so new months are scored the same way
+    search_factors = SeasonalFactors.from_dict(seasonal_state['search']) if 'search' in seasonal_state else None
+
+    print("\n" + "-" * 100)
+    print("NEW MONTHS")
+    print("-" * 100)
+
+    sources = state['sources']
+    if 'search' in stages:
+        start = time.perf_counter()
+        loadings_df = pd.DataFrame(state['search']['loadings'])
+        search_stats = PairAccumulator.from_dict(state['search']['statistics'])
+
+        # Search regressions: score only the new Trends months and fold them into the statistics
+        new_trends = appended_rows(google_trends_df, 'date', sources['google_trends'])
+        if search_factors is not None:
+            new_trends = adjust_search_terms(new_trends, search_factors)
+        if len(new_trends) > 0:
+            new_scores = score_latent_variables(new_trends, loadings_df)
+            search_stats.update(new_scores.assign(cci=new_trends['cci']))
+            state['search']['statistics'] = search_stats.to_dict()
+            search_results = tag_search_results(search_results_table(search_stats))
+            writer.write(search_results, 'Tableau_Data/tableau_search_results.csv')
+            writer.write(search_results, 'Processed_Data/search_indicators_results_final.csv')
+            if search_factors is not None:
+                writer.append(new_trends, 'Processed_Data/search_terms_seasonally_adjusted.csv')
+            sources['google_trends'] = source_state(google_trends_df, 'date')
+            print(f"\nOK Google Trends: {len(new_trends)} new months scored "
+                  f"({new_trends['date'].min().strftime('%Y-%m')} to {new_trends['date'].max().strftime('%Y-%m')})")
+            print(f"  Search regressions updated from stored statistics (N = {int(search_stats.n.max())} months)")
+        else:
+            print("\n  Google Trends: no new months")
+
+        # Master rows: Trends months up to the latest month every FRED series has reached
+        master_last = pd.Timestamp(state['master']['last_date'])
+        fred_through = min(last_period(df['observation_date']) for df in fred_data.values())
+        dates = google_trends_df['date']
+        new_positions = np.flatnonzero(((dates > master_last) & (dates <= fred_through)).to_numpy())
+        if len(new_positions) > 0:
+            window = google_trends_df.iloc[max(new_positions[0] - 12, 0):new_positions[-1] + 1]
+            window = window.reset_index(drop=True)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                window_master = integrate_all_data(window, fred_data, base_cpi=state['master']['base_cpi'])
+                window_master, _, _ = deflate_frames(price_index, master_df=window_master)
+                if 'master' in seasonal_state:
+                    window_master = apply_seasonal('master', window_master,
+                                                   SeasonalFactors.from_dict(seasonal_state['master']))
+            scored = adjust_search_terms(window, search_factors) if search_factors is not None else window
+            window_master = window_master.join(score_latent_variables(scored, loadings_df))
+            new_master = window_master.loc[window_master['date'] > master_last, state['master']['columns']]
+
+            for path in APPENDED_OUTPUTS['search']:
+                writer.append(new_master, path, partition_cols=['year'])
+            state['master']['last_date'] = str(new_master['date'].max().date())
+            print(f"\nOK Master dataset: {len(new_master)} months appended (through {state['master']['last_date']})")
+        else:
+            print("\n  Master dataset: no new complete months")
+        waiting = int((dates > max(master_last, fred_through)).sum())
+        if waiting:
+            print(f"  {waiting} Trends month(s) held back until FRED releases them")
+        sources['fred'] = {name: source_state(df, 'observation_date') for name, df in fred_data.items()}
+        timings['search'] = time.perf_counter() - start
+
+    if 'census' in stages:
+        start = time.perf_counter()
+        census_stats = {key: PairAccumulator.from_dict(census_state)
+                        for key, census_state in state['census']['statistics'].items()}
+
+        # Only months with CCI are taken, so later CCI releases never revise appended rows
+        new_census = appended_rows(census_df, 'observation_date', sources['census'])
+        with_cci = new_census.dropna(subset=['USACSCICP02STSAM'])
+        if len(with_cci) > 0:
+            census_through = with_cci['observation_date'].max()
+            new_census = new_census[new_census['observation_date'] <= census_through]
+            beauty_new, fashion_new = split_census_categories(new_census)
+            for key, new_stats in census_statistics(beauty_new, fashion_new).items():
+                census_stats[key].merge(new_stats)
+            state['census']['statistics'] = {key: census_state.to_dict()
+                                             for key, census_state in census_stats.items()}
+
+            census_results = census_results_table(census_stats)
+            writer.write(census_results, 'Tableau_Data/tableau_census_results.csv')
+            writer.write(census_results, 'Processed_Data/census_retail_results.csv')
+            writer.append(census_timeseries_frame(beauty_new, fashion_new),
+                          APPENDED_OUTPUTS['census'][0], partition_cols=['category'])
+            sources['census'] = source_state(census_df, 'observation_date', last_date=census_through)
+            print(f"\nOK Census retail sales: {len(new_census)} new rows (through {sources['census']['last_date']})")
+            print(f"  Census regressions updated from stored statistics")
+        else:
+            print("\n  Census retail sales: no new months with CCI")
+        timings['census'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output_report = writer.close()
+    timings['io_wait'] = time.perf_counter() - start
+    if len(output_report) > 0:
+        print_output_report(output_report, config.output_formats)
+
+    save_state(state, config.state_file)
+    print(f"\nOK Incremental state saved: {config.state_file}")
+    print("  Purchase analysis, comparison, predictor search, seasonal factors and figures were left "
+          "as they are (run without --incremental to refresh them)")
+    return timings
+
+
 # ========================================================================================================
 # MAIN EXECUTION
 # ========================================================================================================
 
-def main():
-    """Main analysis workflow"""
+def main(config=None, force_write=False):
+    """
+    Main analysis workflow.
 
-    # PART 1: Load all data
-    google_trends_df = load_google_trends_data()
-    fred_data = load_fred_data()
-    retail_df = load_retail_transactions()
-    census_df = load_census_retail_sales()
-    master_df = integrate_all_data(google_trends_df, fred_data)
+    config is a PipelineConfig (default: load_config()); its stages select
+    which parts run, and outputs are exported for the stages that ran.
+    Returns the wall-clock seconds spent in each part.
 
-    # PART 2: Search behavior analysis
+    With config.incremental, only the months released since the last run are
+    processed (see run_incremental); it falls back to this full run when needed.
+    """
+    if config is None:
+        config = load_config()
+
+    if config.incremental:
+        timings = run_incremental(config, load_state(config.state_file), force_write)
+        if timings is not None:
+            return timings
+
+    stages = list(config.stages)
+    for stage in list(stages):
+        missing = [req for req in STAGE_REQUIRES.get(stage, []) if req not in stages]
+        if missing:
+            print(f"\nX Skipping stage '{stage}' (needs: {', '.join(missing)})")
+            stages.remove(stage)
+    print(f"\nStages: {', '.join(stages)}")
+    print(f"Config: {config.source or 'built-in defaults'}")
+
+    timings = {}
+    start = time.perf_counter()
+
+    # Background I/O: every input is read concurrently from the start, and outputs are queued on
+    # the writer as soon as a stage produces them; the run only waits for I/O at the very end.
+    # Outputs are content-hashed against the manifest; unchanged files are skipped
+    writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                          manifest_path=config.manifest, force=force_write, root=config.output_dir)
+    inputs = InputReader(max_workers=config.io_workers)
+    prefetch_inputs(inputs, config, stages)
+
+    # PART 1: Load all data
+    google_trends_df = master_df = retail_df = census_df = demographic_sales_df = None
+    full_precision = {}
+    raw_sources = {}  # as loaded, for the incremental state
+    if 'search' in stages:
+        google_trends_df = load_google_trends_data(config.data_dir, inputs=inputs)
+        fred_data = load_fred_data(config.data_dir, inputs=inputs)
+        raw_sources.update(google_trends=google_trends_df, fred=fred_data)
+        if config.compact_numeric:
+            full_precision['google_trends'] = google_trends_df
+            google_trends_df = compact_frame('Google Trends', google_trends_df, exclude=['date'])
+            fred_data = {name: downcast_numeric(df) for name, df in fred_data.items()}
+        master_df = integrate_all_data(google_trends_df, fred_data)
+    if 'purchase' in stages:
+        retail_df = load_retail_transactions(config.data_dir, inputs=inputs)
+        demographic_sales_df = load_demographic_sales(config.data_dir, inputs=inputs)
+    if 'census' in stages:
+        census_df = load_census_retail_sales(config.census_file, inputs=inputs)
+        raw_sources['census'] = census_df
+        if config.compact_numeric and census_df is not None:
+            full_precision['census'] = census_df
+            census_df = compact_frame('Census retail sales', census_df)
+    price_index = None
+    if any(df is not None for df in [master_df, census_df, retail_df]):
+        price_index = load_deflator(config, inputs)
+        master_df, census_df, retail_df = deflate_frames(price_index,
+                                                         master_df, census_df, retail_df)
+    inputs.close()
+    timings['load'] = time.perf_counter() - start
+
+    # PART 1H: Seasonal adjustment (the search and census analyses then see the *_sa columns)
+    seasonal_factors = {}
+    search_sa = None
+    if 'seasonal' in stages and (master_df is not None or census_df is not None):
+        start = time.perf_counter()
+        master_df, census_df, search_sa, seasonal_factors = seasonally_adjust(config, master_df, census_df,
+                                                                              google_trends_df)
+        if 'census' in full_precision:
+            full_census = full_precision['census']
+            full_precision['census'] = apply_seasonal('census', full_census,
+                                                      fit_seasonal('census', full_census, config))
+        if 'google_trends' in full_precision:
+            full_trends = full_precision['google_trends']
+            full_precision['google_trends'] = adjust_search_terms(full_trends,
+                                                                  fit_search_seasonal(full_trends, config))
+        writer.write(seasonal_factors_frame(seasonal_factors), 'Processed_Data/seasonal_factors.csv')
+        print(f"\n-> Queued: Processed_Data/seasonal_factors.csv")
+        if search_sa is not None:
+            writer.write(search_sa, 'Processed_Data/search_terms_seasonally_adjusted.csv')
+            print(f"-> Queued: Processed_Data/search_terms_seasonally_adjusted.csv")
+        timings['seasonal'] = time.perf_counter() - start
+
+    # PART 2: Search behavior analysis (on the adjusted search terms when the seasonal stage ran;
+    # the master dataset keeps the terms as published)
+    search_input = search_sa if search_sa is not None else google_trends_df
     indicators_dict = {
         'Indie Sleaze': ['indiesleaze_skinnyjeans', 'indiesleaze_cheetahprint', 'indiesleaze_furcoat',
                         'indiesleaze_leatherskirt', 'indiesleaze_discopants'],
@@ -1101,20 +2327,90 @@ def main():
                        'mini_microshort', 'mini_micominiskirt']
     }
 
-    scores_df = create_latent_variables(google_trends_df, indicators_dict)
-    master_df = master_df.merge(scores_df[[col for col in scores_df.columns if col.endswith('_score')]],
-                                left_index=True, right_index=True, how='left')
-
-    search_results = analyze_search_correlations(scores_df)
+    search_results = scores_df = loadings_df = None
+    if 'search' in stages:
+        start = time.perf_counter()
+        # Optionally replace the hand-written groups with clusters found in the data
+        if config.auto_indicators:
+            indicators_dict = discover_indicator_groups(search_input)
+
+        scores_df, loadings_df = create_latent_variables(search_input, indicators_dict,
+                                                         n_workers=config.workers)
+        if config.compact_numeric:
+            scores_df = downcast_numeric(scores_df)
+        master_df = master_df.merge(scores_df[[col for col in scores_df.columns if col.endswith('_score')]],
+                                    left_index=True, right_index=True, how='left')
+
+        search_results = analyze_search_correlations(scores_df)
+        multivariate = analyze_multivariate_models(master_df)
+
+        # Later stages read the panel's float series as views of one memory-mapped matrix
+        if config.panel_store:
+            panel = PanelStore.from_frame(master_df, config.panel_dir,
+                                          dtype=np.float32 if config.compact_numeric else np.float64)
+            master_df = panel.attach(master_df)
+            print(f"\nOK Master panel memory-mapped: {panel.shape[0]} months × {panel.shape[1]} series "
+                  f"({panel.nbytes / 1e6:.1f} MB) in {config.panel_dir}")
+
+        # Written in the background while the later stages run (neither frame changes after this)
+        writer.write(master_df, 'Processed_Data/master_dataset_complete.csv', partition_cols=['year'])
+        writer.write(loadings_df, 'Processed_Data/latent_variable_loadings.csv')
+        print(f"\n-> Queued: Processed_Data/master_dataset_complete.csv ({len(master_df)} rows × {len(master_df.columns)} columns)")
+        print(f"-> Queued: Processed_Data/latent_variable_loadings.csv")
+        if multivariate is not None:
+            for key, path in [('coefficients', 'Tableau_Data/tableau_multivariate_coefficients.csv'),
+                              ('models', 'Tableau_Data/tableau_multivariate_models.csv'),
+                              ('vif', 'Processed_Data/multivariate_vif_screening.csv'),
+                              ('increments', 'Processed_Data/indicator_increment_over_controls.csv')]:
+                writer.write(multivariate[key], path)
+                print(f"-> Queued: {path}")
+        timings['search'] = time.perf_counter() - start
 
     # PART 3: Purchase behavior analysis
     monthly_purchase_summary = None
     price_analysis = None
+    purchase_cube = None
 
     if retail_df is not None:
+        start = time.perf_counter()
         retail_df = categorize_little_luxuries(retail_df)
-        monthly_purchase_summary, luxury_ratio = analyze_purchase_patterns(retail_df)
-        price_analysis = analyze_price_points(retail_df)
+        purchase_cube = build_purchase_cube(retail_df)
+        price_histograms = build_price_histograms(retail_df)
+        monthly_purchase_summary, luxury_ratio = analyze_purchase_patterns(retail_df, purchase_cube)
+        price_analysis = analyze_price_points(purchase_cube, price_histograms)
+        price_quantiles, price_histogram_df = price_distribution_frames(price_histograms)
+        daily_df, daily_category_df, calendar_effects_df = analyze_daily_patterns(retail_df)
+        customer_profiles = build_customer_profiles(retail_df)
+        customer_df, customer_yearly_df = analyze_customer_profiles(customer_profiles)
+        cohort_df = analyze_cohorts(retail_df, customer_profiles)
+        basket_pairs_df, basket_segment_pairs_df = analyze_market_baskets(retail_df)
+
+        writer.write(retail_df, 'Processed_Data/retail_transactions_processed.csv',
+                     partition_cols={'year': retail_df['Transaction Date'].dt.year,
+                                     'luxury_category': retail_df['luxury_category']})
+        print(f"\n-> Queued: Processed_Data/retail_transactions_processed.csv")
+        for frame, path in [(price_quantiles, 'Tableau_Data/tableau_price_quantiles.csv'),
+                            (price_histogram_df, 'Tableau_Data/tableau_price_histogram.csv'),
+                            (daily_df, 'Tableau_Data/tableau_daily_luxury_ratio.csv'),
+                            (daily_category_df, 'Tableau_Data/tableau_daily_category_spending.csv'),
+                            (calendar_effects_df, 'Processed_Data/daily_calendar_effects.csv'),
+                            (customer_df, 'Tableau_Data/tableau_customer_profiles.csv'),
+                            (customer_yearly_df, 'Tableau_Data/tableau_customer_profiles_by_year.csv'),
+                            (cohort_df, 'Tableau_Data/tableau_customer_cohorts.csv'),
+                            (basket_pairs_df, 'Tableau_Data/tableau_basket_item_pairs.csv'),
+                            (basket_segment_pairs_df, 'Tableau_Data/tableau_basket_segment_pairs.csv')]:
+            writer.write(frame, path)
+            print(f"-> Queued: {path}")
+        timings['purchase'] = time.perf_counter() - start
+
+    # PART 3E: Demographic segmentation cube
+    if demographic_sales_df is not None:
+        start = time.perf_counter()
+        demographic_cube_df = analyze_demographic_segments(demographic_sales_df)
+        writer.write(demographic_cube_df, 'Tableau_Data/tableau_demographic_cube.csv',
+                     partition_cols={'year': demographic_cube_df['month'].dt.year})
+        print(f"\n-> Queued: Tableau_Data/tableau_demographic_cube.csv")
+        timings['demographics'] = time.perf_counter() - start
 
     # PART 3D: Census retail sales analysis
     census_results = None
@@ -1123,47 +2419,107 @@ def main():
     fashion_census_df = None
 
     if census_df is not None:
+        start = time.perf_counter()
         census_results, census_period_df, beauty_census_df, fashion_census_df = analyze_census_retail_sales(census_df)
 
+        for frame, path in [(census_results, 'Processed_Data/census_retail_results.csv'),
+                            (census_period_df, 'Processed_Data/census_recession_periods.csv')]:
+            if frame is not None:
+                writer.write(frame, path)
+                print(f"-> Queued: {path}")
+        timings['census'] = time.perf_counter() - start
+
+    # Compact mode check: same regressions on the full-precision inputs
+    precision_df = None
+    if config.compact_numeric and config.validate_compact and full_precision:
+        start = time.perf_counter()
+        precision_df = validate_compact_precision(full_precision, indicators_dict, search_results,
+                                                  census_results, n_workers=config.workers)
+        timings['validate'] = time.perf_counter() - start
+
     # PART 4: Compare search vs purchase
     comparison_df = None
-    if retail_df is not None and monthly_purchase_summary is not None:
+    if 'compare' in stages and retail_df is not None and monthly_purchase_summary is not None:
+        start = time.perf_counter()
         comparison_df = compare_search_vs_purchase(master_df, monthly_purchase_summary)
+        timings['compare'] = time.perf_counter() - start
+
+    # PART 4B/4C: Predictor subset search and walk-forward backtest
+    if 'predict' in stages:
+        start = time.perf_counter()
+        predictor_search_df = search_predictor_subsets(
+            prediction_frame(master_df, beauty_census_df, fashion_census_df), n_workers=config.workers)
+        if predictor_search_df is not None:
+            writer.write(predictor_search_df, 'Tableau_Data/tableau_predictor_search.csv')
+            print(f"\n-> Queued: Tableau_Data/tableau_predictor_search.csv")
+
+        nowcasts_df, backtest_summary = backtest_nowcasts(master_df, google_trends_df, indicators_dict,
+                                                          seasonal=search_sa is not None,
+                                                          n_workers=config.workers)
+        if nowcasts_df is not None:
+            for frame, path in [(nowcasts_df, 'Tableau_Data/tableau_backtest_nowcasts.csv'),
+                                (backtest_summary, 'Tableau_Data/tableau_backtest_summary.csv')]:
+                writer.write(frame, path)
+                print(f"-> Queued: {path}")
+        timings['predict'] = time.perf_counter() - start
 
     # PART 5: Create visualizations
-    create_visualizations(master_df, search_results, retail_df, comparison_df)
-
-    # PART 6: Export for Tableau
+    if 'viz' in stages:
+        start = time.perf_counter()
+        create_visualizations(master_df, search_results, retail_df, comparison_df, writer=writer)
+        timings['viz'] = time.perf_counter() - start
+
+    # PART 6: Export for Tableau (identical frames are written once and hard-linked)
+    start = time.perf_counter()
+    # Frames the visualization scripts need are kept in memory instead of re-read from CSV
+    context = get_context()
     export_tableau_data(master_df, search_results, retail_df, monthly_purchase_summary,
                        price_analysis, comparison_df, census_results, census_period_df,
-                       beauty_census_df, fashion_census_df)
+                       beauty_census_df, fashion_census_df, writer=writer, context=context,
+                       purchase_cube=purchase_cube)
 
     # Save master dataset
     print("\n" + "="*100)
     print("SAVING COMPLETE DATASET")
     print("="*100)
-    # Save processed datasets (intermediate outputs)
-    import os
-    os.makedirs('Processed_Data', exist_ok=True)
-    
-    master_df.to_csv('Processed_Data/master_dataset_complete.csv', index=False)
-    print(f"\nOK Master dataset saved: Processed_Data/master_dataset_complete.csv ({len(master_df)} rows × {len(master_df.columns)} columns)")
-
-    search_results.to_csv('Processed_Data/search_indicators_results_final.csv', index=False)
-    print(f"OK Search results saved: Processed_Data/search_indicators_results_final.csv")
-
-    if retail_df is not None:
-        retail_df.to_csv('Processed_Data/retail_transactions_processed.csv', index=False)
-        print(f"OK Retail data saved: Processed_Data/retail_transactions_processed.csv")
-
-    # Save Census results
-    if census_results is not None:
-        census_results.to_csv('Processed_Data/census_retail_results.csv', index=False)
-        print(f"OK Census analysis results saved: Processed_Data/census_retail_results.csv")
-
-    if census_period_df is not None:
-        census_period_df.to_csv('Processed_Data/census_recession_periods.csv', index=False)
-        print(f"OK Census recession analysis saved: Processed_Data/census_recession_periods.csv")
+    # Master, loadings, retail and Census outputs were queued by their stages; search results
+    # are saved here because the Tableau export adds their Category / Data_Type columns
+    if search_results is not None:
+        writer.write(search_results, 'Processed_Data/search_indicators_results_final.csv')
+        print(f"\nOK Search results queued: Processed_Data/search_indicators_results_final.csv")
+
+    if precision_df is not None:
+        writer.write(precision_df, 'Processed_Data/compact_precision_report.csv')
+        print(f"OK Compact precision report queued: Processed_Data/compact_precision_report.csv")
+    timings['export'] = time.perf_counter() - start
+
+    # The only point where the run waits for I/O
+    start = time.perf_counter()
+    output_report = writer.close()
+    timings['io_wait'] = time.perf_counter() - start
+    print_output_report(output_report, config.output_formats)
+
+    # Starting point for the next --incremental run (stages that did not run keep their state)
+    state = load_state(config.state_file) or {}
+    new_state = build_incremental_state(raw_sources, master_df, scores_df, loadings_df,
+                                        beauty_census_df, fashion_census_df, seasonal_factors,
+                                        deflation_state(config, price_index))
+    sources = dict(state.get('sources', {}), **new_state.pop('sources'))
+    # Seasonal factors of the frames rebuilt by this run are replaced (or dropped if it did not adjust)
+    rebuilt = [name for name, df in [('master', master_df), ('search', master_df), ('census', beauty_census_df)]
+               if df is not None]
+    seasonal = {name: entry for name, entry in state.get('seasonal', {}).items() if name not in rebuilt}
+    seasonal.update(new_state.pop('seasonal'))
+    state.update(new_state, sources=sources, seasonal=seasonal)
+    save_state(state, config.state_file)
+    print(f"\nOK Incremental state saved: {config.state_file}")
+
+    if master_df is not None:
+        context.put('master', master_df)
+        context.put('search_results', search_results)
+    if config.share_context and len(context) > 0:
+        context.save_arrow(config.context_dir, outputs=writer.content_hashes())
+        print(f"\nOK Data context shared for other processes: {config.context_dir} ({', '.join(context.frames)})")
 
     # Final summary
     print("\n" + "="*100)
@@ -1171,10 +2527,11 @@ def main():
     print("="*100)
     print(f"\nCompletion time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("\n KEY FINDINGS:")
-    print(f"\n  SEARCH BEHAVIOR (Google Trends 2004-2024):")
-    print(f"    - Indicators tested: {len(search_results)}")
-    print(f"    - Significant results: {search_results['Significant'].value_counts().get('Yes', 0)}/{len(search_results)}")
-    print(f"    - Top predictor: {search_results.iloc[0]['Indicator']} (R² = {search_results.iloc[0]['R²']*100:.1f}%)")
+    if search_results is not None:
+        print(f"\n  SEARCH BEHAVIOR (Google Trends 2004-2024):")
+        print(f"    - Indicators tested: {len(search_results)}")
+        print(f"    - Significant results: {search_results['Significant'].value_counts().get('Yes', 0)}/{len(search_results)}")
+        print(f"    - Top predictor: {search_results.iloc[0]['Indicator']} (R² = {search_results.iloc[0]['R²']*100:.1f}%)")
 
     if retail_df is not None:
         luxury_pct = len(retail_df[retail_df['purchase_type'] == 'Little Luxury']) / len(retail_df) * 100
@@ -1190,10 +2547,16 @@ def main():
         print(f"    - Data coverage: 4 major recessions analyzed")
         print(f"    - HILL ET AL. (2012) REPLICATION: {'SUCCESS' if sig_census > 0 else 'MIXED'}")
 
-    print("\nOK Ready for Tableau dashboard creation (9 CSV files exported)")
+    csv_report = output_report[output_report['format'] == 'csv']
+    csv_exports = csv_report.loc[csv_report['action'].isin(['written', 'linked']), 'path'].nunique()
+    csv_unchanged = csv_report.loc[csv_report['action'] == 'skipped', 'path'].nunique()
+    print(f"\nOK Ready for Tableau dashboard creation ({csv_exports} CSV files exported, "
+          f"{csv_unchanged} unchanged)")
     print("OK Ready for final report writing")
     print("\n" + "="*100)
 
+    return timings
+
 
 if __name__ == "__main__":
     main()
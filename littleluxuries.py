@@ -0,0 +1,177 @@
+"""
+Little Luxuries Project - Command Line Entry Point
+===================================================
+One entry point for the pipeline, driven by littleluxuries.json:
+
+    python littleluxuries.py run [--stages census,purchase] [--workers 8] [--formats csv parquet]
+    python littleluxuries.py run --viz
+    python littleluxuries.py run --incremental
+    python littleluxuries.py viz [--share-context]
+    python littleluxuries.py census-clean
+    python littleluxuries.py bench [--stages search] [--repeat 3]
+
+Every subcommand takes --config and the path overrides (--data-dir,
+--output-dir, --cache-dir); overrides are resolved against the current
+directory, paths in the config file against the file's directory.
+"""
+
+import argparse
+import contextlib
+import os
+import runpy
+import sys
+import time
+
+import pandas as pd
+
+from pipeline_config import CONFIG_ENV_VAR, PROJECT_ROOT, STAGES, load_config, save_config
+from pipeline_io import WRITER_BACKENDS
+from deflation import CPI_SERIES
+
+
+def _abspath(path):
+    return os.path.abspath(path) if path is not None else None
+
+
+def build_config(args):
+    """Load the config file and apply command-line overrides"""
+    overrides = {
+        'data_dir': _abspath(args.data_dir),
+        'output_dir': _abspath(args.output_dir),
+        'cache_dir': _abspath(args.cache_dir),
+    }
+    for key in ['stages', 'workers', 'io_workers', 'output_formats', 'cpi_series', 'deflation_base']:
+        overrides[key] = getattr(args, key, None)
+    for flag in ['auto_indicators', 'share_context', 'panel_store', 'compact_numeric', 'validate_compact',
+                 'incremental']:
+        if getattr(args, flag, False):
+            overrides[flag] = True
+    return load_config(args.config, **overrides)
+
+
+def run_script(config, script_path):
+    """Run a standalone script with this config (passed through $LITTLELUXURIES_CONFIG)"""
+    config_path = save_config(config, config.cache_path('resolved_config.json'))
+    previous = os.environ.get(CONFIG_ENV_VAR)
+    os.environ[CONFIG_ENV_VAR] = config_path
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    finally:
+        if previous is None:
+            os.environ.pop(CONFIG_ENV_VAR, None)
+        else:
+            os.environ[CONFIG_ENV_VAR] = previous
+
+
+def cmd_run(args):
+    import little_luxuries_master_analysis as analysis
+    config = build_config(args)
+    analysis.main(config, force_write=args.force)
+    if args.viz:
+        # Same process: the viz script picks up the analysis frames from the in-memory context
+        run_script(config, os.path.join(PROJECT_ROOT, 'run_all_visualizations.py'))
+
+
+def cmd_viz(args):
+    run_script(build_config(args), os.path.join(PROJECT_ROOT, 'run_all_visualizations.py'))
+
+
+def cmd_census_clean(args):
+    run_script(build_config(args), os.path.join(PROJECT_ROOT, 'Data_Sources', 'census_data_cleaning_script.py'))
+
+
+def cmd_bench(args):
+    """Time each stage of the master analysis over several runs"""
+    config = build_config(args)
+    # Benchmark outputs go to the cache unless an output dir was given
+    if args.output_dir is None:
+        config = config.replace(output_dir=os.path.join(config.cache_dir, 'bench'),
+                                manifest=os.path.join(config.cache_dir, 'bench', '.output_manifest.json'),
+                                state_file=os.path.join(config.cache_dir, 'bench', 'incremental_state.json'))
+
+    import little_luxuries_master_analysis as analysis
+
+    print("=" * 100)
+    print(f"BENCHMARK: {', '.join(config.stages)} x {args.repeat} runs -> {config.output_dir}")
+    print("=" * 100)
+
+    rows = []
+    for run in range(args.repeat):
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            timings = analysis.main(config, force_write=args.force)
+        timings['total'] = time.perf_counter() - start
+        rows.extend({'run': run + 1, 'part': part, 'seconds': seconds} for part, seconds in timings.items())
+        print(f"  Run {run + 1}: {timings['total']:.2f}s")
+
+    results = pd.DataFrame(rows)
+    summary = results.groupby('part', sort=False)['seconds'].agg(['min', 'median', 'max'])
+    print(f"\n{summary.round(3).to_string()}")
+
+    results_path = config.cache_path('bench_timings.csv')
+    results.to_csv(results_path, index=False)
+    print(f"\nOK Timings saved: {results_path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='littleluxuries', description='Little Luxuries analysis pipeline')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', help=f'config file (default: ${CONFIG_ENV_VAR} or littleluxuries.json)')
+    common.add_argument('--data-dir', help='raw input directory')
+    common.add_argument('--output-dir', help='root for Processed_Data/, Tableau_Data/ and Viz/')
+    common.add_argument('--cache-dir', help='intermediate/cache directory')
+
+    pipeline = argparse.ArgumentParser(add_help=False)
+    pipeline.add_argument('--stages', help=f"comma-separated subset of: {', '.join(STAGES)}")
+    pipeline.add_argument('--workers', type=int, help='processes for latent-variable fitting')
+    pipeline.add_argument('--io-workers', type=int, help='output writer threads')
+    pipeline.add_argument('--formats', dest='output_formats', nargs='+', choices=sorted(WRITER_BACKENDS),
+                          help='output formats')
+    pipeline.add_argument('--auto-indicators', action='store_true',
+                          help='cluster search terms into indicator groups instead of the fixed groups')
+    pipeline.add_argument('--force', action='store_true', help='rewrite outputs even if unchanged')
+    pipeline.add_argument('--cpi-series', choices=sorted(CPI_SERIES), help='price index for real-dollar columns')
+    pipeline.add_argument('--deflation-base', help="constant-dollar base period: a year or 'YYYY-MM'")
+    pipeline.add_argument('--panel-store', action='store_true',
+                          help='keep the master panel in a memory-mapped store instead of the heap')
+    pipeline.add_argument('--compact', dest='compact_numeric', action='store_true',
+                          help='downcast panels to float32 / small ints on load')
+    pipeline.add_argument('--validate-compact', action='store_true',
+                          help='report R²/p-value deviation of --compact against full precision')
+    pipeline.add_argument('--incremental', action='store_true',
+                          help='append months released since the last run instead of recomputing')
+    pipeline.add_argument('--share-context', action='store_true',
+                          help='save analysis frames as Arrow files for a separate viz process')
+
+    run = subparsers.add_parser('run', parents=[common, pipeline], help='run the master analysis')
+    run.add_argument('--viz', action='store_true',
+                     help='then run run_all_visualizations.py in-process on the same data')
+    run.set_defaults(func=cmd_run)
+
+    viz = subparsers.add_parser('viz', parents=[common], help='run run_all_visualizations.py')
+    viz.add_argument('--share-context', action='store_true',
+                     help='read the Arrow context saved by run --share-context instead of the CSVs')
+    viz.set_defaults(func=cmd_viz)
+
+    census = subparsers.add_parser('census-clean', parents=[common],
+                                   help='rebuild the Census retail extract from the raw workbook')
+    census.set_defaults(func=cmd_census_clean)
+
+    bench = subparsers.add_parser('bench', parents=[common, pipeline], help='time the pipeline stages')
+    bench.add_argument('--repeat', type=int, default=3, help='number of runs')
+    bench.add_argument('--verbose', action='store_true', help='show the analysis output')
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
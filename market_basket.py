@@ -0,0 +1,83 @@
+"""
+Little Luxuries Project - Market Basket Co-Purchase Analysis
+=============================================================
+Which treats are bought together, for PART 3I of the master analysis.
+
+A basket is everything one customer bought in one period (a day by default).
+Baskets become the rows of a scipy.sparse basket × item incidence matrix X
+(1 where the item is in the basket), so every pair count is one sparse
+product: (Xᵀ X)[a, b] is the number of baskets holding both a and b and the
+diagonal holds each item's own basket count. Support, confidence and lift of
+every co-purchased pair follow from the nonzero entries, with no loop over
+baskets or pairs. Items can be grouped (e.g. into luxury categories) by one
+more product with a sparse item × group indicator.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from resampling import period_codes, MISSING
+
+# Pairs seen in fewer baskets than this are too rare for a stable lift
+MIN_PAIR_BASKETS = 5
+
+
+def basket_matrix(customer_ids, dates, items, freq='D'):
+    """
+    Sparse basket × item incidence matrix (CSR, int32 0/1) of customer-period
+    baskets, and the item labels of its columns.
+    """
+    customers, _ = pd.factorize(pd.Series(customer_ids), sort=False)
+    item_codes, item_levels = pd.factorize(pd.Series(items), sort=True)
+    periods = period_codes(dates, freq)
+    valid = (customers >= 0) & (item_codes >= 0) & (periods != MISSING)
+    customers, item_codes, periods = customers[valid], item_codes[valid], periods[valid]
+
+    span = int(periods.max() - periods.min()) + 1 if len(periods) else 1
+    basket_keys = customers.astype(np.int64) * span + (periods - (periods.min() if len(periods) else 0))
+    _, baskets = np.unique(basket_keys, return_inverse=True)
+    incidence = sparse.csr_matrix((np.ones(len(baskets), dtype=np.int32), (baskets, item_codes)),
+                                  shape=(int(baskets.max()) + 1 if len(baskets) else 0, len(item_levels)))
+    incidence.data[:] = 1                            # an item bought twice in a basket still counts once
+    return incidence, pd.Index(item_levels)
+
+
+def group_matrix(incidence, labels, groups):
+    """Basket × group incidence from a basket × item one (groups[i] is the group of item labels[i])"""
+    group_codes, group_levels = pd.factorize(pd.Series(groups), sort=True)
+    indicator = sparse.csr_matrix((np.ones(len(labels), dtype=np.int32), (np.arange(len(labels)), group_codes)),
+                                  shape=(len(labels), len(group_levels)))
+    grouped = (incidence @ indicator).tocsr()
+    grouped.data[:] = 1
+    return grouped, pd.Index(group_levels)
+
+
+def pair_table(incidence, labels, focus=None, min_baskets=MIN_PAIR_BASKETS):
+    """
+    Support, confidence and lift of every pair of columns bought together in
+    at least min_baskets baskets, from one sparse Xᵀ X product. focus (a
+    boolean per label) keeps pairs with at least one focus item.
+    """
+    n_baskets = incidence.shape[0]
+    co = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+    counts = incidence.sum(axis=0).A1
+    keep = co.data >= min_baskets
+    if focus is not None:
+        focus = np.asarray(focus, dtype=bool)
+        keep &= focus[co.row] | focus[co.col]
+    a, b, both = co.row[keep], co.col[keep], co.data[keep].astype(np.int64)
+
+    support_a, support_b = counts[a] / n_baskets, counts[b] / n_baskets
+    pairs = pd.DataFrame({
+        'item_a': labels[a],
+        'item_b': labels[b],
+        'baskets': both,
+        'baskets_a': counts[a],
+        'baskets_b': counts[b],
+        'support': both / n_baskets,
+        'confidence_a_to_b': both / counts[a],
+        'confidence_b_to_a': both / counts[b],
+        'lift': both / n_baskets / (support_a * support_b),
+    })
+    return pairs.sort_values(['lift', 'baskets'], ascending=False).reset_index(drop=True)
@@ -0,0 +1,173 @@
+"""
+Little Luxuries Project - OLAP Rollup Cube
+===========================================
+Group-by aggregates without pandas groupby: every dimension is turned into
+integer category codes, the codes are combined into one mixed-radix cell key,
+and each measure is summed over the key with a single np.bincount.
+
+RollupCube scans the rows once at the finest grain (count, sums and the set of
+distinct members per cell). Any coarser grouping - a GROUPING SETS / ROLLUP
+style slice such as (month, purchase_type) or (year, quarter, category) - is
+then summed from the cells instead of rescanning the rows. Distinct counts
+stay exact: the cube keeps the deduplicated (cell, member) pairs, which merge
+across cells like a sketch but never estimate.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Groupings with more possible cells than this are keyed by the occupied cells only
+DENSE_CELL_LIMIT = 1 << 22
+
+# Marks a rolled-up dimension in grouping_sets() output (like NULL in SQL GROUPING SETS)
+ALL_LABEL = '(all)'
+
+
+def _codes(series):
+    """(integer codes, levels) of a column; -1 marks missing values"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, levels = pd.factorize(series, sort=True)
+    return codes, levels
+
+
+def group_index(df, dimensions):
+    """
+    Group number of every row (-1 if a dimension is missing) and the frame of
+    occupied groups in sorted key order, from one combined key.
+    """
+    levels = []
+    sizes = []
+    key = np.zeros(len(df), dtype=np.int64)
+    complete = np.ones(len(df), dtype=bool)
+    for dim in dimensions:
+        codes, level = _codes(df[dim])
+        levels.append(level)
+        sizes.append(max(len(level), 1))
+        complete &= codes >= 0
+        key *= sizes[-1]                  # mixed-radix key, last dimension fastest
+        key += codes
+    sizes = tuple(sizes)
+
+    group = np.full(len(df), -1, dtype=np.int64)
+    if np.prod(sizes, dtype=float) > DENSE_CELL_LIMIT:
+        cell_ids, group[complete] = np.unique(key[complete], return_inverse=True)
+    else:
+        occupied = np.bincount(key[complete], minlength=int(np.prod(sizes))) > 0
+        cell_ids = np.flatnonzero(occupied)
+        lookup = np.cumsum(occupied) - 1
+        group[complete] = lookup[key[complete]]
+
+    cell_codes = np.unravel_index(cell_ids, sizes) if dimensions else ()
+    groups = pd.DataFrame({
+        dim: pd.Categorical.from_codes(codes, categories=level)
+             if isinstance(df[dim].dtype, pd.CategoricalDtype) else np.asarray(level)[codes]
+        for dim, level, codes in zip(dimensions, levels, cell_codes)
+    }, index=pd.RangeIndex(len(cell_ids)))
+    return group, groups
+
+
+def cube_aggregate(df, dimensions, measures, count_name='transactions'):
+    """
+    Sum of each measure (and the row count) for every occupied combination
+    of the dimensions, from one bincount per measure over a combined key.
+    Rows with a missing dimension value are left out.
+    """
+    group, cube = group_index(df, dimensions)
+    complete = group >= 0
+    group = group[complete]
+    cube[count_name] = np.bincount(group, minlength=len(cube))
+    for measure in measures:
+        values = df[measure].to_numpy(dtype=float)[complete]
+        values[np.isnan(values)] = 0
+        cube[measure] = np.bincount(group, weights=values, minlength=len(cube))
+    return cube
+
+
+class RollupCube:
+    """
+    Finest-grain cube over the given dimensions with count, sum per measure
+    and exact distinct members; slices at any coarser grain are cheap.
+    """
+
+    def __init__(self, df, dimensions, measures, distinct=None):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.distinct = distinct
+
+        group, self.cells = group_index(df, self.dimensions)
+        complete = group >= 0
+        self.cells['count'] = np.bincount(group[complete], minlength=len(self.cells))
+        for measure in self.measures:
+            values = df[measure].to_numpy(dtype=float)[complete]
+            values[np.isnan(values)] = 0
+            self.cells[measure] = np.bincount(group[complete], weights=values, minlength=len(self.cells))
+
+        # Deduplicated (cell, member) pairs: the distinct-count "sketch" of every cell
+        if distinct is not None:
+            members, self.members = pd.factorize(df[distinct])
+            keep = complete & (members >= 0)
+            pairs = np.unique(group[keep] * len(self.members) + members[keep])
+            self.pair_cell, self.pair_member = np.divmod(pairs, max(len(self.members), 1))
+
+    def add_attribute(self, name, values):
+        """Attach a column derived from the cell dimensions (e.g. year of month) for slicing"""
+        self.cells[name] = np.asarray(values)
+        return self
+
+    def _where(self, where):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, value in (where or {}).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells[dim].isin(values).to_numpy()
+        return mask
+
+    def slice(self, dimensions, where=None):
+        """
+        Aggregates by the given dimensions over the cells matching where
+        ({dimension: value or list of values}): count, sum and mean of each
+        measure and the distinct member count.
+        """
+        mask = self._where(where)
+        group, result = group_index(self.cells[mask], list(dimensions))
+        mask[mask] = group >= 0               # cells with a missing slice dimension drop out
+        group = group[group >= 0]
+        cells = self.cells[mask]
+        result['count'] = np.bincount(group, weights=cells['count'].to_numpy(),
+                                      minlength=len(result)).astype(np.int64)
+        for measure in self.measures:
+            result[f'{measure}_sum'] = np.bincount(group, weights=cells[measure].to_numpy(), minlength=len(result))
+            result[f'{measure}_mean'] = result[f'{measure}_sum'] / result['count']
+
+        if self.distinct is not None:
+            # Cell -> slice group, then the distinct (group, member) pairs per group
+            cell_group = np.full(len(self.cells), -1, dtype=np.int64)
+            cell_group[mask] = group
+            pair_group = cell_group[self.pair_cell]
+            keep = pair_group >= 0
+            pairs = np.unique(pair_group[keep] * len(self.members) + self.pair_member[keep])
+            result[f'{self.distinct}_distinct'] = np.bincount(pairs // max(len(self.members), 1),
+                                                              minlength=len(result))
+        return result
+
+    def grouping_sets(self, sets, where=None):
+        """
+        Several slices stacked in one frame, as SQL GROUPING SETS would return
+        them: dimensions a set does not group by hold ALL_LABEL.
+        """
+        columns = list(dict.fromkeys(dim for dims in sets for dim in dims))
+        frames = []
+        for dims in sets:
+            frame = self.slice(dims, where)
+            for dim in columns:
+                if dim not in dims:
+                    frame[dim] = ALL_LABEL
+                elif pd.api.types.is_datetime64_any_dtype(frame[dim]):
+                    frame[dim] = frame[dim].dt.strftime('%Y-%m-%d')
+                else:
+                    frame[dim] = frame[dim].astype(str)
+            frame.insert(0, 'grouping_set', ' × '.join(dims) if dims else 'total')
+            frames.append(frame)
+        stacked = pd.concat(frames, ignore_index=True)
+        return stacked[['grouping_set'] + columns + [col for col in stacked.columns
+                                                     if col not in columns and col != 'grouping_set']]
@@ -0,0 +1,186 @@
+"""
+Little Luxuries Project - Panel Store
+======================================
+Memory-mapped storage for the wide monthly master panel (dates x series).
+
+The float columns of the master dataset are written once to a column-major
+binary matrix on disk, with a JSON index of column names and the date axis.
+Every column is then a contiguous slice of the mapped file, so stages can
+read single series, column ranges or the whole panel as zero-copy views, and
+the OS pages data in and out instead of each stage holding its own copy.
+With thousands of trend columns this keeps the panel out of the Python heap.
+
+Layout of a store directory:
+- values.bin   column-major float matrix (n_dates x n_columns)
+- dates.npy    datetime64[ns] date axis
+- index.json   column names, dtype and shape
+
+Compact mode stores the panels as float32 (and the smallest integer type
+that fits). Regression and correlation kernels still accumulate in float64;
+precision_report() measures what the compact inputs cost in R² and p-values.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+VALUES_FILE = 'values.bin'
+DATES_FILE = 'dates.npy'
+INDEX_FILE = 'index.json'
+
+
+# Result columns compared by precision_report
+PRECISION_COLUMNS = ['R²', 'Adj_R²', 'P-value', 'Coefficient', 'F-statistic']
+
+
+def downcast_numeric(df, float_dtype=np.float32, exclude=()):
+    """Copy of df with float64 columns as float_dtype and integers in their smallest type"""
+    converted = {}
+    for col, dtype in df.dtypes.items():
+        if col in exclude:
+            continue
+        if dtype == np.float64:
+            converted[col] = df[col].astype(float_dtype)
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+            converted[col] = pd.to_numeric(df[col], downcast='integer')
+    return df.assign(**converted) if converted else df
+
+
+def memory_mb(df):
+    return df.memory_usage(index=True, deep=False).sum() / 1e6
+
+
+def precision_report(full_results, compact_results, key, columns=PRECISION_COLUMNS):
+    """Max/mean absolute deviation of each result column between full and compact precision"""
+    merged = full_results.merge(compact_results, on=key, suffixes=('_full', '_compact'))
+    rows = []
+    for col in columns:
+        if f'{col}_full' not in merged.columns:
+            continue
+        deviation = (merged[f'{col}_full'].astype(np.float64) - merged[f'{col}_compact'].astype(np.float64)).abs()
+        rows.append({'Metric': col, 'Max_Abs_Deviation': deviation.max(),
+                     'Mean_Abs_Deviation': deviation.mean(), 'N': len(merged)})
+    flips = (merged['Significant_full'] != merged['Significant_compact']).sum() \
+        if 'Significant_full' in merged.columns else 0
+    rows.append({'Metric': 'Significance flips', 'Max_Abs_Deviation': float(flips),
+                 'Mean_Abs_Deviation': np.nan, 'N': len(merged)})
+    return pd.DataFrame(rows)
+
+
+def float_columns(df):
+    """Names of the float columns of a frame (the ones a panel store holds)"""
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_float_dtype(dtype)]
+
+
+class PanelStore:
+    """Column-major memory-mapped float matrix with a column index and a date axis"""
+
+    def __init__(self, path, mode='c'):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.path = path
+        self.columns = index['columns']
+        self.dtype = np.dtype(index['dtype'])
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(path, DATES_FILE)), name='date')
+        self.column_index = {col: i for i, col in enumerate(self.columns)}
+
+        shape = (len(self.dates), len(self.columns))
+        if shape[0] * shape[1] == 0:
+            self.values = np.empty(shape, dtype=self.dtype, order='F')
+        else:
+            # mode 'c': copy-on-write - stray in-place edits stay private to this process
+            self.values = np.memmap(os.path.join(path, VALUES_FILE), dtype=self.dtype,
+                                    mode=mode, shape=shape, order='F')
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def __contains__(self, column):
+        return column in self.column_index
+
+    @classmethod
+    def from_frame(cls, df, path, date_col='date', columns=None, dtype=np.float64):
+        """Write the float columns of df (or the given columns) to a new store at path"""
+        if columns is None:
+            columns = float_columns(df)
+        dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+
+        # Column-major: each column is written as one contiguous run of the file
+        tmp_path = os.path.join(path, f"{VALUES_FILE}.tmp")
+        with open(tmp_path, 'wb') as f:
+            for col in columns:
+                f.write(np.ascontiguousarray(df[col].to_numpy(dtype=dtype)).tobytes())
+        os.replace(tmp_path, os.path.join(path, VALUES_FILE))
+
+        np.save(os.path.join(path, DATES_FILE), pd.to_datetime(df[date_col]).to_numpy(dtype='datetime64[ns]'))
+        _write_index(path, columns, dtype, len(df))
+        return cls(path)
+
+    @classmethod
+    def open(cls, path, mode='c'):
+        return cls(path, mode=mode)
+
+    def append_columns(self, df, columns=None):
+        """Add new series (aligned to the store's dates) by appending them to the file"""
+        if columns is None:
+            columns = float_columns(df)
+        duplicate = [col for col in columns if col in self.column_index]
+        if duplicate:
+            raise ValueError(f"Columns already in panel store: {', '.join(map(str, duplicate))}")
+        if len(df) != len(self.dates):
+            raise ValueError(f"Expected {len(self.dates)} rows, got {len(df)}")
+
+        with open(os.path.join(self.path, VALUES_FILE), 'ab') as f:
+            for col in columns:
+                f.write(np.ascontiguousarray(df[col].to_numpy(dtype=self.dtype)).tobytes())
+        _write_index(self.path, self.columns + list(columns), self.dtype, len(self.dates))
+        self.__init__(self.path)
+        return self
+
+    def column(self, name):
+        """One series as a zero-copy 1-D view"""
+        return self.values[:, self.column_index[name]]
+
+    def block(self, names):
+        """
+        Several series as a 2-D array.
+
+        A run of adjacent columns is returned as a view; any other selection
+        has to gather (copy) the requested columns.
+        """
+        idx = [self.column_index[name] for name in names]
+        if idx and idx == list(range(idx[0], idx[0] + len(idx))):
+            return self.values[:, idx[0]:idx[0] + len(idx)]
+        return self.values[:, idx]
+
+    def frame(self, names=None):
+        """Series as a DataFrame indexed by date, one zero-copy view per column"""
+        names = self.columns if names is None else list(names)
+        return pd.DataFrame({name: self.column(name) for name in names}, index=self.dates, copy=False)
+
+    def attach(self, df):
+        """
+        Same frame as df, with every column held in the store replaced by its
+        memory-mapped view (column order and other columns unchanged).
+        """
+        if len(df) != len(self.dates):
+            raise ValueError(f"Expected {len(self.dates)} rows, got {len(df)}")
+        data = {col: (self.column(col) if col in self.column_index else df[col])
+                for col in df.columns}
+        return pd.DataFrame(data, index=df.index, copy=False)
+
+
+def _write_index(path, columns, dtype, n_dates):
+    tmp_path = os.path.join(path, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({'columns': [str(col) for col in columns], 'dtype': np.dtype(dtype).str,
+                   'shape': [n_dates, len(columns)]}, f)
+    os.replace(tmp_path, os.path.join(path, INDEX_FILE))
@@ -0,0 +1,154 @@
+"""
+Little Luxuries Project - Pipeline Configuration
+=================================================
+Input/output roots and run options for the master analysis, the
+visualization scripts and the census cleaning script.
+
+Settings come from a JSON config file (littleluxuries.json in the project
+root, or the file named by the LITTLELUXURIES_CONFIG environment variable).
+Relative paths in the file are resolved against the file's own directory,
+so the same config works on Windows, macOS and the Linux batch workers.
+Keys missing from the file fall back to DEFAULT_CONFIG.
+"""
+
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILENAME = 'littleluxuries.json'
+CONFIG_ENV_VAR = 'LITTLELUXURIES_CONFIG'
+
+# Analysis stages of the master script, in run order. Outputs (Tableau_Data/,
+# Processed_Data/) are exported for whichever stages ran. 'seasonal' adjusts the
+# series loaded by search and census before they are analyzed.
+STAGES = ['search', 'purchase', 'census', 'seasonal', 'compare', 'predict', 'viz']
+
+# Stages that need another stage's results
+STAGE_REQUIRES = {
+    'compare': ['search', 'purchase'],
+    'predict': ['search'],
+    'viz': ['search'],
+}
+
+DEFAULT_CONFIG = {
+    'data_dir': 'Data_Sources',          # raw inputs (FRED, Google Trends, retail, census)
+    'output_dir': '.',                   # Processed_Data/, Tableau_Data/ and Viz/ are created here
+    'cache_dir': '.cache',               # intermediates (census cleaning extracts, benchmarks)
+    'manifest': '.output_manifest.json', # content-hash manifest of written outputs
+    'state_file': '.cache/incremental_state.json',  # what --incremental runs continue from
+    'context_dir': '.cache/context',     # Arrow handoff of analysis frames to the viz scripts
+    'share_context': False,              # save the context there for viz runs in another process
+    'panel_dir': '.cache/panel',         # memory-mapped master panel (see panel_store.py)
+    'panel_store': False,                # back master_df's float columns by the panel store
+    'compact_numeric': False,            # float32 / small-int panels (kernels still use float64)
+    'validate_compact': False,           # also run at full precision and report R²/p-value deviation
+    'census_file': 'Data_Sources/census_retail_sales_1992_2025.csv',
+    'census_workbook': 'Data_Sources/proj1sheet.xlsx',  # raw Census MRTS workbook for census-clean
+    'stages': STAGES,
+    'workers': None,                     # latent-variable fitting processes (None = all CPUs)
+    'io_workers': 4,                     # output writer threads
+    'output_formats': ['csv'],
+    'auto_indicators': False,
+    'cpi_series': 'CPIAUCSL',            # price index for *_real columns (CPIAUCSL headline, CPILFESL core)
+    'deflation_base': '2024',            # constant-dollar base: a year, a month ('2024-06') or null = latest
+    'incremental': False,                # append new months using the state saved by the last run
+}
+
+# Keys holding paths, resolved against the config file's directory
+PATH_KEYS = ['data_dir', 'output_dir', 'cache_dir', 'manifest', 'state_file', 'context_dir', 'panel_dir',
+             'census_file', 'census_workbook']
+
+
+class PipelineConfig:
+    """Resolved pipeline settings with helpers for building input/output paths"""
+
+    def __init__(self, settings=None, base_dir=PROJECT_ROOT, source=None):
+        merged = dict(DEFAULT_CONFIG)
+        merged.update(settings or {})
+
+        unknown = sorted(set(merged) - set(DEFAULT_CONFIG))
+        if unknown:
+            raise ValueError(f"Unknown config key(s): {', '.join(unknown)}")
+
+        for key in PATH_KEYS:
+            merged[key] = os.path.normpath(os.path.join(base_dir, os.path.expanduser(merged[key])))
+
+        merged['stages'] = resolve_stages(merged['stages'])
+        merged['output_formats'] = list(merged['output_formats'])
+
+        self.settings = merged
+        self.source = source
+        for key, value in merged.items():
+            setattr(self, key, value)
+
+    def input_path(self, *parts):
+        """Path of a raw input file under data_dir"""
+        return os.path.join(self.data_dir, *parts)
+
+    def output_path(self, *parts):
+        """Path of an output under output_dir (e.g. 'Viz', 'chart.png')"""
+        return os.path.join(self.output_dir, *parts)
+
+    def cache_path(self, *parts):
+        """Path under cache_dir, creating the parent directory"""
+        path = os.path.join(self.cache_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def has_stage(self, stage):
+        return stage in self.stages
+
+    def replace(self, **overrides):
+        """Copy of this config with some settings replaced (None values are ignored)"""
+        settings = dict(self.settings)
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return PipelineConfig(settings, base_dir=PROJECT_ROOT, source=self.source)
+
+    def __repr__(self):
+        return f"PipelineConfig({self.source or 'defaults'})"
+
+
+def resolve_stages(stages):
+    """Validate stage names, returning them in run order"""
+    if isinstance(stages, str):
+        stages = [s.strip() for s in stages.split(',') if s.strip()]
+    if not stages or 'all' in stages:
+        return list(STAGES)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    return [s for s in STAGES if s in stages]
+
+
+def find_config_file(path=None):
+    """Config file to use: explicit path, then $LITTLELUXURIES_CONFIG, then the project default"""
+    if path is None:
+        path = os.environ.get(CONFIG_ENV_VAR)
+    if path is None:
+        default = os.path.join(PROJECT_ROOT, CONFIG_FILENAME)
+        return default if os.path.exists(default) else None
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Config file not found: {path}")
+    return os.path.abspath(path)
+
+
+def save_config(config, path):
+    """Write a resolved config (absolute paths) so child scripts can load it"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(config.settings, f, indent=2)
+    return path
+
+
+def load_config(path=None, **overrides):
+    """Load the pipeline config (see find_config_file), applying keyword overrides"""
+    config_file = find_config_file(path)
+    settings = {}
+    base_dir = PROJECT_ROOT
+    if config_file is not None:
+        with open(config_file) as f:
+            settings = json.load(f)
+        base_dir = os.path.dirname(config_file)
+
+    config = PipelineConfig(settings, base_dir=base_dir, source=config_file)
+    return config.replace(**overrides) if overrides else config
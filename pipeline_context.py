@@ -0,0 +1,173 @@
+"""
+Little Luxuries Project - Shared Data Context
+==============================================
+In-memory handoff of analysis results from the master analysis to the
+visualization scripts.
+
+The master analysis puts the frames it has already built (master dataset,
+search results, Census time series) into the process-wide DataContext, and
+run_all_visualizations.py takes them from there instead of re-reading the
+CSVs it just wrote. When the two run in separate processes, the context can
+be saved as uncompressed Arrow IPC files and memory-mapped by the reader, so
+columns are shared through the page cache rather than parsed again. A saved
+context records the content hashes of its run's outputs; if a later run has
+changed any of them in the output manifest, the reader ignores the stale
+context and falls back to the CSVs.
+
+Optional dependencies:
+- pyarrow  (cross-process handoff)
+"""
+
+import json
+import os
+import time
+
+import pandas as pd
+
+from pipeline_io import load_manifest
+
+CONTEXT_INDEX = 'context.json'
+
+_CURRENT = None
+
+
+class DataContext:
+    """Named DataFrames produced by one pipeline run"""
+
+    def __init__(self, frames=None, source='memory'):
+        self.frames = dict(frames or {})
+        self.source = source
+
+    def __contains__(self, name):
+        return name in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def put(self, name, df):
+        """Store a frame (not copied - callers must not modify it afterwards)"""
+        self.frames[name] = df
+        return df
+
+    def get(self, name, default=None):
+        return self.frames.get(name, default)
+
+    def load(self, name, path, reader=pd.read_csv, **read_kwargs):
+        """Frame from the context if present, else read it from path (and keep it)"""
+        if name in self.frames:
+            print(f"   [OK] Using {name} from the {self.source} context (no re-read)")
+            return self.frames[name]
+        print(f"   Reading {os.path.basename(path)} from disk")
+        return self.put(name, reader(path, **read_kwargs))
+
+    def save_arrow(self, directory, outputs=None):
+        """
+        Write every frame as an uncompressed Arrow IPC file for memory-mapped
+        reading. outputs: manifest path -> content hash of the run's outputs
+        (OutputWriter.content_hashes), checked by from_arrow.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("context handoff needs pyarrow (pip install pyarrow)")
+
+        os.makedirs(directory, exist_ok=True)
+        index = {'created': time.time(), 'outputs': dict(outputs or {}), 'frames': {}}
+        for name, df in self.frames.items():
+            path = os.path.join(directory, f"{name}.arrow")
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            tmp_path = f"{path}.tmp"
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+            index['frames'][name] = os.path.basename(path)
+
+        with open(os.path.join(directory, CONTEXT_INDEX), 'w') as f:
+            json.dump(index, f, indent=1)
+        return directory
+
+    @classmethod
+    def from_arrow(cls, directory, manifest_path=None):
+        """
+        Memory-map a context saved by save_arrow (None if there is none, or if
+        the manifest shows a later run changed any of its outputs)
+        """
+        index_path = os.path.join(directory, CONTEXT_INDEX)
+        if not os.path.exists(index_path):
+            return None
+        import pyarrow as pa
+
+        with open(index_path) as f:
+            index = json.load(f)
+        age = _age(time.time() - index['created'])
+        if manifest_path is not None:
+            manifest = load_manifest(manifest_path)
+            changed = [path for path, content_hash in index.get('outputs', {}).items()
+                       if manifest.get(path, {}).get('hash') != content_hash]
+            if changed:
+                print(f"   [X] Shared context from {age} ago is stale: {len(changed)} of its outputs changed since "
+                      f"(e.g. {os.path.basename(changed[0])}) - reading the CSVs instead")
+                return None
+        print(f"   [OK] Shared context saved {age} ago")
+        frames = {}
+        for name, filename in index['frames'].items():
+            source = pa.memory_map(os.path.join(directory, filename), 'r')
+            table = pa.ipc.open_file(source).read_all()
+            # split_blocks keeps numeric columns as views on the mapped buffers
+            frames[name] = table.to_pandas(split_blocks=True)
+        return cls(frames, source=f"shared ({directory})")
+
+
+def _age(seconds):
+    """Human-readable age ('45s', '12 min', '3.5 h', '2.0 days')"""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+
+def get_context():
+    """The process-wide context populated by the master analysis"""
+    global _CURRENT
+    if _CURRENT is None:
+        _CURRENT = DataContext()
+    return _CURRENT
+
+
+def set_context(context):
+    global _CURRENT
+    _CURRENT = context
+    return context
+
+
+def open_context(directory=None, manifest_path=None):
+    """In-process context if populated, else the shared one in directory (if still current), else an empty one"""
+    context = get_context()
+    if len(context) == 0 and directory is not None:
+        shared = DataContext.from_arrow(directory, manifest_path)
+        if shared is not None:
+            context = set_context(shared)
+    return context
+
+
+# ========================================================================================================
+# DERIVED FRAMES SHARED BY ANALYSIS AND VISUALIZATION
+# ========================================================================================================
+
+def census_wide_frame(census_timeseries):
+    """Beauty/fashion sales side by side with CCI, CPI and year-over-year growth"""
+    df_pivot = census_timeseries.pivot(index='observation_date', columns='category', values='sales').reset_index()
+    df_pivot = df_pivot[['observation_date', 'Beauty & Personal Care', "Women's Clothing"]]
+    df_pivot.columns = ['observation_date', 'beauty_sales', 'fashion_sales']
+
+    df_econ = census_timeseries[census_timeseries['category'] == 'Beauty & Personal Care'][['observation_date', 'cci', 'cpi']]
+    df_final = df_pivot.merge(df_econ, on='observation_date', how='left').dropna()
+
+    df_final['inflation_yoy'] = df_final['cpi'].pct_change(12) * 100
+    df_final['beauty_growth'] = df_final['beauty_sales'].pct_change(12) * 100
+    df_final['fashion_growth'] = df_final['fashion_sales'].pct_change(12) * 100
+    return df_final.dropna()
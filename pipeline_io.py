@@ -0,0 +1,561 @@
+"""
+Little Luxuries Project - Pipeline I/O
+=======================================
+Background input reads and pluggable writer backends for the Tableau_Data/
+and Processed_Data/ exports.
+
+An InputReader starts parsing every raw input file on a thread pool as soon
+as the run begins; the load_* functions then just wait for their file, so
+the Excel workbook, FRED CSVs, retail transactions and Census extract are
+read concurrently instead of one after another.
+
+Every export goes through an OutputWriter. It writes each frame in all the
+configured formats (CSV, compressed Parquet partitioned by year/category,
+Tableau Hyper extracts) on a thread pool. A frame that has already been
+written during the run is not serialized again: the new path is hard-linked
+to the first copy.
+
+With a manifest, outputs (frames and figures) are content-hashed before
+serializing and skipped when nothing changed since the last run, so Tableau
+extract refreshes and file sync only see files that really changed. A
+figure's hash also covers the bytecode of the code that draws it, so
+restyling a chart re-renders it without --force.
+
+Incremental runs append new rows to existing outputs instead of rewriting
+them: CSV rows are added at the end, partitioned Parquet datasets get new
+part files and Hyper extracts are inserted into.
+
+Optional dependencies:
+- pyarrow          (parquet backend)
+- tableauhyperapi  (hyper backend)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+# format name -> (file extension, writer function)
+WRITER_BACKENDS = {}
+
+# format name -> function adding rows to an existing output
+APPEND_BACKENDS = {}
+
+
+def register_backend(fmt, extension):
+    """Register a writer function(df, path, partition_cols) for an output format"""
+    def decorator(func):
+        WRITER_BACKENDS[fmt] = (extension, func)
+        return func
+    return decorator
+
+
+def register_appender(fmt):
+    """Register an append function(df, path, partition_cols) for an output format"""
+    def decorator(func):
+        APPEND_BACKENDS[fmt] = func
+        return func
+    return decorator
+
+
+def frame_fingerprint(df):
+    """Content hash of a frame (values, index, column names and dtypes)"""
+    digest = hashlib.sha1()
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts): fall back to the CSV text
+        digest.update(df.to_csv().encode())
+    return digest.hexdigest()
+
+
+def _replace_path(tmp_path, path):
+    """Move a finished temp file/directory into place (breaks old hard links)"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.isdir(tmp_path) and os.path.lexists(path):
+        os.remove(path)
+    os.replace(tmp_path, path)
+
+
+def _partition_frame(df, partition_cols):
+    """Return (frame, column names) with any derived partition keys attached"""
+    if isinstance(partition_cols, dict):
+        return df.assign(**partition_cols), list(partition_cols)
+    return df, list(partition_cols)
+
+
+def _unshare(path):
+    """Give a hard-linked output its own copy, so appending to it leaves the other paths alone"""
+    if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, path)
+
+
+@register_backend('csv', '.csv')
+def write_csv(df, path, partition_cols=None):
+    """Plain CSV (partitioning ignored - Tableau reads one file)"""
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    _replace_path(tmp_path, path)
+
+
+@register_appender('csv')
+def append_csv(df, path, partition_cols=None):
+    """Add rows to the end of a CSV (columns must be in the file's order)"""
+    _unshare(path)
+    df.to_csv(path, mode='a', header=False, index=False)
+
+
+def _parquet_frame(df):
+    """Frame as stored in Parquet (period columns as month-start timestamps)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("parquet output needs pyarrow (pip install pyarrow)")
+    period_cols = [c for c, t in df.dtypes.items() if isinstance(t, pd.PeriodDtype)]
+    return df.assign(**{c: df[c].dt.to_timestamp() for c in period_cols}) if period_cols else df
+
+
+@register_backend('parquet', '.parquet')
+def write_parquet(df, path, partition_cols=None):
+    """Zstandard-compressed Parquet, as a hive-partitioned directory when partition_cols is set"""
+    frame = _parquet_frame(df)
+
+    tmp_path = f"{path}.tmp"
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+
+    if partition_cols:
+        frame, cols = _partition_frame(frame, partition_cols)
+        frame.to_parquet(tmp_path, index=False, compression='zstd', partition_cols=cols)
+    else:
+        frame.to_parquet(tmp_path, index=False, compression='zstd')
+    _replace_path(tmp_path, path)
+
+
+@register_appender('parquet')
+def append_parquet(df, path, partition_cols=None):
+    """New part files in a partitioned dataset (a single Parquet file is rewritten)"""
+    if not (partition_cols and os.path.isdir(path)):
+        write_parquet(pd.concat([pd.read_parquet(path), df], ignore_index=True), path)
+        return
+    frame, cols = _partition_frame(_parquet_frame(df), partition_cols)
+    frame.to_parquet(path, index=False, compression='zstd', partition_cols=cols,
+                     basename_template=f"part-{time.time_ns()}-{{i}}.parquet")
+
+
+def _hyper_rows(df):
+    """Hyper column definitions and row tuples for a frame"""
+    try:
+        from tableauhyperapi import SqlType, TableDefinition
+    except ImportError:
+        raise ImportError("hyper output needs tableauhyperapi (pip install tableauhyperapi)")
+
+    columns = []
+    values = {}
+    for col, dtype in df.dtypes.items():
+        series = df[col]
+        if pd.api.types.is_bool_dtype(dtype):
+            sql_type = SqlType.bool()
+        elif pd.api.types.is_integer_dtype(dtype):
+            sql_type = SqlType.big_int()
+        elif pd.api.types.is_float_dtype(dtype):
+            sql_type = SqlType.double()
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            sql_type = SqlType.timestamp()
+            series = series.dt.to_pydatetime()
+        elif isinstance(dtype, pd.PeriodDtype):
+            sql_type = SqlType.timestamp()
+            series = series.dt.to_timestamp().dt.to_pydatetime()
+        else:
+            sql_type = SqlType.text()
+            series = series.astype(str).where(series.notna())
+        columns.append(TableDefinition.Column(str(col), sql_type))
+        values[col] = pd.Series(series, dtype=object).where(pd.notna(series), None)
+    return columns, zip(*[values[col].tolist() for col in df.columns])
+
+
+@register_backend('hyper', '.hyper')
+def write_hyper(df, path, partition_cols=None):
+    """Tableau Hyper extract with a single 'Extract'.'Extract' table"""
+    columns, rows = _hyper_rows(df)
+    from tableauhyperapi import (Connection, CreateMode, HyperProcess, Inserter,
+                                 TableDefinition, TableName, Telemetry)
+    table = TableDefinition(TableName('Extract', 'Extract'), columns)
+
+    tmp_path = f"{path}.tmp.hyper"
+    with HyperProcess(telemetry=Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU) as hyper:
+        with Connection(hyper.endpoint, tmp_path, CreateMode.CREATE_AND_REPLACE) as connection:
+            connection.catalog.create_schema('Extract')
+            connection.catalog.create_table(table)
+            with Inserter(connection, table) as inserter:
+                inserter.add_rows(rows)
+                inserter.execute()
+    _replace_path(tmp_path, path)
+
+
+@register_appender('hyper')
+def append_hyper(df, path, partition_cols=None):
+    """Insert rows into the extract's 'Extract'.'Extract' table"""
+    _, rows = _hyper_rows(df)
+    from tableauhyperapi import Connection, CreateMode, HyperProcess, Inserter, TableName, Telemetry
+
+    _unshare(path)
+    with HyperProcess(telemetry=Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU) as hyper:
+        with Connection(hyper.endpoint, path, CreateMode.NONE) as connection:
+            with Inserter(connection, TableName('Extract', 'Extract')) as inserter:
+                inserter.add_rows(rows)
+                inserter.execute()
+
+
+def _link_or_copy(source, path):
+    """Hard-link path to an already written output (copy across devices)"""
+    if os.path.isdir(source):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        shutil.copytree(source, path, copy_function=os.link)
+        return 'linked'
+    if os.path.lexists(path):
+        os.remove(path)
+    try:
+        os.link(source, path)
+        return 'linked'
+    except OSError:
+        shutil.copyfile(source, path)
+        return 'copied'
+
+
+def _path_size(path):
+    """Bytes on disk for a file or partitioned directory"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def spec_fingerprint(spec):
+    """Content hash of a figure spec: the frames/series it draws plus any parameters"""
+    digest = hashlib.sha1()
+    for item in spec:
+        if isinstance(item, pd.Series):
+            item = item.to_frame()
+        if isinstance(item, pd.DataFrame):
+            digest.update(frame_fingerprint(item).encode())
+        else:
+            digest.update(repr(item).encode())
+    return digest.hexdigest()
+
+
+def matrix_frame(matrix):
+    """A labelled matrix (e.g. correlations) with its row labels as the first, unnamed column, as to_csv() writes it"""
+    return matrix.rename_axis('').reset_index()
+
+
+def code_fingerprint(code):
+    """Hash of a code object's bytecode, names and constants (nested functions included)"""
+    digest = hashlib.sha1(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            digest.update(code_fingerprint(const).encode())
+        elif isinstance(const, frozenset):
+            digest.update(repr(sorted(const, key=repr)).encode())
+        else:
+            digest.update(repr(const).encode())
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    """Read the output manifest (path -> content hash and file stat), if any"""
+    if manifest_path is None or not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_path):
+    """Atomically write the output manifest"""
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def _manifest_entry(path, content_hash):
+    entry = {'hash': content_hash}
+    if os.path.isfile(path):
+        st = os.stat(path)
+        entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    return entry
+
+
+def _done_future():
+    future = Future()
+    future.set_result(None)
+    return future
+
+
+class InputReader:
+    """
+    Background reads of input files.
+
+    prefetch() starts parsing a file on the thread pool and returns the
+    future; read() returns the parsed frame, waiting for a prefetched read or
+    reading synchronously if the file was never prefetched. A read error is
+    raised from read(), where the loader expects it.
+    """
+
+    def __init__(self, max_workers=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='input')
+        self._futures = {}
+
+    @staticmethod
+    def _key(path, reader, kwargs):
+        return (os.path.abspath(path), reader, repr(sorted(kwargs.items())))
+
+    def prefetch(self, path, reader=pd.read_csv, **kwargs):
+        """Start reading path in the background (returns the future)"""
+        key = self._key(path, reader, kwargs)
+        if key not in self._futures:
+            self._futures[key] = self._pool.submit(reader, path, **kwargs)
+        return self._futures[key]
+
+    def read(self, path, reader=pd.read_csv, **kwargs):
+        """Parsed file: the prefetched result if there is one (handed over once), else a direct read"""
+        future = self._futures.pop(self._key(path, reader, kwargs), None)
+        if future is None:
+            return reader(path, **kwargs)
+        return future.result()
+
+    def close(self):
+        """Drop unused prefetches and stop the pool"""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._pool.shutdown(wait=False)
+
+
+def read_input(inputs, path, reader=pd.read_csv, **kwargs):
+    """Read through an InputReader when one is given, else directly"""
+    if inputs is None:
+        return reader(path, **kwargs)
+    return inputs.read(path, reader, **kwargs)
+
+
+class OutputWriter:
+    """
+    Concurrent, de-duplicating writer for pipeline outputs.
+
+    write() queues a frame and returns immediately; flush() waits for every
+    queued write and returns the run report. Frames must not be modified
+    between write() and flush().
+
+    With a manifest_path, every output's content hash is recorded and an
+    output whose frame (or figure spec) hashes the same as last run, and whose
+    file is untouched on disk, is skipped instead of rewritten. force=True
+    rewrites everything (e.g. after changing how a figure is drawn).
+
+    Relative output paths are resolved against root (the configured
+    output_dir); the report lists them relative to root.
+    """
+
+    def __init__(self, formats=('csv',), max_workers=4, manifest_path=None, force=False, root=None):
+        unknown = [fmt for fmt in formats if fmt not in WRITER_BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown output format(s): {', '.join(unknown)}")
+        self.formats = list(formats)
+        self.manifest_path = manifest_path
+        self.manifest = load_manifest(manifest_path)
+        self.force = force
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self._first_written = {}  # (fingerprint, format, partitioning) -> (path, future)
+        self._futures = []
+        self.report = []
+
+    def _resolve(self, path):
+        return path if self.root is None else os.path.join(self.root, path)
+
+    def is_current(self, path, content_hash):
+        """True if path already holds this content according to the manifest"""
+        entry = self.manifest.get(path)
+        if self.force or entry is None or entry['hash'] != content_hash:
+            return False
+        if not os.path.exists(path):
+            return False
+        if os.path.isfile(path):
+            st = os.stat(path)
+            return st.st_size == entry.get('size') and st.st_mtime_ns == entry.get('mtime_ns')
+        return True
+
+    def _record(self, entry, content_hash):
+        with self._lock:
+            self.report.append(entry)
+            self.manifest[entry['path']] = _manifest_entry(entry['path'], content_hash)
+
+    def write(self, df, path, partition_cols=None):
+        """
+        Queue df for writing in every configured format.
+
+        path is given with its CSV extension (e.g. 'Tableau_Data/x.csv'); other
+        formats swap the extension. partition_cols is a list of column names,
+        or a dict of name -> Series of derived partition keys.
+        """
+        path = self._resolve(path)
+        fingerprint = frame_fingerprint(df)
+        partition_key = tuple(partition_cols) if partition_cols else ()
+        stem = os.path.splitext(path)[0]
+
+        for fmt in self.formats:
+            extension, backend = WRITER_BACKENDS[fmt]
+            target = stem + extension
+            key = (fingerprint, fmt, partition_key)
+            content_hash = hashlib.sha1(repr(key).encode()).hexdigest()
+            with self._lock:
+                first = self._first_written.get(key)
+
+            if self.is_current(target, content_hash):
+                self._record({'path': target, 'format': fmt, 'action': 'skipped', 'source': None,
+                              'bytes': _path_size(target), 'seconds': 0.0}, content_hash)
+                if first is None:
+                    with self._lock:
+                        self._first_written[key] = (target, _done_future())
+                continue
+
+            with self._lock:
+                if first is None:
+                    future = self._pool.submit(self._write_one, backend, df, target, fmt,
+                                               partition_cols, content_hash)
+                    self._first_written[key] = (target, future)
+                else:
+                    source, source_future = first
+                    future = self._pool.submit(self._link_one, source, source_future, target, fmt,
+                                               content_hash)
+                self._futures.append(future)
+
+    def _targets(self, path):
+        stem = os.path.splitext(self._resolve(path))[0]
+        return [(fmt, stem + WRITER_BACKENDS[fmt][0]) for fmt in self.formats]
+
+    def missing_outputs(self, paths):
+        """Outputs (in any configured format) that do not exist yet, so cannot be appended to"""
+        return [target for path in paths for _, target in self._targets(path)
+                if not os.path.exists(target)]
+
+    def append(self, df, path, partition_cols=None):
+        """
+        Queue rows to be added to an existing output in every configured format.
+
+        The manifest hash is chained from the file's previous hash, so the
+        next full run sees the output as changed and rewrites it whole.
+        """
+        fingerprint = frame_fingerprint(df)
+        for fmt, target in self._targets(path):
+            previous = self.manifest.get(target, {}).get('hash', '')
+            content_hash = hashlib.sha1(f"{previous}+{fingerprint}".encode()).hexdigest()
+            future = self._pool.submit(self._append_one, APPEND_BACKENDS[fmt], df, target, fmt,
+                                       partition_cols, content_hash)
+            with self._lock:
+                self._futures.append(future)
+
+    def save_figure(self, fig, path, spec=(), code=None, **savefig_kwargs):
+        """
+        Save a matplotlib figure unless its spec is unchanged since last run.
+
+        spec lists what the figure is drawn from (frames, series, labels); it
+        is hashed together with the savefig arguments and the bytecode of
+        code (default: the calling function or script), so a change to how
+        the figure is drawn also re-renders it. Runs in the calling thread
+        because matplotlib is not thread-safe.
+        """
+        path = self._resolve(path)
+        code = sys._getframe(1).f_code if code is None else code
+        content_hash = spec_fingerprint(list(spec) + [sorted(savefig_kwargs.items(), key=str),
+                                                      code_fingerprint(code)])
+        fmt = os.path.splitext(path)[1].lstrip('.')
+        if self.is_current(path, content_hash):
+            self._record({'path': path, 'format': fmt, 'action': 'skipped', 'source': None,
+                          'bytes': _path_size(path), 'seconds': 0.0}, content_hash)
+            return False
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        stem, extension = os.path.splitext(path)
+        tmp_path = f"{stem}.tmp{extension}"
+        fig.savefig(tmp_path, **savefig_kwargs)
+        _replace_path(tmp_path, path)
+        self._record({'path': path, 'format': fmt, 'action': 'written', 'source': None,
+                      'bytes': _path_size(path), 'seconds': time.perf_counter() - start}, content_hash)
+        return True
+
+    def _write_one(self, backend, df, path, fmt, partition_cols, content_hash):
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        backend(df, path, partition_cols)
+        self._record({'path': path, 'format': fmt, 'action': 'written', 'source': None,
+                      'bytes': _path_size(path), 'seconds': time.perf_counter() - start}, content_hash)
+
+    def _append_one(self, appender, df, path, fmt, partition_cols, content_hash):
+        start = time.perf_counter()
+        # One append at a time: hard-linked outputs are split apart before either grows
+        with self._append_lock:
+            size_before = _path_size(path)
+            appender(df, path, partition_cols)
+        self._record({'path': path, 'format': fmt, 'action': 'appended', 'source': None,
+                      'bytes': _path_size(path) - size_before,
+                      'seconds': time.perf_counter() - start}, content_hash)
+
+    def _link_one(self, source, source_future, path, fmt, content_hash):
+        start = time.perf_counter()
+        source_future.result()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        action = _link_or_copy(source, path)
+        self._record({'path': path, 'format': fmt, 'action': action, 'source': source,
+                      'bytes': 0 if action == 'linked' else _path_size(path),
+                      'seconds': time.perf_counter() - start}, content_hash)
+
+    def flush(self):
+        """Wait for all queued writes, save the manifest and return the report as a DataFrame"""
+        futures, self._futures = self._futures, []
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        if self.manifest_path is not None:
+            with self._lock:
+                save_manifest(self.manifest, self.manifest_path)
+        if errors:
+            raise errors[0]
+        report = pd.DataFrame(self.report, columns=['path', 'format', 'action', 'source',
+                                                    'bytes', 'seconds'])
+        if self.root is not None:
+            for col in ['path', 'source']:
+                report[col] = report[col].map(
+                    lambda p: os.path.relpath(p, self.root) if isinstance(p, str) else p)
+        return report
+
+    def content_hashes(self):
+        """Manifest content hash of every output recorded so far this run (keyed as in the manifest)"""
+        with self._lock:
+            return {entry['path']: self.manifest[entry['path']]['hash'] for entry in self.report}
+
+    def close(self):
+        """Flush outstanding writes and stop the thread pool"""
+        report = self.flush()
+        self._pool.shutdown()
+        return report
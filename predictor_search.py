@@ -0,0 +1,259 @@
+"""
+Little Luxuries Project - Predictor Subset Search
+==================================================
+Which few latent scores best predict CCI, unemployment or Census sales
+(PART 4B of the master analysis).
+
+Three searches run on the same sufficient statistics (stats_engine.CrossProducts):
+- forward stepwise: the Cholesky factor of the selected predictors' Gram
+  matrix grows by one row per step, and every candidate's RSS reduction is
+  read off one triangular solve instead of refitting each candidate model
+- relaxed LASSO: coordinate descent on the Gram matrix (covariance updates),
+  warm-started down a log-spaced grid of penalties, picks each support and
+  the support is refit by OLS (the penalised coefficients are shrunk most
+  exactly where the path first reaches a size)
+- bounded best subset: every subset up to a maximum size (capped per size),
+  solved as batched linear systems
+
+Out-of-sample error comes from blocked time-series cross-validation: the
+months are cut into contiguous folds whose cross-products are computed once;
+a fold's training statistics are the merge of the other folds, and its test
+error follows from its own statistics, so no model is refit on raw rows.
+Each (response, method) search runs as one task across a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+
+from stats_engine import CrossProducts
+
+SEARCH_METHODS = ['forward', 'lasso', 'best_subset']
+
+# Below this many tasks a process pool costs more than it saves
+PARALLEL_MIN_TASKS = 4
+
+
+# ========================================================================================================
+# SUFFICIENT-STATISTICS HELPERS
+# ========================================================================================================
+
+def fold_statistics(df, columns, n_folds):
+    """Cross-products of each contiguous block of complete rows (folds in time order)"""
+    complete = df[columns].dropna()
+    bounds = np.linspace(0, len(complete), n_folds + 1).astype(int)
+    return [CrossProducts(columns).update(complete.iloc[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def merge_statistics(folds, columns):
+    merged = CrossProducts(columns)
+    for fold in folds:
+        merged.merge(fold)
+    return merged
+
+
+def _gram(stats, predictors, response):
+    idx = [stats.index[col] for col in predictors]
+    y = stats.index[response]
+    return stats.cross[np.ix_(idx, idx)], stats.cross[idx, y], stats.cross[y, y]
+
+
+def _intercept(stats, predictors, response, beta):
+    idx = [stats.index[col] for col in predictors]
+    return stats.mean[stats.index[response]] - stats.mean[idx] @ beta
+
+
+def sse(stats, predictors, response, intercept, beta):
+    """
+    Sum of squared errors of y = intercept + X @ beta over the rows behind
+    stats, from their means and centered cross-products alone.
+    """
+    gram, cross_y, total = _gram(stats, predictors, response)
+    offset = stats.mean[stats.index[response]] - intercept - \
+        stats.mean[[stats.index[col] for col in predictors]] @ beta
+    return total - 2 * beta @ cross_y + beta @ gram @ beta + stats.n * offset ** 2
+
+
+def ols(stats, predictors, response):
+    """OLS (intercept, slopes) of response on const + predictors"""
+    if not predictors:
+        return stats.mean[stats.index[response]], np.zeros(0)
+    gram, cross_y, _ = _gram(stats, predictors, response)
+    beta = np.linalg.lstsq(gram, cross_y, rcond=None)[0]
+    return _intercept(stats, predictors, response, beta), beta
+
+
+# ========================================================================================================
+# SEARCH METHODS (each returns {size: (predictors, intercept, beta)})
+# ========================================================================================================
+
+def forward_stepwise(stats, predictors, response, max_size):
+    """Greedy forward selection with rank-one extensions of the Cholesky factor"""
+    gram, cross_y, _ = _gram(stats, predictors, response)
+    p = len(predictors)
+    selected = []
+    chol = np.zeros((0, 0))
+    z = np.zeros(0)                       # chol^-1 @ cross_y[selected]
+    models = {}
+
+    for size in range(1, min(max_size, p) + 1):
+        candidates = np.array([j for j in range(p) if j not in selected])
+        if len(selected):
+            w = solve_triangular(chol, gram[np.ix_(selected, candidates)], lower=True)
+        else:
+            w = np.zeros((0, len(candidates)))
+        pivot = gram[candidates, candidates] - (w * w).sum(axis=0)
+        usable = pivot > 1e-10 * np.maximum(gram[candidates, candidates], 1e-300)
+        if not usable.any():
+            break
+        gain = np.where(usable, (cross_y[candidates] - w.T @ z) ** 2 / np.where(usable, pivot, 1), -np.inf)
+        best = int(np.argmax(gain))
+        j = candidates[best]
+        d = np.sqrt(pivot[best])
+
+        # Extend the factor by one row: [[L, 0], [w', d]]
+        new_chol = np.zeros((size, size))
+        new_chol[:-1, :-1] = chol
+        new_chol[-1, :-1] = w[:, best]
+        new_chol[-1, -1] = d
+        chol = new_chol
+        z = np.append(z, (cross_y[j] - w[:, best] @ z) / d)
+        selected.append(j)
+
+        beta = solve_triangular(chol.T, z, lower=False)
+        names = [predictors[i] for i in selected]
+        models[size] = (names, _intercept(stats, names, response, beta), beta)
+    return models
+
+
+def lasso_path(stats, predictors, response, max_size, n_lambdas=60, eps=1e-3, max_iter=500, tol=1e-8):
+    """
+    Relaxed LASSO: the path runs on standardized predictors by
+    covariance-update coordinate descent, and for every support size up to
+    max_size the first support on the path with that many non-zero
+    coefficients is refit by OLS (like best_subsets).
+    """
+    gram, cross_y, _ = _gram(stats, predictors, response)
+    n = stats.n
+    scale = np.sqrt(np.diag(gram) / n)
+    scale[scale == 0] = 1.0
+    q = gram / (n * np.outer(scale, scale))
+    c = cross_y / (n * scale)
+
+    lambda_max = np.abs(c).max()
+    lambdas = lambda_max * np.logspace(0, np.log10(eps), n_lambdas)
+    b = np.zeros(len(predictors))
+    residual = c.copy()                   # c - q @ b
+    models = {}
+
+    for lam in lambdas:
+        for _ in range(max_iter):
+            max_change = 0.0
+            for j in range(len(b)):
+                rho = residual[j] + q[j, j] * b[j]
+                new = np.sign(rho) * max(abs(rho) - lam, 0.0) / q[j, j]
+                if new != b[j]:
+                    residual -= q[:, j] * (new - b[j])
+                    max_change = max(max_change, abs(new - b[j]))
+                    b[j] = new
+            if max_change < tol:
+                break
+
+        support = np.flatnonzero(b)
+        size = len(support)
+        if 0 < size <= max_size and size not in models:
+            names = [predictors[i] for i in support]
+            models[size] = (names, *ols(stats, names, response))
+        if size > max_size:
+            break
+    return models
+
+
+def best_subsets(stats, predictors, response, max_size, max_subsets=20000):
+    """Lowest-RSS subset of each size up to max_size (at most max_subsets candidates per size)"""
+    models = {}
+    for size in range(1, min(max_size, len(predictors)) + 1):
+        subsets = [list(subset) for subset in islice(combinations(predictors, size), max_subsets)]
+        fits = stats.fit_subsets([response], subsets)
+        names = subsets[int(fits['RSS'].to_numpy().argmin())]
+        models[size] = (names, *ols(stats, names, response))
+    return models
+
+
+def _run_method(method, stats, predictors, response, max_size, max_subsets):
+    if method == 'forward':
+        return forward_stepwise(stats, predictors, response, max_size)
+    if method == 'lasso':
+        return lasso_path(stats, predictors, response, max_size)
+    if method == 'best_subset':
+        return best_subsets(stats, predictors, response, max_size, max_subsets)
+    raise ValueError(f"Unknown search method: {method} (choose from {', '.join(SEARCH_METHODS)})")
+
+
+def _search_task(task):
+    """Pool task: one method for one response, on every CV fold and on the full sample"""
+    response, method, folds, predictors, max_size, max_subsets = task
+    columns = folds[0].columns
+    full = merge_statistics(folds, columns)
+    total = full.cross[full.index[response], full.index[response]]
+
+    # Test error of the size-k model chosen on the other folds, summed over folds
+    test_sse = {}
+    test_n = {}
+    for k, fold in enumerate(folds):
+        if fold.n == 0:
+            continue
+        train = merge_statistics(folds[:k] + folds[k + 1:], columns)
+        for size, (names, intercept, beta) in _run_method(method, train, predictors, response,
+                                                          max_size, max_subsets).items():
+            test_sse[size] = test_sse.get(size, 0.0) + sse(fold, names, response, intercept, beta)
+            test_n[size] = test_n.get(size, 0) + fold.n
+
+    rows = []
+    for size, (names, intercept, beta) in _run_method(method, full, predictors, response,
+                                                      max_size, max_subsets).items():
+        rows.append({
+            'Response': response,
+            'Method': method,
+            'Size': size,
+            'Predictors': ' + '.join(names),
+            'Train_R²': 1 - sse(full, names, response, intercept, beta) / total,
+            'CV_RMSE': np.sqrt(test_sse[size] / test_n[size]) if test_n.get(size) else np.nan,
+            'CV_Months': test_n.get(size, 0),
+            'N': full.n,
+        })
+    return rows
+
+
+def search_predictors(df, responses, predictors, methods=SEARCH_METHODS, max_size=5, n_folds=5,
+                      best_subset_size=3, max_subsets=20000, n_workers=None):
+    """
+    Run every search method for every response over the given predictors.
+
+    Returns one row per response, method and subset size with the selected
+    predictors, in-sample R² and blocked-CV RMSE (months in time order; each
+    response uses the months where it and all predictors are present).
+    """
+    tasks = []
+    for response in responses:
+        columns = list(predictors) + [response]
+        folds = fold_statistics(df, columns, n_folds)
+        for method in methods:
+            size = best_subset_size if method == 'best_subset' else max_size
+            tasks.append((response, method, folds, list(predictors), size, max_subsets))
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(tasks))
+
+    if n_workers <= 1 or len(tasks) < PARALLEL_MIN_TASKS:
+        results = [_search_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_search_task, tasks))
+    return pd.DataFrame([row for rows in results for row in rows])
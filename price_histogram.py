@@ -0,0 +1,161 @@
+"""
+Little Luxuries Project - Price Distribution Histograms
+========================================================
+Streaming price distributions for PART 3C of the master analysis.
+
+Prices are counted in a fixed log-spaced histogram (bins_per_decade bins per
+factor of 10), one row of counts per group (luxury category, month, ...).
+Memory is constant in the number of transactions: update() takes any chunk
+of rows with one bincount, and histograms from separate chunks, files or
+processes merge by adding their counts. Quantiles are read off the
+cumulative counts with a relative error below one bin width (~2.3% at 100
+bins per decade).
+
+Sweet spots are the peaks of a Gaussian kernel density estimate computed on
+the binned counts in log-price space (a convolution over the bins, not a pass
+over the rows).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks
+
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+# KDE bandwidth in decades of price (0.05 = a factor of 10**0.05, about ±12%)
+BANDWIDTH_DECADES = 0.05
+
+
+class LogHistogram:
+    """Mergeable log-spaced price histograms, one row of bin counts per group"""
+
+    def __init__(self, groups=('all',), min_value=0.01, max_value=1e7, bins_per_decade=100):
+        self.groups = list(groups)
+        self.min_value = min_value
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = int(np.ceil(np.log10(max_value / min_value) * bins_per_decade))
+        self.edges = min_value * 10 ** (np.arange(self.n_bins + 1) / bins_per_decade)
+        # Column 0 holds values below min_value (incl. zero), the last column values above max_value
+        self.counts = np.zeros((len(self.groups), self.n_bins + 2), dtype=np.int64)
+        self.sums = np.zeros(len(self.groups))
+        self._group_index = {group: i for i, group in enumerate(self.groups)}
+
+    def update(self, values, groups=None):
+        """Count a chunk of values (groups: the group of each value; default the first group)"""
+        values = np.asarray(values, dtype=float)
+        if groups is None:
+            group_codes = np.zeros(len(values), dtype=np.int64)
+        else:
+            group_codes = pd.Series(groups).map(self._group_index).to_numpy(dtype=float)
+            valid = ~np.isnan(group_codes)
+            values, group_codes = values[valid], group_codes[valid].astype(np.int64)
+        finite = np.isfinite(values)
+        values, group_codes = values[finite], group_codes[finite]
+
+        with np.errstate(divide='ignore'):
+            bins = np.floor(np.log10(np.maximum(values, 0) / self.min_value) * self.bins_per_decade)
+        bins = np.clip(np.nan_to_num(bins, neginf=-1) + 1, 0, self.n_bins + 1).astype(np.int64)
+        width = self.n_bins + 2
+        self.counts += np.bincount(group_codes * width + bins,
+                                   minlength=len(self.groups) * width).reshape(-1, width)
+        self.sums += np.bincount(group_codes, weights=values, minlength=len(self.groups))
+        return self
+
+    def merge(self, other):
+        """Add another histogram's counts (same bins; groups are matched by name)"""
+        if (other.min_value, other.bins_per_decade, other.n_bins) != \
+                (self.min_value, self.bins_per_decade, self.n_bins):
+            raise ValueError("Histograms with different bins cannot be merged")
+        for i, group in enumerate(other.groups):
+            if group not in self._group_index:
+                self._group_index[group] = len(self.groups)
+                self.groups.append(group)
+                self.counts = np.vstack([self.counts, np.zeros(self.n_bins + 2, dtype=np.int64)])
+                self.sums = np.append(self.sums, 0.0)
+            self.counts[self._group_index[group]] += other.counts[i]
+            self.sums[self._group_index[group]] += other.sums[i]
+        return self
+
+    def total(self, group):
+        return int(self.counts[self._group_index[group]].sum())
+
+    def mean(self, group):
+        n = self.total(group)
+        return self.sums[self._group_index[group]] / n if n else np.nan
+
+    def quantiles(self, group, qs=QUANTILES):
+        """Quantiles of a group, interpolated geometrically within the bin"""
+        counts = self.counts[self._group_index[group]]
+        n = counts.sum()
+        if n == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(counts)
+        results = []
+        for q in qs:
+            target = q * n
+            b = int(np.searchsorted(cumulative, target, side='left'))
+            if b == 0:
+                results.append(self.edges[0])
+            elif b == self.n_bins + 1:
+                results.append(self.edges[-1])
+            else:
+                before = cumulative[b - 1]
+                frac = (target - before) / counts[b] if counts[b] else 0.0
+                low, high = self.edges[b - 1], self.edges[b]
+                results.append(low * (high / low) ** frac)
+        return np.array(results)
+
+    def density(self, group, bandwidth_decades=BANDWIDTH_DECADES):
+        """
+        Gaussian KDE of log10(price) evaluated at the bin centers, from the
+        binned counts (densities integrate to 1 over log10 price).
+        """
+        counts = self.counts[self._group_index[group], 1:-1].astype(float)
+        sigma = bandwidth_decades * self.bins_per_decade
+        radius = int(np.ceil(4 * sigma))
+        kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+        kernel /= kernel.sum()
+        smoothed = np.convolve(counts, kernel, mode='same')
+        total = counts.sum()
+        return smoothed / total * self.bins_per_decade if total else smoothed
+
+    def centers(self):
+        return np.sqrt(self.edges[:-1] * self.edges[1:])
+
+    def peaks(self, group, bandwidth_decades=BANDWIDTH_DECADES, min_prominence=0.05):
+        """
+        Sweet spots: KDE peaks of a group, most prominent first, as
+        (price, density, share of transactions within one bandwidth).
+        """
+        density = self.density(group, bandwidth_decades)
+        if not density.any():
+            return []
+        found, props = find_peaks(density, prominence=min_prominence * density.max())
+        counts = self.counts[self._group_index[group], 1:-1]
+        half = int(round(bandwidth_decades * self.bins_per_decade))
+        total = counts.sum()
+        peaks = []
+        for b in found[np.argsort(props['prominences'])[::-1]]:
+            share = counts[max(b - half, 0):b + half + 1].sum() / total
+            peaks.append((self.centers()[b], density[b], share))
+        return peaks
+
+    def frame(self, group_name='group'):
+        """Occupied bin range of every group in long form (bin edges, count, KDE density)"""
+        rows = []
+        centers = self.centers()
+        for i, group in enumerate(self.groups):
+            counts = self.counts[i, 1:-1]
+            occupied = np.flatnonzero(counts)
+            if len(occupied) == 0:
+                continue
+            span = slice(occupied[0], occupied[-1] + 1)
+            rows.append(pd.DataFrame({
+                group_name: group,
+                'bin_low': self.edges[:-1][span],
+                'bin_high': self.edges[1:][span],
+                'bin_center': centers[span],
+                'count': counts[span],
+                'kde_density': self.density(group)[span],
+            }))
+        return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
@@ -0,0 +1,211 @@
+"""
+Little Luxuries Project - Frequency Alignment and Resampling
+=============================================================
+One layer for putting series of any frequency on a common calendar (monthly
+for the master analysis): daily retail transactions, monthly Google Trends
+and FRED series, quarterly e-commerce sales (ECOMSA), and weekly or daily
+feeds added later.
+
+Dates become integer period codes (days, Monday-start weeks, months,
+quarters or years since 1970), so aggregating is a bincount over the codes
+and aligning is a gather by code, with no merge on exact dates. Every column
+declares its rule:
+- sum: totals per period; a coarser series is spread evenly over its sub-periods
+- mean: average per period; a coarser series repeats its value
+- last / first / min / max: picks within the period; a coarser series repeats
+- interpolate: period means, with gaps (and the months between a coarser
+  series' observations) filled linearly
+Results cover every period from the first to the last one observed, so a
+missing period is an explicit NaN row instead of a row lost in a merge.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Finest to coarsest
+FREQUENCIES = ['D', 'W', 'M', 'Q', 'A']
+RULES = ['sum', 'mean', 'last', 'first', 'min', 'max', 'interpolate']
+
+# Code of a missing date (codes before 1970 are negative, so -1 cannot mark it)
+MISSING = np.iinfo(np.int64).min
+
+# Largest median spacing in days between observations at each frequency
+SPACING_DAYS = {'D': 1.5, 'W': 8, 'M': 32, 'Q': 93}
+
+
+def _check_frequency(freq):
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {freq} (choose from {', '.join(FREQUENCIES)})")
+
+
+def period_codes(dates, freq='M'):
+    """Integer period of each date since 1970 at the given frequency (MISSING for NaT)"""
+    _check_frequency(freq)
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    if freq in ('D', 'W'):
+        codes = dates.astype('datetime64[D]').astype(np.int64)
+        if freq == 'W':
+            codes = (codes + 3) // 7             # 1970-01-01 was a Thursday; weeks start on Monday
+    elif freq in ('M', 'Q'):
+        codes = dates.astype('datetime64[M]').astype(np.int64)
+        if freq == 'Q':
+            codes = codes // 3
+    else:
+        codes = dates.astype('datetime64[Y]').astype(np.int64)
+    return np.where(np.isnat(dates), MISSING, codes)
+
+
+def period_start(codes, freq='M'):
+    """First day of each period code as datetime64[ns]"""
+    _check_frequency(freq)
+    codes = np.asarray(codes, dtype=np.int64)
+    if freq == 'D':
+        starts = codes.astype('datetime64[D]')
+    elif freq == 'W':
+        starts = (codes * 7 - 3).astype('datetime64[D]')
+    elif freq == 'M':
+        starts = codes.astype('datetime64[M]')
+    elif freq == 'Q':
+        starts = (codes * 3).astype('datetime64[M]')
+    else:
+        starts = codes.astype('datetime64[Y]')
+    return starts.astype('datetime64[ns]')
+
+
+def floor_dates(dates, freq='M'):
+    """Each date moved to the start of its period (NaT stays NaT), e.g. the month of a transaction"""
+    codes = period_codes(dates, freq)
+    starts = period_start(np.where(codes == MISSING, 0, codes), freq)
+    starts[codes == MISSING] = np.datetime64('NaT')
+    return pd.Series(starts, index=getattr(dates, 'index', None))
+
+
+def infer_frequency(dates):
+    """Frequency of a series from the median spacing of its dates (None with fewer than two dates)"""
+    days = np.unique(pd.to_datetime(pd.Series(dates)).dropna().to_numpy().astype('datetime64[D]'))
+    if len(days) < 2:
+        return None
+    spacing = np.median(np.diff(days).astype(np.int64))
+    return next((freq for freq, limit in SPACING_DAYS.items() if spacing <= limit), 'A')
+
+
+def _aggregate(values, group, n, rule):
+    """Per-group value of one column under a rule (rows in date order; NaN values are ignored)"""
+    valid = ~np.isnan(values)
+    values, group = values[valid], group[valid]
+    count = np.bincount(group, minlength=n)
+    result = np.full(n, np.nan)
+    if rule in ('sum', 'mean', 'interpolate'):
+        total = np.bincount(group, weights=values, minlength=n)
+        result[count > 0] = total[count > 0] if rule == 'sum' else total[count > 0] / count[count > 0]
+    elif rule in ('last', 'first'):
+        positions = np.arange(len(values))
+        pick = np.full(n, -1 if rule == 'last' else len(values), dtype=np.int64)
+        (np.maximum if rule == 'last' else np.minimum).at(pick, group, positions)
+        result[count > 0] = values[pick[count > 0]]
+    elif rule in ('min', 'max'):
+        (np.fmin if rule == 'min' else np.fmax).at(result, group, values)
+    else:
+        raise ValueError(f"Unknown resampling rule: {rule} (choose from {', '.join(RULES)})")
+    return result
+
+
+def _fill_linear(values):
+    """Interior NaNs filled by linear interpolation between the neighbouring observations"""
+    known = np.flatnonzero(~np.isnan(values))
+    if len(known) < 2:
+        return values
+    inside = np.arange(known[0], known[-1] + 1)
+    values = values.copy()
+    values[inside] = np.interp(inside, known, values[known])
+    return values
+
+
+def resample(df, date_col, rules, freq='M', source_freq=None, date_name='date'):
+    """
+    Columns of df at the target frequency under their rules ({column: rule}),
+    on the complete grid of periods the series covers. source_freq is
+    inferred from the spacing of the dates when not given.
+    """
+    _check_frequency(freq)
+    source_freq = source_freq or infer_frequency(df[date_col]) or freq
+    _check_frequency(source_freq)
+    coarser = FREQUENCIES.index(source_freq) > FREQUENCIES.index(freq)
+    step_freq = source_freq if coarser else freq
+
+    dates = pd.to_datetime(df[date_col]).to_numpy()
+    order = np.argsort(dates, kind='stable')              # 'last' / 'first' follow the dates
+    codes = period_codes(dates[order], step_freq)
+    dated = codes != MISSING
+    order, codes = order[dated], codes[dated]
+    if len(codes) == 0:
+        return pd.DataFrame({date_name: pd.Series(dtype='datetime64[ns]'), **{col: [] for col in rules}})
+    first, last = int(codes[0]), int(codes[-1])
+    steps = np.arange(first, last + 1)
+
+    if coarser:
+        # Target periods from the start of the first source period to the end of the last one
+        grid = np.arange(period_codes(period_start([first], step_freq), freq)[0],
+                         period_codes(period_start([last + 1], step_freq), freq)[0])
+        parent = period_codes(period_start(grid, freq), step_freq) - first
+        children = np.bincount(parent, minlength=len(steps))
+        anchors = period_codes(period_start(steps, step_freq), freq) - grid[0]
+    else:
+        grid = steps
+
+    columns = {}
+    for col, rule in rules.items():
+        source = df[col].to_numpy()
+        values = _aggregate(source.astype(float)[order], codes - first, len(steps), rule)
+        if coarser:
+            if rule == 'interpolate':
+                placed = np.full(len(grid), np.nan)
+                placed[anchors] = values
+                values = placed
+            elif rule == 'sum':
+                values = values[parent] / children[parent]
+            else:
+                values = values[parent]
+        if rule == 'interpolate':
+            values = _fill_linear(values)
+        columns[col] = _restore_dtype(values, source.dtype)
+    return pd.DataFrame({date_name: period_start(grid, freq), **columns})
+
+
+def _restore_dtype(values, dtype):
+    """Float results keep a float source dtype; integer sources stay integer when nothing is missing or fractional"""
+    if dtype.kind == 'f':
+        return values.astype(dtype)
+    if dtype.kind in 'iu' and not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+
+def align(resampled, dates, freq='M', date_col='date'):
+    """
+    Columns of a resample() result for each of the given dates, gathered by
+    period code (NaN for dates outside the series), indexed like dates.
+    """
+    grid = period_codes(resampled[date_col], freq)
+    codes = period_codes(dates, freq)
+    positions = codes - (grid[0] if len(grid) else 0)
+    inside = (codes != MISSING) & (positions >= 0) & (positions < len(grid))
+    aligned = {}
+    for col in resampled.columns.drop(date_col):
+        source = resampled[col].to_numpy()
+        values = np.full(len(codes), np.nan)
+        values[inside] = source[positions[inside]]
+        aligned[col] = _restore_dtype(values, source.dtype)
+    return pd.DataFrame(aligned, index=getattr(dates, 'index', None))
+
+
+def last_period(dates, freq='M', source_freq=None):
+    """Start of the last target period a series covers (a quarterly date covers its three months)"""
+    source_freq = source_freq or infer_frequency(dates) or freq
+    codes = period_codes(dates, source_freq)
+    last = codes[codes != MISSING].max()
+    if FREQUENCIES.index(source_freq) > FREQUENCIES.index(freq):
+        end = period_codes(period_start([last + 1], source_freq), freq)[0] - 1
+    else:
+        end = period_codes(period_start([last], source_freq), freq)[0]
+    return pd.Timestamp(period_start([end], freq)[0])
@@ -14,10 +14,26 @@ import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
 import matplotlib.dates as mdates
 from matplotlib.patches import Patch
 import os
+from indicator_labels import rank_search_indicators
+from pipeline_config import load_config
+from pipeline_context import open_context, census_wide_frame
+from pipeline_io import OutputWriter, matrix_frame
+from stats_engine import correlation_matrices
+
+# Input/output roots come from littleluxuries.json (or $LITTLELUXURIES_CONFIG)
+config = load_config()
+for folder in ['Viz', 'Processed_Data', 'Tableau_Data']:
+    os.makedirs(config.output_path(folder), exist_ok=True)
+
+# Same writer and manifest as the master analysis: unchanged figures and tables are not rewritten
+writer = OutputWriter(formats=config.output_formats, max_workers=config.io_workers,
+                      manifest_path=config.manifest, root=config.output_dir)
+
+# Frames the master analysis left in memory (or shared via Arrow); CSVs are read only as a fallback
+context = open_context(config.context_dir if config.share_context else None, manifest_path=config.manifest)
 
 # Set style and custom color palette
 plt.style.use('default')
@@ -54,8 +70,8 @@ print("This may take a few moments...\n")
 print("\n[1/5] Creating Lipstick & Mini Skirts Time Series with Recession Timeline...")
 
 # Load data
-df = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\master_dataset_complete.csv')
-df['date'] = pd.to_datetime(df['date'])
+df = context.load('master', config.output_path('Processed_Data', 'master_dataset_complete.csv'))
+df = df.assign(date=pd.to_datetime(df['date']))
 
 # Define recession periods
 recessions = [
@@ -68,48 +84,54 @@ for recession in recessions:
     recession['start'] = pd.to_datetime(recession['start'])
     recession['end'] = pd.to_datetime(recession['end'])
 
-# Create figure
-fig, ax = plt.subplots(figsize=(16, 8))
-
-# Plot search scores
-ax.plot(df['date'], df['Lipstick Index_score'],
-        label='Lipstick Index', linewidth=2.5, color=PINK_HOT, alpha=0.9)
-ax.plot(df['date'], df['Mini Skirts_score'],
-        label='Mini Skirts', linewidth=2.5, color=PURPLE_DARK, alpha=0.9)
-
-# Add recession periods
-for recession in recessions:
-    if recession['end'] >= df['date'].min() and recession['start'] <= df['date'].max():
-        ax.axvspan(recession['start'], recession['end'],
-                  alpha=0.2, color=GRAY_MEDIUM, label='_nolegend_')
-        mid_date = recession['start'] + (recession['end'] - recession['start']) / 2
-        y_position = ax.get_ylim()[1] * 0.95
-        ax.text(mid_date, y_position, recession['name'],
-               horizontalalignment='center', fontsize=10,
-               fontweight='bold', alpha=0.7, color=GRAY_DARK)
-
-# Customize plot
-ax.set_xlabel('Date', fontsize=14, fontweight='bold')
-ax.set_ylabel('Search Score (Standardized)', fontsize=14, fontweight='bold')
-ax.set_title('Search Trends: Lipstick Index vs. Mini Skirts\nSuperimposed on Recession Timeline (2004-2024)',
-            fontsize=16, fontweight='bold', pad=20)
-ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-ax.xaxis.set_major_locator(mdates.YearLocator(2))
-plt.xticks(rotation=45, ha='right')
-ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
-
-# Add legend
-recession_patch = Patch(color=GRAY_MEDIUM, alpha=0.2, label='Recession Period')
-handles, labels = ax.get_legend_handles_labels()
-handles.append(recession_patch)
-labels.append('Recession Period')
-ax.legend(handles, labels, loc='upper left', fontsize=12, framealpha=0.9)
-
-plt.tight_layout()
-plt.savefig(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\lipstick_miniskirt_recession_timeseries.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print("   [OK] Saved: Viz/lipstick_miniskirt_recession_timeseries.png")
+# The two hand-picked series only exist with the fixed indicator groups (not after --auto-indicators)
+timeseries_columns = ['Lipstick Index_score', 'Mini Skirts_score']
+if all(col in df.columns for col in timeseries_columns):
+    # Create figure
+    fig, ax = plt.subplots(figsize=(16, 8))
+
+    # Plot search scores
+    ax.plot(df['date'], df['Lipstick Index_score'],
+            label='Lipstick Index', linewidth=2.5, color=PINK_HOT, alpha=0.9)
+    ax.plot(df['date'], df['Mini Skirts_score'],
+            label='Mini Skirts', linewidth=2.5, color=PURPLE_DARK, alpha=0.9)
+
+    # Add recession periods
+    for recession in recessions:
+        if recession['end'] >= df['date'].min() and recession['start'] <= df['date'].max():
+            ax.axvspan(recession['start'], recession['end'],
+                      alpha=0.2, color=GRAY_MEDIUM, label='_nolegend_')
+            mid_date = recession['start'] + (recession['end'] - recession['start']) / 2
+            y_position = ax.get_ylim()[1] * 0.95
+            ax.text(mid_date, y_position, recession['name'],
+                   horizontalalignment='center', fontsize=10,
+                   fontweight='bold', alpha=0.7, color=GRAY_DARK)
+
+    # Customize plot
+    ax.set_xlabel('Date', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Search Score (Standardized)', fontsize=14, fontweight='bold')
+    ax.set_title('Search Trends: Lipstick Index vs. Mini Skirts\nSuperimposed on Recession Timeline (2004-2024)',
+                fontsize=16, fontweight='bold', pad=20)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+    ax.xaxis.set_major_locator(mdates.YearLocator(2))
+    plt.xticks(rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
+
+    # Add legend
+    recession_patch = Patch(color=GRAY_MEDIUM, alpha=0.2, label='Recession Period')
+    handles, labels = ax.get_legend_handles_labels()
+    handles.append(recession_patch)
+    labels.append('Recession Period')
+    ax.legend(handles, labels, loc='upper left', fontsize=12, framealpha=0.9)
+
+    plt.tight_layout()
+    saved = writer.save_figure(fig, 'Viz/lipstick_miniskirt_recession_timeseries.png',
+                               spec=(df[['date'] + timeseries_columns], recessions), dpi=300, bbox_inches='tight')
+    plt.close()
+
+    print(f"   [OK] {'Saved' if saved else 'Unchanged'}: Viz/lipstick_miniskirt_recession_timeseries.png")
+else:
+    print("   [SKIP] Lipstick Index / Mini Skirts scores not in the master dataset (clustered indicator groups)")
 
 # ============================================================================
 # PART 2: FASHION-ECONOMIC CORRELATIONS
@@ -117,15 +139,12 @@ print("   [OK] Saved: Viz/lipstick_miniskirt_recession_timeseries.png")
 print("\n[2/5] Analyzing Fashion vs Economic Correlations...")
 
 # Fashion and economic indicators
-fashion_indicators = [
-    'Indie Sleaze_score', 'Lipstick Index_score', 'Maxi Skirt_score',
-    'Big Bag_score', 'High Heel Index_score', 'Peplums_score',
-    'Blazers_score', 'Mini Skirts_score'
-]
+# Every indicator group scored in the master dataset (fixed groups or --auto-indicators clusters)
+fashion_indicators = [col for col in df.columns if col.endswith('_score')]
 
 economic_indicators = [
     'cci', 'cpi', 'inflation_rate_yoy', 'consumer_sentiment',
-    'unemployment_rate', 'retail_sales_clothing', 'retail_sales_real',
+    'unemployment_rate', 'retail_sales_clothing', 'retail_sales_clothing_real',
     'personal_saving_rate'
 ]
 
@@ -142,7 +161,7 @@ econ_label_mapping = {
     'cci': 'Consumer Confidence', 'cpi': 'CPI',
     'inflation_rate_yoy': 'Inflation Rate (YoY)', 'consumer_sentiment': 'Consumer Sentiment',
     'unemployment_rate': 'Unemployment Rate', 'retail_sales_clothing': 'Retail Sales (Clothing)',
-    'retail_sales_real': 'Real Retail Sales', 'personal_saving_rate': 'Personal Saving Rate'
+    'retail_sales_clothing_real': 'Real Retail Sales', 'personal_saving_rate': 'Personal Saving Rate'
 }
 economic_labels = [econ_label_mapping[col] for col in economic_indicators]
 
@@ -161,10 +180,11 @@ plt.xticks(rotation=45, ha='right')
 plt.yticks(rotation=0)
 plt.tight_layout()
 
-plt.savefig(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\fashion_economic_correlation_heatmap.png', dpi=300, bbox_inches='tight')
+saved = writer.save_figure(fig, 'Viz/fashion_economic_correlation_heatmap.png',
+                           spec=(fashion_econ_corr, fashion_labels, economic_labels), dpi=300, bbox_inches='tight')
 plt.close()
 
-print("   [OK] Saved: Viz/fashion_economic_correlation_heatmap.png")
+print(f"   [OK] {'Saved' if saved else 'Unchanged'}: Viz/fashion_economic_correlation_heatmap.png")
 
 # Find top correlations
 correlations_flat = []
@@ -204,29 +224,23 @@ for i, (idx, row) in enumerate(top_20.iterrows()):
     ax2.text(x_pos, i, f'{value:.3f}', va='center', ha=ha, fontsize=8, fontweight='bold')
 
 plt.tight_layout()
-plt.savefig(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\fashion_economic_top_correlations.png', dpi=300, bbox_inches='tight')
+saved = writer.save_figure(fig2, 'Viz/fashion_economic_top_correlations.png', spec=(top_20,),
+                           dpi=300, bbox_inches='tight')
 plt.close()
 
-print("   [OK] Saved: Viz/fashion_economic_top_correlations.png")
+print(f"   [OK] {'Saved' if saved else 'Unchanged'}: Viz/fashion_economic_top_correlations.png")
 
 # Save correlation data
-fashion_econ_corr.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\fashion_economic_correlations.csv')
-print("   [OK] Saved: Processed_Data/fashion_economic_correlations.csv")
+writer.write(matrix_frame(fashion_econ_corr), 'Processed_Data/fashion_economic_correlations.csv')
+print("   [OK] Queued: Processed_Data/fashion_economic_correlations.csv")
 
 # ============================================================================
 # PART 3: BINARY SIGNIFICANCE MATRIX (MASTER DATA)
 # ============================================================================
 print("\n[3/5] Creating Binary Significance Matrix (2004-2024 data)...")
 
-# Calculate p-values
-p_value_matrix = pd.DataFrame(index=fashion_indicators, columns=economic_indicators)
-
-for fashion_var in fashion_indicators:
-    for econ_var in economic_indicators:
-        corr, p_value = stats.pearsonr(df_corr[fashion_var], df_corr[econ_var])
-        p_value_matrix.loc[fashion_var, econ_var] = p_value
-
-p_value_matrix = p_value_matrix.astype(float)
+# Calculate p-values (all pairs from one pass of sufficient statistics)
+_, p_value_matrix = correlation_matrices(df_corr, fashion_indicators, economic_indicators)
 
 # Create binary significance matrix
 binary_significance = (p_value_matrix < 0.05).astype(int)
@@ -255,13 +269,14 @@ plt.xticks(rotation=45, ha='right', fontsize=11)
 plt.yticks(rotation=0, fontsize=11)
 plt.tight_layout()
 
-plt.savefig(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\binary_significance_matrix.png', dpi=300, bbox_inches='tight')
+saved = writer.save_figure(fig, 'Viz/binary_significance_matrix.png',
+                           spec=(binary_significance, fashion_labels, economic_labels), dpi=300, bbox_inches='tight')
 plt.close()
 
-print("   [OK] Saved: Viz/binary_significance_matrix.png")
+print(f"   [OK] {'Saved' if saved else 'Unchanged'}: Viz/binary_significance_matrix.png")
 
-binary_significance.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\binary_significance_matrix.csv')
-print("   [OK] Saved: Processed_Data/binary_significance_matrix.csv")
+writer.write(matrix_frame(binary_significance), 'Processed_Data/binary_significance_matrix.csv')
+print("   [OK] Queued: Processed_Data/binary_significance_matrix.csv")
 
 # ============================================================================
 # PART 4: CENSUS DATA SIGNIFICANCE MATRIX (1992-2025)
@@ -269,39 +284,23 @@ print("   [OK] Saved: Processed_Data/binary_significance_matrix.csv")
 print("\n[4/5] Creating Census Data Significance Matrix (1992-2025)...")
 
 # Load census data
-df_census = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Tableau_Data\tableau_census_timeseries.csv')
-df_census['observation_date'] = pd.to_datetime(df_census['observation_date'])
-
-# Pivot data
-df_pivot = df_census.pivot(index='observation_date', columns='category', values='sales').reset_index()
-df_pivot.columns = ['observation_date', 'beauty_sales', 'fashion_sales']
+df_final = context.get('census_wide')
+if df_final is None:
+    df_census = context.load('census_timeseries', config.output_path('Tableau_Data', 'tableau_census_timeseries.csv'))
+    df_census = df_census.assign(observation_date=pd.to_datetime(df_census['observation_date']))
 
-# Merge with economic indicators
-df_econ = df_census[df_census['category'] == 'Beauty & Personal Care'][['observation_date', 'cci', 'cpi']].copy()
-df_final = df_pivot.merge(df_econ, on='observation_date', how='left').dropna()
-
-# Calculate additional indicators
-df_final['inflation_yoy'] = df_final['cpi'].pct_change(12) * 100
-df_final['beauty_growth'] = df_final['beauty_sales'].pct_change(12) * 100
-df_final['fashion_growth'] = df_final['fashion_sales'].pct_change(12) * 100
-df_final = df_final.dropna()
+    # Pivot to one column per category, merge CCI/CPI and add year-over-year growth
+    df_final = census_wide_frame(df_census)
+else:
+    print("   [OK] Using census_wide from the analysis context (no re-pivot)")
 
 # Define variables
 fashion_variables = ['beauty_sales', 'fashion_sales', 'beauty_growth', 'fashion_growth']
 economic_variables_census = ['cci', 'cpi', 'inflation_yoy']
 
 # Calculate correlations and p-values
-correlation_matrix = pd.DataFrame(index=fashion_variables, columns=economic_variables_census)
-p_value_matrix_census = pd.DataFrame(index=fashion_variables, columns=economic_variables_census)
-
-for fashion_var in fashion_variables:
-    for econ_var in economic_variables_census:
-        corr, p_value = stats.pearsonr(df_final[fashion_var], df_final[econ_var])
-        correlation_matrix.loc[fashion_var, econ_var] = corr
-        p_value_matrix_census.loc[fashion_var, econ_var] = p_value
-
-correlation_matrix = correlation_matrix.astype(float)
-p_value_matrix_census = p_value_matrix_census.astype(float)
+correlation_matrix, p_value_matrix_census = correlation_matrices(df_final, fashion_variables,
+                                                                 economic_variables_census)
 
 # Binary significance
 binary_significance_census = (p_value_matrix_census < 0.05).astype(int)
@@ -347,17 +346,19 @@ plt.xticks(rotation=45, ha='right', fontsize=11)
 plt.yticks(rotation=0, fontsize=11)
 plt.tight_layout()
 
-plt.savefig(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Viz\census_binary_significance_matrix.png', dpi=300, bbox_inches='tight')
+saved = writer.save_figure(fig, 'Viz/census_binary_significance_matrix.png',
+                           spec=(binary_significance_census, fashion_display, economic_display),
+                           dpi=300, bbox_inches='tight')
 plt.close()
 
-print("   [OK] Saved: Viz/census_binary_significance_matrix.png")
+print(f"   [OK] {'Saved' if saved else 'Unchanged'}: Viz/census_binary_significance_matrix.png")
 
-binary_significance_census.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_binary_significance_matrix.csv')
-correlation_matrix.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_correlation_matrix.csv')
-p_value_matrix_census.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Processed_Data\census_pvalue_matrix.csv')
-print("   [OK] Saved: Processed_Data/census_binary_significance_matrix.csv")
-print("   [OK] Saved: Processed_Data/census_correlation_matrix.csv")
-print("   [OK] Saved: Processed_Data/census_pvalue_matrix.csv")
+writer.write(matrix_frame(binary_significance_census), 'Processed_Data/census_binary_significance_matrix.csv')
+writer.write(matrix_frame(correlation_matrix), 'Processed_Data/census_correlation_matrix.csv')
+writer.write(matrix_frame(p_value_matrix_census), 'Processed_Data/census_pvalue_matrix.csv')
+print("   [OK] Queued: Processed_Data/census_binary_significance_matrix.csv")
+print("   [OK] Queued: Processed_Data/census_correlation_matrix.csv")
+print("   [OK] Queued: Processed_Data/census_pvalue_matrix.csv")
 
 # ============================================================================
 # PART 5: SEARCH INDICATORS RANKING
@@ -365,78 +366,19 @@ print("   [OK] Saved: Processed_Data/census_pvalue_matrix.csv")
 print("\n[5/5] Creating Search Indicators Ranking...")
 
 # Load search results
-search_results = pd.read_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Tableau_Data\tableau_search_results.csv')
-
-# Create rankings
-search_results['Rank_by_R2'] = search_results['R²'].rank(ascending=False, method='min').astype(int)
-search_results['Rank_by_Coefficient'] = search_results['Coefficient'].abs().rank(ascending=False, method='min').astype(int)
-search_results['Rank_by_Pvalue'] = search_results['P-value'].rank(ascending=True, method='min').astype(int)
-search_results['Rank_by_Fscore'] = search_results['F-statistic'].rank(ascending=False, method='min').astype(int)
-
-# Composite score
-weights = {'R2': 0.4, 'Pvalue': 0.3, 'Fscore': 0.2, 'Coefficient': 0.1}
-search_results['Composite_Score'] = (
-    search_results['Rank_by_R2'] * weights['R2'] +
-    search_results['Rank_by_Pvalue'] * weights['Pvalue'] +
-    search_results['Rank_by_Fscore'] * weights['Fscore'] +
-    search_results['Rank_by_Coefficient'] * weights['Coefficient']
-)
-
-search_results['Overall_Rank'] = search_results['Composite_Score'].rank(ascending=True, method='min').astype(int)
-
-# Add tiers
-def classify_tier(row):
-    if row['Overall_Rank'] <= 3:
-        return 'Tier 1: Strong Indicators'
-    elif row['Overall_Rank'] <= 5:
-        return 'Tier 2: Moderate Indicators'
-    else:
-        return 'Tier 3: Weak Indicators'
-
-search_results['Tier'] = search_results.apply(classify_tier, axis=1)
-
-# Add significance level
-def significance_level(p_value):
-    if p_value < 0.001:
-        return '***'
-    elif p_value < 0.01:
-        return '**'
-    elif p_value < 0.05:
-        return '*'
-    else:
-        return 'ns'
-
-search_results['Significance_Level'] = search_results['P-value'].apply(significance_level)
-
-# Add interpretation
-def interpret_r2(r2):
-    if r2 >= 0.15:
-        return 'High Explanatory Power'
-    elif r2 >= 0.10:
-        return 'Moderate Explanatory Power'
-    elif r2 >= 0.05:
-        return 'Low Explanatory Power'
-    else:
-        return 'Very Low Explanatory Power'
-
-search_results['R2_Interpretation'] = search_results['R²'].apply(interpret_r2)
-search_results['R2_Percent'] = search_results['R²'] * 100
-search_results['Adj_R2_Percent'] = search_results['Adj_R²'] * 100
-
-# Reorder columns
-columns_order = [
-    'Overall_Rank', 'Indicator', 'Category', 'Data_Type', 'Tier', 'Significant',
-    'Significance_Level', 'R²', 'R2_Percent', 'Adj_R²', 'Adj_R2_Percent',
-    'R2_Interpretation', 'Coefficient', 'P-value', 'F-statistic', 'Std_Error',
-    'Rank_by_R2', 'Rank_by_Coefficient', 'Rank_by_Pvalue', 'Rank_by_Fscore',
-    'Composite_Score'
-]
+search_results = context.load('search_results', config.output_path('Tableau_Data', 'tableau_search_results.csv'))
 
-search_ranking = search_results[columns_order].copy().sort_values('Overall_Rank')
+# Rank indicators and add tier / significance / R² labels
+search_ranking = rank_search_indicators(search_results)
 
 # Save
-search_ranking.to_csv(r'C:\Users\aadya\Coding_Projects\LittleLuxuries\Tableau_Data\tableau_search_indicators_ranking.csv', index=False)
-print("   [OK] Saved: Tableau_Data/tableau_search_indicators_ranking.csv")
+writer.write(search_ranking, 'Tableau_Data/tableau_search_indicators_ranking.csv')
+print("   [OK] Queued: Tableau_Data/tableau_search_indicators_ranking.csv")
+
+# Wait for the queued writes
+output_report = writer.close()
+print(f"\n   [OK] {(output_report['action'] != 'skipped').sum()} files written, "
+      f"{(output_report['action'] == 'skipped').sum()} unchanged and skipped")
 
 # ============================================================================
 # SUMMARY
@@ -459,10 +401,14 @@ print("   Tableau Files: Tableau_Data/")
 
 print("\n[KEY FINDINGS]")
 print(f"   - Dataset span: 2004-2024 (240 obs) and 1992-2025 (392 obs for census)")
-print(f"   - Top indicator: Mini Skirts (R2={search_ranking.iloc[0]['R2_Percent']:.1f}%)")
-print(f"   - Strongest correlation: Lipstick Index vs CPI (r=0.952)")
+print(f"   - Top indicator: {search_ranking.iloc[0]['Indicator']} (R2={search_ranking.iloc[0]['R2_Percent']:.1f}%)")
+strongest = correlations_flat_df.iloc[0]
+print(f"   - Strongest correlation: {strongest['Fashion Indicator']} vs {strongest['Economic Indicator']} "
+      f"(r={strongest['Correlation']:.3f})")
 print(f"   - Census: Beauty Sales vs CPI (r=0.995)")
-print(f"   - Significant correlations: {binary_significance.sum().sum()}/64 (76.6%)")
+n_significant = int(binary_significance.sum().sum())
+print(f"   - Significant correlations: {n_significant}/{binary_significance.size} "
+      f"({n_significant / binary_significance.size * 100:.1f}%)")
 
 print("\n[SUCCESS] All files ready for presentation and Tableau import!")
 print("=" * 80 + "\n")
@@ -0,0 +1,285 @@
+"""
+Little Luxuries Project - Search Indicator Engine
+==================================================
+Indicator groups and latent-variable fitting for the Google Trends search
+terms (PART 2A of the master analysis).
+
+Every indicator group is a one-factor model over a handful of search terms.
+The trends matrix is standardized once and placed in shared memory, and the
+groups are fitted across a process pool so hundreds of trend clusters can be
+scored without pickling the matrix for every task.
+
+Groups can also be discovered automatically: terms are linked to their top-k
+most correlated neighbours (computed block by block, never as a dense n x n
+matrix) and the sparse neighbour graph is clustered. Terms are compared on
+their 12-month changes by default: most search levels trend, and trending
+levels are all correlated with each other whatever they are about.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import AgglomerativeClustering, SpectralClustering
+from sklearn.decomposition import FactorAnalysis
+
+# Below this many groups a process pool costs more than it saves
+PARALLEL_MIN_GROUPS = 16
+
+# Series compared when clustering: 'yoy' (12-month change, removes trend and seasonality),
+# 'diff' (month-on-month change) or 'level' (as given)
+CLUSTER_TRANSFORMS = {'level': 0, 'diff': 1, 'yoy': 12}
+
+# Shared trends matrix, attached once per worker process
+_SHARED_MATRIX = None
+_SHARED_BLOCK = None
+
+
+def standardize_terms(df, terms, return_stats=False):
+    """Mean-impute and standardize search term columns (same as StandardScaler)"""
+    X = df[terms].to_numpy(dtype=np.float64, copy=True)
+    col_mean = np.nanmean(X, axis=0)
+    nan_rows, nan_cols = np.where(np.isnan(X))
+    X[nan_rows, nan_cols] = col_mean[nan_cols]
+
+    X -= X.mean(axis=0)
+    col_std = X.std(axis=0)
+    col_std[col_std == 0] = 1.0
+    X /= col_std
+    if return_stats:
+        return X, col_mean, col_std
+    return X
+
+
+def _fit_group(X, random_state=42):
+    """Fit a one-factor model and return scores, loadings and noise variances"""
+    fa = FactorAnalysis(n_components=1, random_state=random_state)
+    scores = fa.fit_transform(X)
+    return scores[:, 0], fa.components_[0], fa.noise_variance_
+
+
+def _attach_shared_matrix(name, shape):
+    """Pool initializer: map the shared trends matrix into this worker"""
+    global _SHARED_MATRIX, _SHARED_BLOCK
+    _SHARED_BLOCK = shared_memory.SharedMemory(name=name)
+    _SHARED_MATRIX = np.ndarray(shape, dtype=np.float64, buffer=_SHARED_BLOCK.buf)
+
+
+def _fit_shared_group(task):
+    """Pool task: fit one indicator group from the shared trends matrix"""
+    indicator_name, column_idx, random_state = task
+    scores, loadings, noise = _fit_group(_SHARED_MATRIX[:, column_idx], random_state)
+    return indicator_name, scores, loadings, noise
+
+
+def fit_latent_variables(df, indicators_dict, n_workers=None, random_state=42):
+    """
+    Fit a one-factor latent variable for every indicator group.
+
+    Returns (scores_df, loadings_df). scores_df has date, cci and one
+    '<indicator>_score' column per fitted group; loadings_df has one row per
+    indicator/term with its loading, noise variance and the term's mean/std
+    (enough to score new months with score_latent_variables).
+    """
+    groups = {}
+    for indicator_name, search_terms in indicators_dict.items():
+        available_terms = [term for term in search_terms if term in df.columns]
+        if len(available_terms) >= 2:
+            groups[indicator_name] = available_terms
+
+    all_terms = list(dict.fromkeys(term for terms in groups.values() for term in terms))
+    term_idx = {term: i for i, term in enumerate(all_terms)}
+    if all_terms:
+        X, term_mean, term_std = standardize_terms(df, all_terms, return_stats=True)
+    else:
+        X, term_mean, term_std = np.empty((len(df), 0)), np.empty(0), np.empty(0)
+
+    tasks = [(name, np.array([term_idx[t] for t in terms]), random_state)
+             for name, terms in groups.items()]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(tasks))
+
+    if n_workers <= 1 or len(tasks) < PARALLEL_MIN_GROUPS:
+        fitted = [(name, *_fit_group(X[:, idx], rs)) for name, idx, rs in tasks]
+    else:
+        block = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=block.buf)[:] = X
+            chunksize = max(1, len(tasks) // (n_workers * 4))
+            with ProcessPoolExecutor(max_workers=n_workers,
+                                     initializer=_attach_shared_matrix,
+                                     initargs=(block.name, X.shape)) as pool:
+                fitted = list(pool.map(_fit_shared_group, tasks, chunksize=chunksize))
+        finally:
+            block.close()
+            block.unlink()
+
+    scores_df = df[['date', 'cci']].copy()
+    score_columns = {f'{name}_score': scores for name, scores, _, _ in fitted}
+    scores_df = pd.concat([scores_df, pd.DataFrame(score_columns, index=df.index)], axis=1)
+
+    loadings_df = pd.DataFrame({
+        'Indicator': [name for name, _, _, _ in fitted for _ in groups[name]],
+        'Term': [term for name, _, _, _ in fitted for term in groups[name]],
+        'Loading': [v for _, _, loadings, _ in fitted for v in loadings],
+        'Noise_Variance': [v for _, _, _, noise in fitted for v in noise],
+    })
+    loadings_df['Term_Mean'] = term_mean[[term_idx[t] for t in loadings_df['Term']]]
+    loadings_df['Term_Std'] = term_std[[term_idx[t] for t in loadings_df['Term']]]
+
+    return scores_df, loadings_df
+
+
+def score_latent_variables(df, loadings_df):
+    """
+    Score rows with already-fitted factor models (e.g. newly released months).
+
+    Uses the stored term means/stds and loadings, so the scores are on the
+    same scale as the original fit (FactorAnalysis.transform for one factor).
+    """
+    scores = {}
+    for indicator_name, group in loadings_df.groupby('Indicator', sort=False):
+        X = df[group['Term'].tolist()].to_numpy(dtype=np.float64, copy=True)
+        mean = group['Term_Mean'].to_numpy()
+        nan_rows, nan_cols = np.where(np.isnan(X))
+        X[nan_rows, nan_cols] = mean[nan_cols]
+        Z = (X - mean) / group['Term_Std'].to_numpy()
+
+        loadings = group['Loading'].to_numpy()
+        w_psi = loadings / group['Noise_Variance'].to_numpy()
+        scores[f'{indicator_name}_score'] = (Z @ w_psi) / (1.0 + w_psi @ loadings)
+    return pd.DataFrame(scores, index=df.index)
+
+
+# ========================================================================================================
+# AUTOMATIC INDICATOR GROUPS
+# ========================================================================================================
+
+def correlation_neighbors(Z, k_neighbors=10, min_corr=0.5, block_size=512):
+    """
+    Sparse top-k correlation graph between the columns of a standardized matrix.
+
+    Correlations are computed one block of columns at a time, so memory stays
+    at block_size x n_terms instead of n_terms x n_terms.
+    """
+    n_obs, n_terms = Z.shape
+    U = (Z / np.sqrt(n_obs)).astype(np.float32)
+    k = min(k_neighbors, n_terms - 1)
+
+    rows, cols, vals = [], [], []
+    for start in range(0, n_terms, block_size):
+        stop = min(start + block_size, n_terms)
+        corr = U[:, start:stop].T @ U
+        corr[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(corr, -k, axis=1)[:, -k:]
+        top_corr = np.take_along_axis(corr, top, axis=1)
+        keep = top_corr >= min_corr
+
+        rows.append(np.nonzero(keep)[0] + start)
+        cols.append(top[keep])
+        vals.append(top_corr[keep])
+
+    graph = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                              shape=(n_terms, n_terms))
+    return graph.maximum(graph.T)
+
+
+def _group_name(terms, graph, term_idx):
+    """Name a cluster by its shared term prefix, else by its most central term"""
+    prefixes = {re.split(r'_', term, maxsplit=1)[0] for term in terms}
+    if len(prefixes) == 1:
+        return prefixes.pop()
+    idx = [term_idx[t] for t in terms]
+    centrality = np.asarray(graph[idx][:, idx].sum(axis=1)).ravel()
+    return terms[int(centrality.argmax())]
+
+
+def cluster_search_terms(df, terms=None, method='agglomerative', n_clusters=None, transform='yoy',
+                         linkage='average', k_neighbors=10, min_corr=0.4, min_group_size=2, block_size=512):
+    """
+    Cluster Google Trends terms by correlation into indicator groups.
+
+    Returns a dict of group name -> list of term columns, in the same shape as
+    the hand-written indicators_dict, so it can be passed straight to
+    create_latent_variables. Correlations are taken between the transformed
+    series (CLUSTER_TRANSFORMS; rows must be consecutive months). method is
+    'agglomerative' (linkage constrained to the neighbour graph; n_clusters=None
+    cuts the tree at min_corr) or 'spectral' (needs n_clusters).
+
+    On the project's 40 terms the defaults (12-month changes, average
+    linkage, r >= 0.4) give groups of 2-6 terms, raw or seasonally adjusted;
+    on levels the largest group held 11-24 terms whatever the linkage.
+    """
+    if transform not in CLUSTER_TRANSFORMS:
+        raise ValueError(f"Unknown transform: {transform} (choose from {', '.join(CLUSTER_TRANSFORMS)})")
+    if terms is None:
+        terms = [c for c in df.select_dtypes(include='number').columns if c not in ('cci',)]
+    lag = CLUSTER_TRANSFORMS[transform]
+    if lag:
+        df = df[terms].diff(lag).iloc[lag:]
+    terms = [t for t in terms if df[t].notna().any()]
+    Z = standardize_terms(df, terms)
+    graph = correlation_neighbors(Z, k_neighbors=k_neighbors, min_corr=min_corr,
+                                  block_size=block_size)
+
+    if method == 'spectral':
+        if n_clusters is None:
+            raise ValueError("spectral clustering needs n_clusters")
+        # Terms with no neighbour above min_corr keep a weak self-link
+        affinity = graph + sparse.identity(len(terms), format='csr') * 1e-6
+        model = SpectralClustering(n_clusters=n_clusters, affinity='precomputed',
+                                   assign_labels='cluster_qr', random_state=42)
+        labels = model.fit_predict(affinity)
+    elif method == 'agglomerative':
+        # Unit-norm series: euclidean distance = sqrt(2 * (1 - r))
+        U = (Z / np.sqrt(len(Z))).T
+        if n_clusters is not None:
+            model = AgglomerativeClustering(n_clusters=n_clusters, connectivity=graph,
+                                            linkage=linkage)
+            labels = model.fit_predict(U)
+        else:
+            # Cut the tree at min_corr inside each connected component of the graph
+            threshold = np.sqrt(2 * (1 - min_corr))
+            _, components = connected_components(graph, directed=False)
+            labels = np.full(len(terms), -1)
+            next_label = 0
+            for comp in np.unique(components):
+                members = np.flatnonzero(components == comp)
+                if len(members) < min_group_size:
+                    continue
+                if len(members) == 2:
+                    comp_labels = np.zeros(2, dtype=int)
+                else:
+                    # Linkage over every pair in the component: with the sparse graph as connectivity,
+                    # sklearn links clusters through their graph edges only and chains them together
+                    distance = np.sqrt(np.clip(2 * (1 - U[members] @ U[members].T), 0, None))
+                    model = AgglomerativeClustering(n_clusters=None, distance_threshold=threshold,
+                                                    metric='precomputed', linkage=linkage)
+                    comp_labels = model.fit_predict(distance)
+                labels[members] = comp_labels + next_label
+                next_label += comp_labels.max() + 1
+    else:
+        raise ValueError(f"Unknown clustering method: {method}")
+
+    term_idx = {term: i for i, term in enumerate(terms)}
+    groups = {}
+    for label in np.unique(labels[labels >= 0]):
+        members = [terms[i] for i in np.flatnonzero(labels == label)]
+        if len(members) < min_group_size:
+            continue
+        base_name = name = _group_name(members, graph, term_idx)
+        suffix = 2
+        while name in groups:
+            name = f"{base_name} {suffix}"
+            suffix += 1
+        groups[name] = members
+
+    return groups
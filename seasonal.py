@@ -0,0 +1,220 @@
+"""
+Little Luxuries Project - Seasonal Adjustment
+==============================================
+Seasonally adjusted (_sa) versions of the not-seasonally-adjusted monthly
+series: FRED clothing-store sales (MRTSSM448USN), the Census MRTS sales of
+every NAICS code and the Google Trends search terms.
+
+Classical decomposition, vectorized across series: all series of a source are
+laid out as one months × series matrix on a complete monthly grid, the
+centered 2×12 moving-average trend of every column is one matrix product over
+a sliding window, and the seasonal factor of each calendar month is the mean
+detrended value of that month. Adjusting a row is then a gather of the factor
+for its (month of year, series) and a divide (multiplicative model) or a
+subtraction (additive model).
+
+Decompositions are cached on disk, keyed by a hash of the matrix, so
+unchanged inputs are never decomposed twice. Wide batches are split into
+column chunks across a process pool.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from deflation import month_codes
+
+PERIOD = 12
+MODELS = ['multiplicative', 'additive']
+
+# Not-seasonally-adjusted columns adjusted in each frame of the master analysis
+NSA_COLUMNS = {
+    'master': ['retail_sales_clothing', 'retail_sales_clothing_real'],
+    'census': ['sales', 'sales_real'],
+}
+
+# Below this many series a process pool costs more than it saves
+PARALLEL_MIN_SERIES = 64
+
+# Centered 2×12 moving average: half weights on the two ends of the 13-month window
+TREND_WEIGHTS = np.r_[0.5, np.ones(PERIOD - 1), 0.5] / PERIOD
+
+
+def trend(values):
+    """Centered 2×12 moving average of every column (NaN in the first and last 6 months)"""
+    result = np.full(values.shape, np.nan)
+    if len(values) > PERIOD:
+        result[PERIOD // 2:-(PERIOD // 2)] = sliding_window_view(values, PERIOD + 1, axis=0) @ TREND_WEIGHTS
+    return result
+
+
+def decompose(values, phase, model='multiplicative'):
+    """
+    Seasonal factors (PERIOD × series) and trend (months × series) of a
+    months × series matrix; phase is the calendar month (0-11) of each row.
+    Calendar months a series never covers get the neutral factor.
+    """
+    multiplicative = model == 'multiplicative'
+    level = trend(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if multiplicative:
+            detrended = np.where(level > 0, values / level, np.nan)
+        else:
+            detrended = values - level
+
+    factors = np.full((PERIOD, values.shape[1]), np.nan)
+    observed = ~np.isnan(detrended)
+    for month in range(PERIOD):
+        rows = phase == month
+        n = observed[rows].sum(axis=0)
+        total = np.where(observed[rows], detrended[rows], 0).sum(axis=0)
+        factors[month] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+    # Normalize so the factors average to 1 (multiplicative) or 0 (additive) over the year
+    estimated = ~np.isnan(factors)
+    center = np.where(estimated, factors, 0).sum(axis=0) / np.maximum(estimated.sum(axis=0), 1)
+    if multiplicative:
+        factors /= center
+    else:
+        factors -= center
+    factors[np.isnan(factors)] = 1.0 if multiplicative else 0.0
+    return factors, level
+
+
+def _decompose_task(args):
+    values, phase, model = args
+    return decompose(values, phase, model)
+
+
+def decompose_batch(values, phase, model='multiplicative', n_workers=None):
+    """decompose() over column chunks in a process pool when there are many series"""
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers <= 1 or values.shape[1] < PARALLEL_MIN_SERIES:
+        return decompose(values, phase, model)
+    chunks = np.array_split(np.arange(values.shape[1]), n_workers)
+    tasks = [(values[:, chunk], phase, model) for chunk in chunks if len(chunk)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        results = list(pool.map(_decompose_task, tasks))
+    return np.hstack([factors for factors, _ in results]), np.hstack([level for _, level in results])
+
+
+def cached_decomposition(values, phase, model='multiplicative', cache_dir=None, n_workers=None):
+    """decompose_batch(), read from / saved to <cache_dir>/<hash of the inputs>.npz"""
+    if cache_dir is None:
+        return decompose_batch(values, phase, model, n_workers) + (False,)
+    digest = hashlib.sha1()
+    for part in [str(values.shape).encode(), model.encode(), values.tobytes(), phase.tobytes()]:
+        digest.update(part)
+    path = os.path.join(cache_dir, f"{digest.hexdigest()[:20]}.npz")
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return cached['factors'], cached['trend'], True
+    factors, level = decompose_batch(values, phase, model, n_workers)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, factors=factors, trend=level)
+    os.replace(tmp_path, path)
+    return factors, level, False
+
+
+class SeasonalFactors:
+    """Seasonal factors of named monthly series; adjust() applies them to any frame"""
+
+    def __init__(self, factors, names, model='multiplicative', by=None):
+        if model not in MODELS:
+            raise ValueError(f"Unknown seasonal model: {model} (choose from {', '.join(MODELS)})")
+        self.factors = np.asarray(factors, dtype=float)
+        self.names = list(names)
+        self.model = model
+        self.by = by
+        self.cached = False
+        self._series_index = {name: i for i, name in enumerate(self.names)}
+
+    @staticmethod
+    def series_name(column, key=None):
+        return column if key is None else f'{column}[{key}]'
+
+    @classmethod
+    def fit(cls, df, columns, date_col, by=None, model='multiplicative', cache_dir=None, n_workers=None):
+        """
+        Decompose every column (per value of the by column, e.g. NAICS code)
+        in one batch: the series are scattered into a months × series matrix
+        spanning the first to the last month of the frame.
+        """
+        columns = [col for col in columns if col in df.columns]
+        codes = month_codes(df[date_col])
+        dated = codes >= 0
+        if by is None:
+            groups, levels = np.zeros(len(df), dtype=np.int64), [None]
+        else:
+            groups, levels = pd.factorize(df[by], sort=True)
+            dated &= groups >= 0
+        codes, groups = codes[dated], groups[dated]
+        first = int(codes.min()) if len(codes) else 0
+        n_months = int(codes.max()) - first + 1 if len(codes) else 0
+
+        values = np.full((n_months, len(columns) * len(levels)), np.nan)
+        for j, col in enumerate(columns):
+            values[codes - first, j * len(levels) + groups] = df[col].to_numpy(dtype=float)[dated]
+        phase = (first + np.arange(n_months)) % PERIOD
+
+        names = [cls.series_name(col, key) for col in columns for key in levels]
+        if not names or n_months == 0:
+            return cls(np.empty((PERIOD, 0)), [], model, by)
+        factors, _, cached = cached_decomposition(values, phase, model, cache_dir, n_workers)
+        fitted = cls(factors, names, model, by)
+        fitted.cached = cached
+        return fitted
+
+    def adjust(self, df, columns, date_col, suffix='_sa'):
+        """df plus a <column><suffix> seasonally adjusted column for each fitted column present"""
+        columns = [col for col in columns if col in df.columns
+                   and any(name == col or name.startswith(f'{col}[') for name in self.names)]
+        if not columns:
+            return df
+        codes = month_codes(df[date_col])
+        phase = np.where(codes >= 0, codes % PERIOD, 0)
+        keys = [None] * len(df) if self.by is None else df[self.by].tolist()
+        neutral = 1.0 if self.model == 'multiplicative' else 0.0
+
+        adjusted = {}
+        for col in columns:
+            series = np.array([self._series_index.get(self.series_name(col, key), -1) for key in keys], dtype=np.int64)
+            factor = np.full(len(df), neutral)
+            known = series >= 0
+            factor[known] = self.factors[phase[known], series[known]]
+            values = df[col].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # A zero factor (a month that was always 0 in the fitted span) leaves the value undefined
+                values = np.where(factor > 0, values / factor, np.nan) if self.model == 'multiplicative' \
+                    else values - factor
+            adjusted[f'{col}{suffix}'] = np.where(codes >= 0, values, np.nan)
+        return df.assign(**adjusted)
+
+    def frame(self):
+        """Factors in long form: series, month (1-12), factor"""
+        return pd.DataFrame({
+            'series': np.repeat(self.names, PERIOD),
+            'month': np.tile(np.arange(1, PERIOD + 1), len(self.names)),
+            'factor': self.factors.T.ravel(),
+            'model': self.model,
+        })
+
+    def to_dict(self):
+        return {'names': self.names, 'model': self.model, 'by': self.by, 'factors': self.factors.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        factors = np.asarray(state['factors'], dtype=float).reshape(PERIOD, len(state['names']))
+        return cls(factors, state['names'], state['model'], state['by'])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"SeasonalFactors({len(self.names)} series, {self.model})"
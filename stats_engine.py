@@ -0,0 +1,311 @@
+"""
+Little Luxuries Project - Statistics Engine
+============================================
+Sufficient-statistics kernels shared by the search, Census, comparison and
+significance analyses.
+
+A PairAccumulator keeps, for every requested (x, y) pair, the number of
+complete observations, the means and the centered sums of squares and
+cross-products. Those are the same sufficient statistics as n, Σx, Σy, Σx²,
+Σy², Σxy, but updating them batch by batch (Chan et al. pairwise formulas)
+does not lose precision to cancellation the way raw power sums do. Batches
+can come from a stream, from worker processes (merge) or from a later
+month's release (to_dict / from_dict), and finalize() turns the statistics
+into Pearson r and the simple OLS fit y ~ const + x - the same figures as
+scipy.stats.pearsonr and statsmodels OLS, without rescanning the raw data.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+MOMENTS = ['n', 'mean_x', 'mean_y', 'sxx', 'sxy', 'syy']
+
+
+class PairAccumulator:
+    """Streaming count, means and centered co-moments for many (x, y) column pairs"""
+
+    def __init__(self, pairs):
+        self.pairs = [(x, y) for x, y in pairs]
+        for name in MOMENTS:
+            setattr(self, name, np.zeros(len(self.pairs)))
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def update(self, batch):
+        """Add the complete (non-NaN) observations of each pair in a DataFrame batch"""
+        if len(batch) == 0 or not self.pairs:
+            return self
+        x = batch[[x for x, _ in self.pairs]].to_numpy(dtype=np.float64)
+        y = batch[[y for _, y in self.pairs]].to_numpy(dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x = np.where(valid, x, 0.0)
+        y = np.where(valid, y, 0.0)
+
+        n = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_x = np.where(n > 0, x.sum(axis=0) / n, 0.0)
+            mean_y = np.where(n > 0, y.sum(axis=0) / n, 0.0)
+        # Two-pass within the batch: center first, then sum products
+        dx = np.where(valid, x - mean_x, 0.0)
+        dy = np.where(valid, y - mean_y, 0.0)
+        self._combine(n, mean_x, mean_y, (dx * dx).sum(axis=0), (dx * dy).sum(axis=0),
+                      (dy * dy).sum(axis=0))
+        return self
+
+    def merge(self, other):
+        """Fold in another accumulator over the same pairs (e.g. from a worker or a later batch)"""
+        if other.pairs != self.pairs:
+            raise ValueError("Accumulators track different pairs")
+        self._combine(other.n, other.mean_x, other.mean_y, other.sxx, other.sxy, other.syy)
+        return self
+
+    def _combine(self, n_b, mean_x_b, mean_y_b, sxx_b, sxy_b, syy_b):
+        n_a = self.n
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, n_a * n_b / n, 0.0)
+            share_b = np.where(n > 0, n_b / n, 0.0)
+        delta_x = mean_x_b - self.mean_x
+        delta_y = mean_y_b - self.mean_y
+        self.sxx = self.sxx + sxx_b + delta_x * delta_x * weight
+        self.sxy = self.sxy + sxy_b + delta_x * delta_y * weight
+        self.syy = self.syy + syy_b + delta_y * delta_y * weight
+        self.mean_x = self.mean_x + delta_x * share_b
+        self.mean_y = self.mean_y + delta_y * share_b
+        self.n = n
+
+    def finalize(self):
+        """
+        One row per pair: n, Pearson r, slope/intercept of y ~ const + x, R²,
+        adjusted R², slope standard error, t, F and the two-sided p-value.
+        Pairs with fewer than 3 observations get NaN statistics.
+        """
+        n = self.n
+        dof = n - 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = self.sxy / np.sqrt(self.sxx * self.syy)
+            r = np.clip(r, -1.0, 1.0)
+            slope = self.sxy / self.sxx
+            r2 = r * r
+            ss_resid = self.syy * (1 - r2)
+            std_error = np.sqrt(ss_resid / dof / self.sxx)
+            t_stat = slope / std_error
+            p_value = 2 * stats.t.sf(np.abs(t_stat), dof)
+            adj_r2 = 1 - (1 - r2) * (n - 1) / dof
+
+        results = pd.DataFrame({
+            'x': [x for x, _ in self.pairs],
+            'y': [y for _, y in self.pairs],
+            'n': n.astype(np.int64),
+            'r': r,
+            'slope': slope,
+            'intercept': self.mean_y - slope * self.mean_x,
+            'r2': r2,
+            'adj_r2': adj_r2,
+            'std_error': std_error,
+            't': t_stat,
+            'f': t_stat ** 2,
+            'p_value': p_value,
+        })
+        results.loc[results['n'] < 3, ['r', 'slope', 'intercept', 'r2', 'adj_r2', 'std_error',
+                                       't', 'f', 'p_value']] = np.nan
+        return results
+
+    def to_dict(self):
+        """JSON-serializable state (see from_dict)"""
+        state = {'pairs': [[str(x), str(y)] for x, y in self.pairs]}
+        state.update({name: getattr(self, name).tolist() for name in MOMENTS})
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        accumulator = cls(state['pairs'])
+        for name in MOMENTS:
+            setattr(accumulator, name, np.asarray(state[name], dtype=np.float64))
+        return accumulator
+
+
+def accumulate(df, pairs):
+    """Accumulator over all of df for the given (x, y) pairs"""
+    return PairAccumulator(pairs).update(df)
+
+
+def correlation_matrices(df, rows, columns):
+    """Pearson r and p-value matrices (rows x columns) from one pass over df"""
+    pairs = [(row, col) for row in rows for col in columns]
+    results = accumulate(df, pairs).finalize()
+    r_matrix = results.pivot(index='x', columns='y', values='r').reindex(index=rows, columns=columns)
+    p_matrix = results.pivot(index='x', columns='y', values='p_value').reindex(index=rows, columns=columns)
+    r_matrix.index.name = p_matrix.index.name = None
+    r_matrix.columns.name = p_matrix.columns.name = None
+    return r_matrix, p_matrix
+
+
+# ========================================================================================================
+# MULTIVARIATE REGRESSION (SHARED CROSS-PRODUCT MATRIX)
+# ========================================================================================================
+
+class CrossProducts:
+    """
+    Streaming count, means and centered cross-product matrix of a set of
+    columns, over the rows where every column is present.
+
+    Every multivariate fit, VIF and candidate predictor subset is solved from
+    this one matrix, so models over the same columns never rescan the data.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.index = {col: i for i, col in enumerate(self.columns)}
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.cross = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, batch):
+        """Add the complete rows of a DataFrame batch"""
+        values = batch[self.columns].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values) > 0:
+            mean = values.mean(axis=0)
+            centered = values - mean
+            self._combine(len(values), mean, centered.T @ centered)
+        return self
+
+    def merge(self, other):
+        """Fold in another CrossProducts over the same columns"""
+        if other.columns != self.columns:
+            raise ValueError("Cross-product matrices cover different columns")
+        if other.n > 0:
+            self._combine(other.n, other.mean, other.cross)
+        return self
+
+    def _combine(self, n_b, mean_b, cross_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.cross = self.cross + cross_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean = self.mean + delta * (n_b / n)
+        self.n = n
+
+    def _idx(self, names):
+        return [self.index[name] for name in names]
+
+    def correlation(self, columns=None):
+        """Correlation matrix of the given columns (default: all)"""
+        columns = self.columns if columns is None else list(columns)
+        idx = self._idx(columns)
+        cross = self.cross[np.ix_(idx, idx)]
+        scale = np.sqrt(np.diag(cross))
+        return pd.DataFrame(cross / np.outer(scale, scale), index=columns, columns=columns)
+
+    def vif(self, predictors):
+        """
+        Variance inflation factor of every predictor: the diagonal of the inverse
+        correlation matrix (= 1 / (1 - R²) of each auxiliary regression).
+        """
+        inverse = np.linalg.pinv(self.correlation(predictors).to_numpy())
+        return pd.Series(np.diag(inverse), index=list(predictors), name='VIF')
+
+    def fit(self, responses, predictors):
+        """
+        Joint OLS of every response on const + predictors.
+
+        Returns (coefficients, models): one row per response and term with
+        the estimate, standard error, t and p-value; one row per response
+        with R², adjusted R², F and its p-value.
+        """
+        responses, predictors = list(responses), list(predictors)
+        s_idx, y_idx = self._idx(predictors), self._idx(responses)
+        n, k = self.n, len(predictors)
+        dof = n - k - 1
+
+        cross_inv = np.linalg.pinv(self.cross[np.ix_(s_idx, s_idx)])
+        beta = cross_inv @ self.cross[np.ix_(s_idx, y_idx)]                 # k x m
+        intercept = self.mean[y_idx] - self.mean[s_idx] @ beta
+        total = np.diag(self.cross)[y_idx]
+        rss = total - np.einsum('km,km->m', self.cross[np.ix_(s_idx, y_idx)], beta)
+        sigma2 = rss / dof
+
+        mean_s = self.mean[s_idx]
+        se_slopes = np.sqrt(np.outer(np.diag(cross_inv), sigma2))
+        se_intercept = np.sqrt(sigma2 * (1 / n + mean_s @ cross_inv @ mean_s))
+
+        coefficients = []
+        for j, response in enumerate(responses):
+            terms = [('const', intercept[j], se_intercept[j])] + \
+                    [(predictors[i], beta[i, j], se_slopes[i, j]) for i in range(k)]
+            for term, estimate, std_error in terms:
+                t_stat = estimate / std_error
+                coefficients.append({'Response': response, 'Term': term, 'Coefficient': estimate,
+                                     'Std_Error': std_error, 't': t_stat,
+                                     'P-value': 2 * stats.t.sf(abs(t_stat), dof)})
+
+        r2 = 1 - rss / total
+        f_stat = (r2 / k) / ((1 - r2) / dof)
+        models = pd.DataFrame({'Response': responses, 'N': n, 'Predictors': k, 'R²': r2,
+                               'Adj_R²': 1 - (1 - r2) * (n - 1) / dof, 'F-statistic': f_stat,
+                               'F_p-value': stats.f.sf(f_stat, k, dof)})
+        return pd.DataFrame(coefficients), models
+
+    def fit_subsets(self, responses, subsets):
+        """
+        R², adjusted R², RSS and BIC (as statsmodels reports it) of const +
+        subset for every candidate predictor subset and response. Subsets of
+        equal size are solved as one batched linear system on slices of the
+        shared cross-product matrix.
+        """
+        responses = list(responses)
+        y_idx = self._idx(responses)
+        total = np.diag(self.cross)[y_idx]
+        n = self.n
+
+        by_size = {}
+        for subset in subsets:
+            by_size.setdefault(len(subset), []).append(list(subset))
+
+        rows = []
+        for k, group in by_size.items():
+            idx = np.array([self._idx(subset) for subset in group])          # b x k
+            gram = self.cross[idx[:, :, None], idx[:, None, :]]              # b x k x k
+            rhs = self.cross[idx[:, :, None], np.array(y_idx)[None, None, :]]  # b x k x m
+            try:
+                beta = np.linalg.solve(gram, rhs)
+            except np.linalg.LinAlgError:
+                beta = np.linalg.pinv(gram) @ rhs
+            rss = total[None, :] - np.einsum('bkm,bkm->bm', rhs, beta)
+            dof = n - k - 1
+            for b, subset in enumerate(group):
+                for j, response in enumerate(responses):
+                    r2 = 1 - rss[b, j] / total[j]
+                    rows.append({'Response': response, 'Subset': ' + '.join(map(str, subset)),
+                                 'Size': k, 'R²': r2, 'Adj_R²': 1 - (1 - r2) * (n - 1) / dof,
+                                 'RSS': rss[b, j],
+                                 'BIC': n * (np.log(2 * np.pi * rss[b, j] / n) + 1) + (k + 1) * np.log(n)})
+        return pd.DataFrame(rows)
+
+
+def screen_vif(cross_products, predictors, threshold=10.0, keep=()):
+    """
+    Drop the predictor with the highest VIF until every VIF is at most
+    threshold (columns in keep are never dropped). Each step is one inverse
+    of the remaining correlation matrix. Returns (retained, VIF table).
+    """
+    retained = list(predictors)
+    dropped = []
+    while len(retained) > 1:
+        vif = cross_products.vif(retained)
+        candidates = vif.drop([col for col in keep if col in vif.index])
+        if len(candidates) == 0 or candidates.max() <= threshold:
+            break
+        worst = candidates.idxmax()
+        dropped.append((worst, candidates[worst]))
+        retained.remove(worst)
+
+    final_vif = cross_products.vif(retained) if retained else pd.Series(dtype=float)
+    table = pd.DataFrame(
+        [{'Predictor': col, 'VIF': final_vif[col], 'Retained': 'Yes', 'Drop_Step': np.nan}
+         for col in retained] +
+        [{'Predictor': col, 'VIF': vif_value, 'Retained': 'No', 'Drop_Step': step + 1}
+         for step, (col, vif_value) in enumerate(dropped)])
+    return retained, table